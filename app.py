@@ -2,54 +2,144 @@
 # pip install google-genai python-dotenv flask flask-cors pdfplumber python-docx pandas Pillow pytesseract openpyxl
 
 import json
+import logging
 import os
-import io
-import base64
 import re
-from datetime import datetime
-from flask import Flask, request, Response, jsonify
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from flask import Flask, Request, request, Response, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
-import pdfplumber
-import docx
-import pandas as pd
-from PIL import Image
-try:
-    from docling.document_converter import DocumentConverter
-    from docling.datamodel.base_models import InputFormat
-    DOCLING_AVAILABLE = True
-except ImportError:
-    DOCLING_AVAILABLE = False
+from climate_normals import create_climate_normals
+from config import env_bool, env_float, env_int, env_list
+from docling_pool import DOCLING_AVAILABLE, get_converter_pool
+from extraction_service import ExtractionQueueFull, ExtractionTimeout, create_extraction_service
+from genai_client import get_client as get_genai_client, model_config
+from inference_backends import create_inference_backend
+from model_router import create_model_router
+from response_cache import create_response_cache, inputs_cache_key
+from singleflight import SingleFlight
+from extraction_cache import create_extraction_cache
+import rule_recommender
+from prompt_builder import compact_inputs, fit_text_to_budget, log_usage
+from rate_limiter import (
+    BULK,
+    INTERACTIVE,
+    RateLimitTimeout,
+    is_rate_limit_error,
+    limiter_stats,
+    rate_limited_call,
+    request_tokens,
+)
+from report_parser import build_fields_prompt, extract_fields, missing_fields
+from soil_fields import FIELD_SYNONYMS
+from job_queue import RetryJob, create_job_queue
+import metrics
+from normalization import normalize_record, normalize_records
+from stream_json import recommendation_events, sse_event
+from upload_spool import SpooledUpload, UploadTooLarge, max_upload_bytes, spool_stream_factory, spool_upload
 
 # .env dosyasından değişkenleri yükle
 load_dotenv()
+# Modül yüklenirken okunan METRICS_* ayarlarını .env ile güncelle
+metrics.configure()
+
+class SpoolingRequest(Request):
+    """Yüklenen dosya parçalarını bellek yerine doğrudan spool klasörüne yazan request"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spool_stream_factory(total_content_length, content_type, filename, content_length)
+
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)  # Frontend'den istekler için CORS desteği
 
-# Maksimum dosya boyutu: 10MB
-app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+# İstek gövdesi sınırı en büyük tür sınırıdır; tür bazlı sınırlar UPLOAD_SIZE_LIMITS ile (varsayılan 10MB)
+app.config['MAX_CONTENT_LENGTH'] = max_upload_bytes()
 
+# Öneri yanıtları için önbellek (RECOMMEND_CACHE_* ortam değişkenleri ile ayarlanır)
+response_cache = create_response_cache()
 
-def generate_recommendations(inputs):
-    """Gemini API kullanarak ürün önerileri oluştur"""
-    
-    # Prompt oluştur
-    prompt = f"""
+# Aynı anda gelen özdeş öneri istekleri tek model üretimini paylaşır (RECOMMEND_SINGLEFLIGHT)
+recommendation_flights = SingleFlight() if env_bool("RECOMMEND_SINGLEFLIGHT", True) else None
+
+# Yüklenen dosyalar için SHA-256 anahtarlı çıkarma önbelleği (EXTRACTION_CACHE_* ile ayarlanır)
+extraction_cache = create_extraction_cache()
+
+# CPU'ya bağlı çıkarma işleri için süreç havuzu (EXTRACTION_* ile ayarlanır)
+DOCLING_WARMUP = env_bool("DOCLING_WARMUP", False) or '--warmup-docling' in sys.argv
+extraction_service = create_extraction_service(warm_docling=DOCLING_WARMUP)
+
+# Docling modellerini açılışta yükle (DOCLING_WARMUP=1 veya --warmup-docling)
+# Süreç havuzu modunda modeller her worker sürecinde yüklenir
+if DOCLING_WARMUP:
+    if extraction_service.inline:
+        get_converter_pool().start_background_warmup()
+    else:
+        extraction_service.start_background_warmup()
+
+# Seçilen çıkarıcıların kütüphanelerini açılışta arka planda yükle (EXTRACTOR_PRELOAD)
+# Süreç havuzu modunda Docling ısıtması worker'ları zaten başlatıp ön yüklemeyi yapar
+if extraction_service.preload and (extraction_service.inline or not DOCLING_WARMUP):
+    extraction_service.start_background_warmup()
+
+# OCR öncesi resim ön işleme: döndürme, küçültme, kırpma, eğiklik, eşikleme (IMAGE_* ile ayarlanır)
+IMAGE_PREPROCESS = env_bool("IMAGE_PREPROCESS", True)
+
+# Yaygın vakalar için kural tabanlı yerel öneri (RULE_ENGINE_* ile ayarlanır)
+RULE_ENGINE_ENABLED = env_bool("RULE_ENGINE_ENABLED", True)
+RULE_ENGINE_MIN_CONFIDENCE = env_float("RULE_ENGINE_MIN_CONFIDENCE", 80.0)
+
+# Rapor metninden desenlerle alan okuma; LLM sadece eksik alanlar için çağrılır
+PARSE_FAST_PATH = env_bool("PARSE_FAST_PATH", True)
+PARSE_REQUIRED_FIELDS = tuple(env_list(
+    "PARSE_REQUIRED_FIELDS", ("pH", "organic_matter", "phosphorus_P", "potassium_K")
+))
+
+# lat/lon ve ay verilince eksik iklim alanları yerel iklim normallerinden doldurulur (CLIMATE_NORMALS_*)
+climate_normals = create_climate_normals()
+
+# Görev bazlı model seçimi, fallback ve hedge'li istekler (MODEL_* ile ayarlanır)
+model_router = create_model_router()
+
+# Öneri ve parse çağrılarının arka ucu: gemini, local (llama.cpp) veya replay (INFERENCE_BACKEND)
+inference_backend = create_inference_backend(model_router)
+
+
+def with_climate_normals(inputs):
+    """lat/lon ve ay verilmişse eksik iklim alanlarını (sıcaklık, yağış, nem, don) normallerle doldur
+
+    Sadece model çağrılmadan hemen önce uygulanır; kural motoru ve önbellek anahtarı
+    kullanıcının girdiği değerlerle çalışır (aynı koordinat ve ay hep aynı normalleri verir).
+    """
+    if climate_normals is None:
+        return inputs
+    return climate_normals.fill(inputs)
+
+
+def with_climate_normals_many(records):
+    """with_climate_normals'ın toplu hali - tüm parseller tek ızgara sorgusuyla doldurulur"""
+    if climate_normals is None:
+        return list(records)
+    return climate_normals.fill_many(records)
+
+
+def build_recommendation_prompt(inputs):
+    """Ürün önerisi prompt'unu oluştur"""
+    return f"""
 Sen bir ziraat karar-destek asistanısın.
 Amaç: Verilen toprak + iklim + kısıt parametrelerine göre en uygun ürünleri öner.
 
-ÖNEMLİ: Tüm parametreler OPSİYONEL'dir. Eğer bir parametre null/None ise, o parametre verilmemiş demektir.
+ÖNEMLİ: Tüm parametreler OPSİYONEL'dir. GİRDİ'de yer almayan parametreler verilmemiş demektir.
 
 KULLANILAN PARAMETRELER (girdi alanları - hepsi opsiyonel):
 A) Toprak: soil_texture, pH, ec, organic_matter, nitrogen_N, phosphorus_P, potassium_K, lime_caCO3, cec
-B) İklim: avg_temp_c, min_temp_c, max_temp_c, rainfall_mm, humidity_pct, drought_index
+B) İklim: avg_temp_c, min_temp_c, max_temp_c, rainfall_mm, humidity_pct, frost_days, drought_index
 C) Konum/Zaman: country, province, district, lat (enlem), lon (boylam), season (mevsim), month (ay)
-   - lat ve lon verilmişse, bu koordinatlara göre bölgenin iklim özelliklerini dikkate al
-   - season ve month verilmişse, ekim zamanlaması için kullan
-   - Eğer sadece lat/lon verilmişse, o bölgenin tipik iklim verilerini varsay
 D) Kısıtlar: irrigation, previous_crop, goal
 
 KURALLAR:
@@ -66,7 +156,7 @@ KURALLAR:
     "missing_inputs": ["..."],
     "assumptions": ["..."]
   }}
-- Eğer bazı girdiler null/None ise, bunları "missing_inputs" içine yaz.
+- GİRDİ'de yer almayan parametreleri "missing_inputs" içine yaz.
 - Eksik veriler için makul varsayımlar yap ve bunları "assumptions" içine yaz.
 - Verilen parametrelere göre en uygun ürün önerisini yap.
 - Önerilerde 'goal' ve 'irrigation' alanlarını (varsa) mutlaka dikkate al.
@@ -76,70 +166,117 @@ KURALLAR:
   * Bölgenin iklim özelliklerini (sıcaklık, yağış, nem) dikkate al
   * Bölgenin rakım ve topoğrafya özelliklerini değerlendir
   * O bölgeye özgü tarım uygulamalarını öner
-  * Mevsim (season) ve ay (month) bilgisi varsa, ekim zamanlaması için kullan
+  * Sadece lat/lon verilmişse o bölgenin tipik iklim verilerini varsay
+- GİRDİ'de climate_source varsa iklim alanları o koordinatın verilen aydaki uzun dönem normalleridir (aylık değerler); bunları varsayım yapmadan kullan
+- Mevsim (season) ve ay (month) bilgisi varsa, ekim zamanlaması için kullan
 
-GİRDİ (JSON - null değerler verilmemiş parametreleri gösterir):
-{json.dumps(inputs, ensure_ascii=False, indent=2)}
+GİRDİ (JSON - sadece verilen parametreler):
+{compact_inputs(inputs)}
 """
-    
-    client = genai.Client(
-        api_key=os.environ.get("GEMINI_API_KEY"),
-    )
 
-    model = "gemma-3-27b-it"
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_text(text=prompt),
-            ],
-        ),
-    ]
-    # Gemma modeli system_instruction ve GoogleSearch tool'unu desteklemiyor
-    # Basit config kullanıyoruz
-    generate_content_config = types.GenerateContentConfig()
+
+def recommendation_error_message(error):
+    """Model hatasını kullanıcıya gösterilecek JSON mesajına çevir"""
+    error_msg = str(error)
+    if isinstance(error, RateLimitTimeout):
+        return json.dumps({
+            "error": "Yoğunluk",
+            "message": "Model kotası şu an dolu ve istek kuyrukta çok uzun bekledi. Lütfen kısa bir süre sonra tekrar deneyin."
+        }, ensure_ascii=False)
+    if is_rate_limit_error(error):
+        return json.dumps({
+            "error": "API quota aşıldı",
+            "message": "Gemini API kullanım limitiniz dolmuş. Lütfen planınızı ve faturalama detaylarınızı kontrol edin.",
+            "details": "https://ai.google.dev/gemini-api/docs/rate-limits"
+        }, ensure_ascii=False)
+    elif "401" in error_msg or "UNAUTHENTICATED" in error_msg:
+        return json.dumps({
+            "error": "API key hatası",
+            "message": "Geçersiz veya eksik API key. Lütfen .env dosyanızda GEMINI_API_KEY değişkenini kontrol edin."
+        }, ensure_ascii=False)
+    else:
+        return json.dumps({
+            "error": "API hatası",
+            "message": f"Bir hata oluştu: {error_msg}"
+        }, ensure_ascii=False)
+
+
+def rule_based_recommendation(inputs):
+    """Kural motoru yeterince eminse yanıt JSON metnini, değilse None döndür"""
+    if not RULE_ENGINE_ENABLED:
+        return None
+    result = rule_recommender.recommend(inputs, RULE_ENGINE_MIN_CONFIDENCE)
+    if result is None:
+        return None
+    return json.dumps(result, ensure_ascii=False)
+
+
+def cached_recommendation(inputs):
+    """Önbellek anahtarını ve (varsa) saklanan yanıtı döndür"""
+    if response_cache is None:
+        return None, None
+    cache_key = response_cache.key_for(inputs)
+    return cache_key, response_cache.get(cache_key)
+
+
+def generate_recommendations(inputs, priority=INTERACTIVE, prompt_inputs=None):
+    """Çıkarım arka ucu (varsayılan Gemini API) ile ürün önerileri oluştur
+
+    priority: kota kuyruğundaki öncelik - toplu işler BULK ile etkileşimli isteklerin arkasına geçer
+    prompt_inputs: iklim normalleri önceden doldurulmuş girdiler (toplu yol); verilmezse
+    inputs burada with_climate_normals ile doldurulur
+    """
+    
+    # Ders kitabı vakalarında modeli hiç çağırmadan yerel kurallarla yanıtla
+    local_result = rule_based_recommendation(inputs)
+    if local_result is not None:
+        return iter((local_result,))
+    
+    # Aynı girdiler için önbellekte yanıt varsa modeli çağırmadan tekrar oynat
+    cache_key, cached = cached_recommendation(inputs)
+    if cached is not None:
+        return response_cache.replay(cached)
+    
+    if prompt_inputs is None:
+        prompt_inputs = with_climate_normals(inputs)
+    prompt = build_recommendation_prompt(prompt_inputs)
 
     # Streaming response için generator
     def generate():
         full_text = ""
+        usage = None
+        model = None
+        started_at = time.monotonic()
+        meter = metrics.StreamMeter()
         try:
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if chunk.text:
-                    full_text += chunk.text
-                    yield chunk.text
+            for model, text, chunk_usage in inference_backend.stream("recommend", prompt, priority):
+                if text:
+                    meter.chunk(text)
+                    full_text += text
+                    yield text
+                # Token sayıları akışın son parçasında gelir
+                usage = chunk_usage or usage
+            log_usage("recommend", model, usage, time.monotonic() - started_at)
+            meter.finish(model)
             
-            # Son kontrol - eğer JSON parse edilebilirse döndür
-            try:
-                json.loads(full_text)
-            except:
-                pass
+            # Tamamlanan yanıtı önbelleğe al (sadece geçerli JSON saklanır)
+            if response_cache is not None:
+                response_cache.set(cache_key, full_text, time.monotonic() - started_at)
         except Exception as e:
             # Hata durumunda kullanıcıya anlamlı mesaj gönder
-            error_msg = str(e)
-            if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg or "quota" in error_msg.lower():
-                yield json.dumps({
-                    "error": "API quota aşıldı",
-                    "message": "Gemini API kullanım limitiniz dolmuş. Lütfen planınızı ve faturalama detaylarınızı kontrol edin.",
-                    "details": "https://ai.google.dev/gemini-api/docs/rate-limits"
-                }, ensure_ascii=False)
-            elif "401" in error_msg or "UNAUTHENTICATED" in error_msg:
-                yield json.dumps({
-                    "error": "API key hatası",
-                    "message": "Geçersiz veya eksik API key. Lütfen .env dosyanızda GEMINI_API_KEY değişkenini kontrol edin."
-                }, ensure_ascii=False)
-            else:
-                yield json.dumps({
-                    "error": "API hatası",
-                    "message": f"Bir hata oluştu: {error_msg}"
-                }, ensure_ascii=False)
+            yield recommendation_error_message(e)
     
+    # Aynı girdilerle devam eden bir üretim varsa ona katıl
+    if recommendation_flights is not None:
+        return recommendation_flights.stream(cache_key or inputs_cache_key(inputs), generate)
     return generate()
 
 
+def wants_event_stream(accept_header):
+    """Accept başlığı text/event-stream içeriyor mu"""
+    return 'text/event-stream' in (accept_header or '')
+
+
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
     """API endpoint - form verilerini alıp öneri döndürür"""
@@ -149,10 +286,17 @@ def recommend():
         if not inputs:
             return jsonify({"error": "Input verisi bulunamadı"}), 400
         
+        # İstemci SSE isterse alan bazlı olaylar, aksi halde ham metin akışı
+        stream = generate_recommendations(inputs)
+        mimetype = 'text/plain'
+        if wants_event_stream(request.headers.get('Accept')):
+            stream = recommendation_events(stream)
+            mimetype = 'text/event-stream'
+        
         # Streaming response döndür
         return Response(
-            generate_recommendations(inputs),
-            mimetype='text/plain',
+            stream,
+            mimetype=mimetype,
             headers={
                 'Cache-Control': 'no-cache',
                 'X-Accel-Buffering': 'no'
@@ -163,194 +307,105 @@ def recommend():
         return jsonify({"error": str(e)}), 500
 
 
-def extract_text_from_pdf(file_content):
-    """PDF dosyasından metin çıkar - pdfplumber kütüphanesi kullanılıyor (CPU'da hızlı çalışır)"""
-    try:
-        pdf = pdfplumber.open(io.BytesIO(file_content))
-        text = ""
-        for page_num, page in enumerate(pdf.pages, 1):
-            # Normal metin
-            page_text = page.extract_text() or ""
-            text += f"\n--- Sayfa {page_num} ---\n"
-            text += page_text
-            
-            # Tabloları da çıkar (çok önemli!)
-            tables = page.extract_tables()
-            if tables:
-                text += f"\n--- Sayfa {page_num} Tabloları ---\n"
-                for table_num, table in enumerate(tables, 1):
-                    text += f"\nTablo {table_num}:\n"
-                    for row in table:
-                        if row:
-                            # Satırı temizle ve birleştir
-                            clean_row = [str(cell).strip() if cell else "" for cell in row]
-                            text += " | ".join(clean_row) + "\n"
-                    text += "\n"
-        
-        pdf.close()
-        return text.strip()
-    except Exception as e:
-        return f"PDF okuma hatası: {str(e)}"
+def singleflight_metrics_payload(flights):
+    if flights is None:
+        return {"enabled": False}
+    return {"enabled": True, **flights.stats()}
 
 
-def extract_text_from_word(file_content):
-    """Word dosyasından metin çıkar - python-docx kütüphanesi kullanılıyor (CPU'da hızlı çalışır)"""
-    try:
-        doc = docx.Document(io.BytesIO(file_content))
-        text = ""
-        
-        # Paragrafları oku
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text += paragraph.text + "\n"
-        
-        # Tabloları da oku (çok önemli!)
-        for table_num, table in enumerate(doc.tables, 1):
-            text += f"\n--- Tablo {table_num} ---\n"
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    cell_text = cell.text.strip()
-                    if cell_text:
-                        row_text.append(cell_text)
-                if row_text:
-                    text += " | ".join(row_text) + "\n"
-            text += "\n"
-        
-        return text.strip()
-    except Exception as e:
-        return f"Word okuma hatası: {str(e)}"
+def cache_metrics_payload():
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
 
 
-def extract_data_from_csv(file_content):
-    """CSV/Excel dosyasından veri çıkar - pandas kütüphanesi kullanılıyor (CPU'da hızlı çalışır)"""
-    try:
-        # Önce CSV olarak dene
-        try:
-            df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8')
-        except:
-            try:
-                df = pd.read_csv(io.BytesIO(file_content), encoding='latin-1')
-            except:
-                df = pd.read_csv(io.BytesIO(file_content), encoding='iso-8859-9')
-        
-        # Sütun isimlerini normalize et (küçük harf, boşlukları temizle)
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # DataFrame'i detaylı text formatına çevir
-        # Önce sütun isimlerini ve veri tiplerini ekle
-        text = "CSV/Excel Dosyası İçeriği:\n\n"
-        text += f"Sütunlar: {', '.join(df.columns.tolist())}\n"
-        text += f"Satır Sayısı: {len(df)}\n\n"
-        
-        # Her satırı detaylı göster
-        for idx, row in df.iterrows():
-            text += f"Satır {idx + 1}:\n"
-            for col in df.columns:
-                value = row[col]
-                if pd.notna(value):
-                    text += f"  {col}: {value}\n"
-            text += "\n"
-        
-        # DataFrame'in string gösterimini de ekle
-        text += "\nTablo Görünümü:\n"
-        text += df.to_string()
-        
-        return text
-    except Exception as e:
-        # Excel dosyası olabilir
-        try:
-            df = pd.read_excel(io.BytesIO(file_content))
-            df.columns = df.columns.str.strip().str.lower()
-            
-            text = "Excel Dosyası İçeriği:\n\n"
-            text += f"Sütunlar: {', '.join(df.columns.tolist())}\n"
-            text += f"Satır Sayısı: {len(df)}\n\n"
-            
-            for idx, row in df.iterrows():
-                text += f"Satır {idx + 1}:\n"
-                for col in df.columns:
-                    value = row[col]
-                    if pd.notna(value):
-                        text += f"  {col}: {value}\n"
-                text += "\n"
-            
-            text += "\nTablo Görünümü:\n"
-            text += df.to_string()
-            
-            return text
-        except Exception as e2:
-            return f"CSV/Excel okuma hatası: {str(e)} / {str(e2)}"
+def extraction_cache_metrics_payload():
+    if extraction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **extraction_cache.stats()}
 
 
-def extract_text_from_image_docling(file_content, mime_type):
-    """Docling kullanarak resimden metin çıkar ve JSON formatına dönüştür"""
-    if not DOCLING_AVAILABLE:
-        return None
-    
+def job_metrics_payload():
+    if job_queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **job_queue.stats()}
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metin formatında aşama süreleri, öneri akışları ve upstream hataları"""
+    if not metrics.ENABLED:
+        return jsonify({"error": "Metrikler kapalı (METRICS_ENABLED)"}), 404
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/metrics/cache', methods=['GET'])
+def cache_metrics():
+    """Öneri önbelleği metrikleri - isabet oranı ve kazanılan süre"""
+    return jsonify(cache_metrics_payload())
+
+
+@app.route('/api/metrics/extraction-cache', methods=['GET'])
+def extraction_cache_metrics():
+    """Dosya çıkarma önbelleği metrikleri"""
+    return jsonify(extraction_cache_metrics_payload())
+
+
+@app.route('/api/metrics/singleflight', methods=['GET'])
+def singleflight_metrics():
+    """Birleştirilen (coalesced) öneri istekleri metrikleri"""
+    return jsonify(singleflight_metrics_payload(recommendation_flights))
+
+
+@app.route('/api/metrics/rate-limits', methods=['GET'])
+def rate_limit_metrics():
+    """Model başına kota kuyruğu metrikleri - eşzamanlılık sınırı, bekleyen ve 429 sayıları"""
+    return jsonify(limiter_stats())
+
+
+@app.route('/api/metrics/models', methods=['GET'])
+def model_metrics():
+    """Görev/model bazlı gecikme (p50/p95), hata oranı, fallback ve hedge sayıları"""
+    return jsonify(model_router.stats())
+
+
+@app.route('/api/metrics/jobs', methods=['GET'])
+def job_metrics():
+    """Asenkron iş kuyruğu: durum sayıları, tamamlanan/başarısız/tekrar denenen işler"""
+    return jsonify(job_metrics_payload())
+
+
+@contextmanager
+def prepared_image(upload):
+    """OCR'a gidecek resim: (dosya yolu, mime type) - ara dosya iş bitince silinir
+
+    Ön işleme kapalıysa, zaman aşımına uğrarsa veya resim açılamazsa yüklenen
+    dosya aynen kullanılır.
+    """
+    prepared = None
+    if IMAGE_PREPROCESS:
+        try:
+            with metrics.timed("image_preprocess"):
+                prepared = extraction_service.run("image", upload.path, upload.path + ".ocr")
+        except (ExtractionTimeout, OSError, ValueError):
+            prepared = None
+    if prepared is None or prepared.path == upload.path:
+        yield upload.path, upload.mime_type
+        return
     try:
-        # Geçici dosya oluştur
-        import tempfile
-        import os
-        
-        # Dosya uzantısını mime_type'a göre belirle
-        suffix = '.jpg'
-        if 'png' in mime_type:
-            suffix = '.png'
-        elif 'gif' in mime_type:
-            suffix = '.gif'
-        elif 'bmp' in mime_type:
-            suffix = '.bmp'
-        elif 'webp' in mime_type:
-            suffix = '.webp'
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_file.write(file_content)
-            tmp_path = tmp_file.name
-        
+        yield prepared.path, prepared.mime_type
+    finally:
         try:
-            # Docling converter oluştur
-            converter = DocumentConverter()
-            
-            # Resmi işle
-            result = converter.convert(tmp_path)
-            
-            # Metni çıkar - Docling'in text özelliğini kullan
-            extracted_text = ""
-            if hasattr(result.document, 'text'):
-                extracted_text = result.document.text
-            elif hasattr(result.document, 'export_to_dict'):
-                # Dict formatına çevir
-                doc_json = result.document.export_to_dict()
-                # Metni çıkar (text, tables, vb.)
-                if 'content' in doc_json:
-                    for item in doc_json['content']:
-                        if 'text' in item:
-                            extracted_text += item['text'] + "\n"
-                        elif 'table' in item:
-                            # Tablo varsa
-                            if 'rows' in item['table']:
-                                for row in item['table']['rows']:
-                                    if 'cells' in row:
-                                        row_text = " | ".join([cell.get('text', '') for cell in row['cells']])
-                                        extracted_text += row_text + "\n"
-            else:
-                # Fallback: string'e çevir
-                extracted_text = str(result.document)
-            
-            return extracted_text.strip() if extracted_text else None
-        finally:
-            # Geçici dosyayı sil
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    except Exception as e:
-        # Hata durumunda None döndür (fallback için)
-        return None
+            os.unlink(prepared.path)
+        except FileNotFoundError:
+            pass
 
 
-def extract_text_from_image_docling_or_gemini(file_content, mime_type):
+def extract_text_from_image_docling_or_gemini(source, mime_type):
     """Resimden metin çıkar - Önce Docling, sonra Gemini Vision API (fallback)
     
+    source: spool'daki dosya yolu veya bayt içerik
+    
     NOT: 
     - PDF: pdfplumber (CPU'da hızlı)
     - Word: python-docx (CPU'da hızlı)
@@ -359,15 +414,17 @@ def extract_text_from_image_docling_or_gemini(file_content, mime_type):
     """
     # Önce Docling ile dene
     if DOCLING_AVAILABLE:
-        docling_result = extract_text_from_image_docling(file_content, mime_type)
+        try:
+            with metrics.timed("docling"):
+                docling_result = extraction_service.run("docling", source, mime_type)
+        except ExtractionTimeout:
+            docling_result = None
         if docling_result and len(docling_result) > 50:
             return docling_result
     
     # Docling başarısız olursa Gemini Vision API'ye fallback
     try:
-        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-        # Gemini Vision API için uygun model kullan
-        model = "gemini-1.5-flash"
+        client = get_genai_client()
         
         prompt = """Bu resim bir toprak analiz raporu içeriyor. Lütfen TÜM metinleri, sayıları, değerleri ve bilgileri çok dikkatli bir şekilde çıkar.
 
@@ -387,6 +444,12 @@ def extract_text_from_image_docling_or_gemini(file_content, mime_type):
 TÜM metni, sayıları, birimleri, tarihleri eksiksiz çıkar. Tabloları, listeleri, her şeyi oku."""
         
         try:
+            # Vision API bayt ister - dosya sadece bu noktada belleğe okunur
+            if isinstance(source, str):
+                with open(source, "rb") as f:
+                    file_content = f.read()
+            else:
+                file_content = source
             contents = [
                 types.Content(
                     role="user",
@@ -400,45 +463,78 @@ TÜM metni, sayıları, birimleri, tarihleri eksiksiz çıkar. Tabloları, liste
                 ),
             ]
             
-            response = client.models.generate_content(
-                model=model,
-                contents=contents,
-            )
-            
-            return response.text
-        except Exception as e1:
-            # Gemini Vision API başarısız olursa gemma-3-27b-it dene
-            error_str = str(e1).lower()
-            if "404" in error_str or "not found" in error_str or "not enabled" in error_str:
-                # Model bulunamadı, gemma-3-27b-it dene
-                try:
-                    model = "gemma-3-27b-it"
-                    response = client.models.generate_content(
+            tokens = request_tokens(prompt)
+            started_at = time.monotonic()
+            # Router vision modelini seçer (varsayılan gemini-1.5-flash), hata olursa sıradakini dener
+            with metrics.timed("gemini_vision"):
+                model, response = model_router.call("ocr", lambda model: rate_limited_call(
+                    model,
+                    lambda: client.models.generate_content(
                         model=model,
                         contents=contents,
-                    )
-                    return response.text
-                except Exception as e2:
-                    return f"Resim OCR hatası (Gemini): {str(e2)}"
-            else:
-                return f"Resim OCR hatası: {str(e1)}"
+                        config=model_config(model),
+                    ),
+                    BULK,
+                    tokens,
+                ))
+            log_usage("ocr", model, response.usage_metadata, time.monotonic() - started_at)
+            
+            return response.text
+        except Exception as e:
+            return f"Resim OCR hatası (Gemini): {str(e)}"
     except Exception as e:
         return f"Resim OCR genel hatası: {str(e)}"
 
 
 def parse_extracted_text(text):
-    """Çıkarılan metni Gemini API ile parse edip form verilerine çevir - Gelişmiş versiyon
+    """Çıkarılan metni form verilerine çevir
+    
+    Önce bilinen rapor düzenleri derlenmiş desenlerle okunur (milisaniyeler).
+    Zorunlu alanlar bulunduysa ve metinde okunamayan başka etiket yoksa LLM hiç
+    çağrılmaz; aksi halde LLM'e sadece eksik alanlar sorulur.
     
-    Daha güçlü model (gemini-1.5-flash) kullanarak veri parsing yapar.
-    Eğer gemini-1.5-flash kullanılamazsa gemma-3-27b-it'e fallback yapar.
+    (veri, llm_hatası) döndürür; llm_hatası None değilse eksik alanlar için LLM
+    çağrısı başarısız olmuştur ve veri sadece desenlerle bulunan değerleri içerir.
+    """
+    if not PARSE_FAST_PATH:
+        return parse_text_with_llm(text), None
+    
+    found = extract_fields(text)
+    if not found:
+        return parse_text_with_llm(text), None
+    
+    data = dict.fromkeys(FIELD_SYNONYMS)
+    data.update(found)
+    missing = missing_fields(text, found, PARSE_REQUIRED_FIELDS)
+    llm_error = None
+    if missing:
+        llm_data = parse_text_with_llm(text, missing)
+        # LLM başarısız olsa da desenlerle bulunan değerler döndürülür (eksik olarak işaretlenir)
+        if "error" in llm_data:
+            llm_error = llm_data.get("message") or llm_data["error"]
+        else:
+            for field in missing:
+                if llm_data.get(field) is not None:
+                    data[field] = llm_data[field]
+    
+    return normalize_parsed_data(data), llm_error
+
+
+def parse_text_with_llm(text, fields=None):
+    """Çıkarılan metni çıkarım arka ucu ile parse edip form verilerine çevir - Gelişmiş versiyon
+    
+    fields verilirse sadece o alanları isteyen kısa prompt kullanılır.
+    Gemini arka ucunda model router'dan seçilir (MODEL_ROUTES "parse");
+    varsayılan olarak gemini-1.5-flash, kullanılamazsa gemma-3-27b-it.
     """
     try:
-        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+        # Uzun raporlarda toprak değeri ve tablo satırlarını koruyarak token bütçesine sığdır
+        text = fit_text_to_budget(text)
         
-        # Belge parsing için gemma-3-27b-it modeli kullan
-        model = "gemma-3-27b-it"
-        
-        prompt = f"""
+        if fields:
+            prompt = build_fields_prompt(text, fields)
+        else:
+            prompt = f"""
 Sen bir toprak analiz raporu parser'ısın. Verilen metinden TÜM toprak analiz verilerini çok dikkatli, detaylı ve eksiksiz bir şekilde çıkar ve JSON formatında döndür.
 
 KRİTİK GÖREV: Metindeki TÜM bilgileri bulmaya çalış. Hiçbir değeri atlama! Tablolarda, paragraflarda, dipnotlarda, her yerde ara!
@@ -593,44 +689,14 @@ SAYI FORMATLARI:
 JSON ÇIKTISI (SADECE JSON, başka hiçbir şey yazma. Tüm bulduğun değerleri ekle):
 """
         
-        # Belge parsing için daha güçlü model kullan (gemini-1.5-flash)
-        # Eğer kullanılamazsa gemma-3-27b-it'e fallback
-        model = "gemini-1.5-flash"
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=prompt),
-                ],
-            ),
-        ]
-        
-        generate_content_config = types.GenerateContentConfig(
-            temperature=0.1,  # Daha deterministik sonuçlar için düşük temperature
-        )
-        
-        try:
-            response = client.models.generate_content(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            )
-        except Exception as e:
-            # Eğer gemini-1.5-flash başarısız olursa (404, quota, erişim vb.), gemma-3-27b-it'e fallback
-            error_str = str(e).lower()
-            if "404" in error_str or "not found" in error_str or "quota" in error_str or "429" in error_str or "not enabled" in error_str or "not available" in error_str or "permission" in error_str:
-                # Fallback to gemma model
-                model = "gemma-3-27b-it"
-                response = client.models.generate_content(
-                    model=model,
-                    contents=contents,
-                    config=generate_content_config,
-                )
-            else:
-                raise e
+        started_at = time.monotonic()
+        # Daha deterministik sonuçlar için düşük temperature
+        with metrics.timed("parse_llm"):
+            model, result_text, usage = inference_backend.generate("parse", prompt, BULK, temperature=0.1)
+        log_usage("parse", model, usage, time.monotonic() - started_at)
         
         # JSON parse et
-        result_text = response.text.strip()
+        result_text = result_text.strip()
         # Markdown code block'ları temizle
         result_text = result_text.replace('```json', '').replace('```', '').strip()
         
@@ -652,7 +718,6 @@ JSON ÇIKTISI (SADECE JSON, başka hiçbir şey yazma. Tüm bulduğun değerleri
             # Bazen model JSON dışında açıklama da ekliyor
             try:
                 # Sadece JSON kısmını bul
-                import re
                 json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
                 if json_match:
                     parsed_data = json.loads(json_match.group())
@@ -667,166 +732,176 @@ JSON ÇIKTISI (SADECE JSON, başka hiçbir şey yazma. Tüm bulduğun değerleri
 
 
 def normalize_parsed_data(data):
-    """Parse edilmiş verileri normalize et - tarih formatları, sayı formatları, birimler"""
-    normalized = {}
-    
-    for key, value in data.items():
-        if value is None or value == '':
-            normalized[key] = None
-            continue
-        
-        # Tarih alanları
-        if 'date' in key.lower() and isinstance(value, str):
-            normalized[key] = normalize_date(value)
-        # Sayısal alanlar
-        elif key in ['pH', 'organic_matter', 'ec', 'lime_caCO3', 'sample_depth', 
-                     'phosphorus_P', 'potassium_K', 'nitrogen_N', 'calcium_Ca', 
-                     'magnesium_Mg', 'sulfur_S', 'iron_Fe', 'zinc_Zn', 'manganese_Mn',
-                     'copper_Cu', 'boron_B', 'cec', 'total_salt', 'sar', 'esp',
-                     'organic_carbon_C', 'soil_moisture', 'bulk_density']:
-            normalized[key] = normalize_number(value)
-        # Toprak bünyesi normalizasyonu
-        elif key == 'soil_texture' and isinstance(value, str):
-            normalized[key] = normalize_soil_texture(value)
-        # Değerlendirme seviyesi normalizasyonu
-        elif key == 'evaluation_level' and isinstance(value, str):
-            normalized[key] = normalize_evaluation_level(value)
-        # Diğer string alanlar
-        else:
-            normalized[key] = str(value).strip() if value else None
-    
-    return normalized
+    """Parse edilmiş verileri normalize et - tarih formatları, sayı formatları, birimler
 
+    Normalizasyon motoru normalization.py'dedir; süre /metrics'e "normalize" aşaması olarak yazılır.
+    """
+    with metrics.timed("normalize"):
+        return normalize_record(data)
 
-def normalize_date(date_str):
-    """Tarih string'ini YYYY-MM-DD formatına çevir"""
-    if not date_str or not isinstance(date_str, str):
-        return None
-    
-    date_str = date_str.strip()
-    
-    # Farklı tarih formatlarını dene
-    formats = [
-        '%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y',
-        '%Y.%m.%d', '%Y/%m/%d', '%Y-%m-%d',
-        '%d.%m.%y', '%d/%m/%y', '%d-%m-%y',
-        '%Y.%m.%d', '%Y/%m/%d'
-    ]
-    
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime('%Y-%m-%d')
-        except:
-            continue
-    
-    # Regex ile tarih bulma
-    patterns = [
-        r'(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})',  # YYYY-MM-DD
-        r'(\d{1,2})[.\-/](\d{1,2})[.\-/](\d{4})',  # DD-MM-YYYY
-        r'(\d{1,2})[.\-/](\d{1,2})[.\-/](\d{2})',  # DD-MM-YY
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, date_str)
-        if match:
-            groups = match.groups()
-            if len(groups[0]) == 4:  # YYYY-MM-DD
-                year, month, day = groups
-            else:  # DD-MM-YYYY
-                day, month, year = groups
-                if len(year) == 2:
-                    year = '20' + year
-            
-            try:
-                return f"{year}-{int(month):02d}-{int(day):02d}"
-            except:
-                continue
-    
-    return None
 
+def process_upload(upload, progress=None):
+    """Spool'a alınmış dosyadan veri çıkar ve parse et - (yanıt sözlüğü, HTTP kodu, header'lar) döndürür
 
-def normalize_number(value):
-    """Sayısal değeri normalize et - birimleri kaldır, virgülü noktaya çevir"""
-    if value is None:
-        return None
-    
-    if isinstance(value, (int, float)):
-        return float(value)
-    
-    if not isinstance(value, str):
-        try:
-            return float(value)
-        except:
-            return None
+    upload: upload_spool.SpooledUpload - çıkarıcılara içerik değil dosya yolu verilir.
+    progress: aşama değişikliklerinde çağrılır (extracting, parsing, normalized) - iş kuyruğu için
+    Flask (app.py) ve ASGI (asgi_app.py) modlarında ortak kullanılır.
+    Aşama süreleri /metrics histogramına yazılır; METRICS_SERVER_TIMING açıksa
+    Server-Timing başlığı olarak da döner.
+    """
+    with metrics.collect_timings() as timings:
+        with metrics.timed("total"):
+            payload, status, headers = extract_and_parse(upload, progress)
+    if metrics.SERVER_TIMING:
+        headers = {**headers, "Server-Timing": metrics.server_timing_header(timings)}
+    return payload, status, headers
+
+
+def extract_and_parse(upload, progress=None):
+    """process_upload'ın aşamaları: önbellek, metin çıkarma, parse ve normalizasyon"""
+    kind = upload.kind
+    if progress is None:
+        progress = lambda stage: None
     
-    # String'den sayı çıkar
-    value = value.strip()
+    # Aynı dosya daha önce işlendiyse parse edilmiş sonucu doğrudan döndür
+    digest = upload.digest if extraction_cache is not None else None
+    if digest is not None:
+        cached_parsed = extraction_cache.get_parsed(digest)
+        if cached_parsed is not None:
+            parsed_data = cached_parsed["data"]
+            matched_fields = [k for k, v in parsed_data.items() if v is not None and v != '']
+            return {
+                "success": True,
+                "data": parsed_data,
+                "extracted_text_preview": cached_parsed["extracted_text_preview"],
+                "extraction_method": cached_parsed["extraction_method"],
+                "matched_fields_count": len(matched_fields),
+                "matched_fields": matched_fields,
+                "cached": True
+            }, 200, {}
     
-    # Yüzde işaretini kaldır
-    value = value.replace('%', '').strip()
+    # Dosya tipine göre işle
+    extracted_text = ""
+    extraction_method = ""
+    parsed_data = None
+    parse_warning = None
+    cached_text = extraction_cache.get_text(digest) if digest is not None else None
+    progress("extracting")
     
-    # Birimleri kaldır (mg/kg, dS/m, cm, mm, g/cm3 vb.)
-    value = re.sub(r'\s*(mg/kg|mg kg-1|dS/m|cm|mm|g/cm3|kg/ha|ppm|meq/100g)\s*', '', value, flags=re.IGNORECASE)
+    try:
+        if cached_text is not None:
+            # Ham metin önbellekte - OCR/pdfplumber tekrar çalıştırılmaz
+            extracted_text = cached_text["text"]
+            extraction_method = cached_text["extraction_method"]
+        elif kind == "pdf":
+            with metrics.timed("pdfplumber"):
+                extracted_text = extraction_service.run("pdf", upload.path)
+            extraction_method = "PDF (pdfplumber - CPU)"
+        elif kind == "word":
+            with metrics.timed("python_docx"):
+                extracted_text = extraction_service.run("word", upload.path)
+            extraction_method = "Word (python-docx - CPU)"
+        elif kind == "table":
+            with metrics.timed("pandas"):
+                records, extracted_text = extraction_service.run("csv", upload.path)
+            extraction_method = "CSV/Excel (pandas - CPU)"
+            if records:
+                # Başlıklar bilinen alanlarla eşleşti - LLM'e gerek yok, en dolu satırı kullan
+                parsed_data = normalize_parsed_data(max(records, key=len))
+                extraction_method = "CSV/Excel (pandas - sütun eşleştirme)"
+        elif kind == "image":
+            # Önce Docling, sonra Gemini Vision API fallback - ikisi de ön işlenmiş (küçük) resmi alır
+            with prepared_image(upload) as (image_path, image_mime_type):
+                extracted_text = extract_text_from_image_docling_or_gemini(image_path, image_mime_type)
+            if DOCLING_AVAILABLE and not (extracted_text.startswith("Resim OCR") or "hatası" in extracted_text.lower()):
+                extraction_method = "Resim (Docling - CPU)"
+            elif extracted_text.startswith("Resim OCR") or "hatası" in extracted_text.lower():
+                extraction_method = "Resim (Gemini Vision API - Bulut - Fallback)"
+            else:
+                extraction_method = "Resim (Docling - CPU)"
+        else:
+            return {
+                "success": False,
+                "error": "Desteklenmeyen dosya formatı",
+                "message": "PDF, Word, CSV, Excel veya resim dosyası yükleyin."
+            }, 400, {}
+    except ExtractionQueueFull as e:
+        # Geri basınç: sunucu dolu, istemci daha sonra tekrar denemeli
+        return {
+            "success": False,
+            "error": "Sunucu meşgul",
+            "message": "Dosya işleme kuyruğu dolu. Lütfen birkaç saniye sonra tekrar deneyin.",
+            "retry_after": e.retry_after
+        }, 503, {"Retry-After": str(e.retry_after)}
+    except ExtractionTimeout as e:
+        return {
+            "success": False,
+            "error": "Zaman aşımı",
+            "message": str(e)
+        }, 504, {}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "Dosya okuma hatası",
+            "message": f"Dosya okunurken hata oluştu: {str(e)}"
+        }, 400, {}
     
-    # Virgülü noktaya çevir
-    value = value.replace(',', '.')
+    if not extracted_text or extracted_text.startswith("hata") or extracted_text.startswith("PDF okuma") or extracted_text.startswith("Word okuma") or extracted_text.startswith("CSV okuma") or extracted_text.startswith("CSV/Excel okuma") or extracted_text.startswith("Resim OCR"):
+        return {
+            "success": False,
+            "error": "Dosya okunamadı",
+            "message": extracted_text or "Dosya içeriği çıkarılamadı",
+            "extraction_method": extraction_method
+        }, 400, {}
     
-    # Sadece sayı ve nokta karakterlerini al
-    value = re.sub(r'[^\d.]', '', value)
+    if digest is not None and cached_text is None:
+        extraction_cache.set_text(digest, extracted_text, extraction_method)
     
+    # Çıkarılan metni parse et
+    progress("parsing")
     try:
-        return float(value) if value else None
-    except:
-        return None
-
-
-def normalize_soil_texture(value):
-    """Toprak bünyesi değerini normalize et"""
-    if not value or not isinstance(value, str):
-        return None
+        if parsed_data is None:
+            with metrics.timed("parse"):
+                parsed_data, parse_warning = parse_extracted_text(extracted_text)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "Veri parse hatası",
+            "message": f"Çıkarılan metin parse edilemedi: {str(e)}",
+            "extracted_text_preview": extracted_text[:500]
+        }, 400, {}
     
-    value = value.lower().strip()
+    if "error" in parsed_data:
+        return {
+            "success": False,
+            "error": "Veri parse edilemedi",
+            "message": parsed_data.get("error", "Bilinmeyen hata"),
+            "extracted_text_preview": extracted_text[:500],
+            "extraction_method": extraction_method
+        }, 400, {}
     
-    # Eşleştirmeler
-    mappings = {
-        'kumlu': 'kumlu',
-        'kum': 'kumlu',
-        'sandy': 'kumlu',
-        'sand': 'kumlu',
-        'tınlı': 'tınlı',
-        'tin': 'tınlı',
-        'tinli': 'tınlı',
-        'loam': 'tınlı',
-        'loamy': 'tınlı',
-        'killi': 'killi',
-        'kil': 'killi',
-        'clay': 'killi',
-        'clayey': 'killi',
-    }
+    progress("normalized")
+    # Sadece tam parse önbelleğe yazılır: eksik alanlar için LLM başarısız olduysa
+    # (partial) seviye 2'nin süresi olmadığından dosya kalıcı olarak eksik sonuç alırdı
+    if digest is not None and parse_warning is None:
+        extraction_cache.set_parsed(digest, parsed_data, extracted_text, extraction_method)
     
-    return mappings.get(value, value)
-
-
-def normalize_evaluation_level(value):
-    """Değerlendirme seviyesini normalize et"""
-    if not value or not isinstance(value, str):
-        return None
-    
-    value = value.lower().strip()
+    # Eşleşen alanları say
+    matched_fields = [k for k, v in parsed_data.items() if v is not None and v != '']
     
-    mappings = {
-        'düşük': 'düşük',
-        'dusuk': 'düşük',
-        'low': 'düşük',
-        'orta': 'orta',
-        'medium': 'orta',
-        'yüksek': 'yüksek',
-        'yuksek': 'yüksek',
-        'high': 'yüksek',
+    payload = {
+        "success": True,
+        "data": parsed_data,
+        "extracted_text_preview": extracted_text[:200],
+        "extraction_method": extraction_method,
+        "matched_fields_count": len(matched_fields),
+        "matched_fields": matched_fields
     }
-    
-    return mappings.get(value, value)
+    if parse_warning is not None:
+        payload["partial"] = True
+        payload["parse_warning"] = parse_warning
+    return payload, 200, {}
+
 
 
 @app.route('/api/upload-file', methods=['POST'])
@@ -840,91 +915,275 @@ def upload_file():
         if file.filename == '':
             return jsonify({"error": "Dosya seçilmedi"}), 400
         
-        # Dosya içeriğini oku
-        file_content = file.read()
-        filename = file.filename.lower()
-        mime_type = file.content_type
+        # Asenkron mod: dosya kuyruğa devredilir, iş kimliği hemen döner
+        if job_queue is not None and wants_async_job(request.values.get('async'), request.headers.get('Prefer')):
+            job_id = job_queue.submit(spool_upload(file).as_dict())
+            return jsonify(job_accepted_payload(job_id)), 202, {"Location": f"/api/jobs/{job_id}"}
         
-        # Dosya tipine göre işle
-        extracted_text = ""
-        extraction_method = ""
+        # Form ayrıştırıcısının diske yazdığı dosya kopyalanmadan sahiplenilir
+        with spool_upload(file) as upload:
+            payload, status, headers = process_upload(upload)
+        return jsonify(payload), status, headers
+    
+    except UploadTooLarge as e:
+        return jsonify(upload_too_large_payload(e)), 413
+    except Exception as e:
+        return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
+
+
+def upload_too_large_payload(error):
+    return {"success": False, "error": "Dosya çok büyük", "message": str(error)}
+
+
+def wants_async_job(async_param, prefer_header):
+    """?async=1 / form alanı async=1 veya "Prefer: respond-async" başlığı verildi mi"""
+    if (async_param or '').lower() in ('1', 'true', 'yes', 'evet'):
+        return True
+    return 'respond-async' in (prefer_header or '')
+
+
+def job_accepted_payload(job_id):
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+    }
+
+
+def run_upload_job(payload, progress):
+    """İş kuyruğu handler'ı - kuyruğa devredilen dosyayı senkron yolla aynı şekilde işle"""
+    result, status, _ = process_upload(SpooledUpload.from_dict(payload), progress)
+    if status in (503, 504):
+        # Çıkarma kuyruğu dolu veya zaman aşımı - geçici, iş gecikmeyle tekrar denenir
+        raise RetryJob(result.get("message") or result.get("error"), result, status)
+    return result, status
+
+
+def discard_job_upload(payload):
+    """İş kesin olarak bitince spool'daki dosyayı sil"""
+    SpooledUpload.from_dict(payload).close()
+
+
+# Asenkron yüklemeler için SQLite tabanlı iş kuyruğu (JOB_* ile ayarlanır)
+job_queue = create_job_queue(run_upload_job, cleanup=discard_job_upload)
+
+
+def job_events(job_id):
+    """İş aşamalarını SSE olayları olarak üret: progress ..., son olarak done"""
+    for snapshot in job_queue.events(job_id):
+        event = "done" if snapshot["status"] in ("succeeded", "failed") else "progress"
+        yield sse_event(event, snapshot)
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Asenkron yükleme işinin durumu - bittiyse sonucu da içerir"""
+    snapshot = job_queue.snapshot(job_id) if job_queue is not None else None
+    if snapshot is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return jsonify(snapshot)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_status_events(job_id):
+    """İş aşama değişikliklerini SSE ile akıt (extracting → parsing → normalized → done)"""
+    if job_queue is None or job_queue.snapshot(job_id) is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return Response(
+        job_events(job_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+def parse_model_json(text):
+    """Model çıktısındaki JSON nesnesini bul ve parse et - bulunamazsa None"""
+    cleaned = (text or "").strip().replace('```json', '').replace('```', '').strip()
+    json_start = cleaned.find('{')
+    json_end = cleaned.rfind('}') + 1
+    if json_start == -1 or json_end <= json_start:
+        return None
+    try:
+        return json.loads(cleaned[json_start:json_end])
+    except json.JSONDecodeError:
+        return None
+
+
+def batch_records_from_file(upload):
+    """Bir dosyadan parsel kayıtlarını çıkar - [(kaynak, girdiler veya None, hata)] listesi
+
+    Tanınan başlıklara sahip CSV/Excel dosyalarında her satır ayrı bir parseldir;
+    diğer dosyalar (PDF, Word, resim, tanınmayan tablolar) tek bir kayıt üretir.
+    """
+    filename = upload.filename
+    if upload.kind == "table":
+        records, _ = extraction_service.run("csv", upload.path)
+        if records:
+            # Binlerce satırlık içe aktarmalarda kayıtlar sütun sütun (toplu) normalize edilir
+            with metrics.timed("normalize"):
+                records = normalize_records(records)
+            return [(f"{filename}#{row_num}", record, None)
+                    for row_num, record in enumerate(records, 1)]
+    
+    payload, _, _ = process_upload(upload)
+    if not payload.get("success"):
+        return [(filename, None, payload.get("message") or payload.get("error"))]
+    return [(filename, payload["data"], None)]
+
+
+def recommend_for_record(inputs, prompt_inputs=None):
+    """Tek bir parsel için öneriyi tamamen üret ve JSON olarak döndür"""
+    text = "".join(generate_recommendations(inputs, priority=BULK, prompt_inputs=prompt_inputs))
+    result = parse_model_json(text)
+    if result is None:
+        return None, "Model yanıtı JSON olarak okunamadı"
+    if "error" in result:
+        return None, result.get("message") or result["error"]
+    return result, None
+
+
+def generate_batch_results(files, defaults):
+    """Toplu yüklemedeki tüm parselleri işle, her parsel bitince bir NDJSON satırı üret
+
+    files: [upload_spool.SpooledUpload] - her dosya okunduktan sonra spool'dan silinir
+    defaults: tüm parsellere uygulanacak ortak girdiler (il, mevsim, sulama, hedef...)
+    """
+    started_at = time.monotonic()
+    records = []
+    for upload in files:
+        with upload:
+            try:
+                records.extend(batch_records_from_file(upload))
+            except ExtractionQueueFull as e:
+                records.append((upload.filename, None, f"Dosya işleme kuyruğu dolu, {e.retry_after} sn sonra tekrar deneyin"))
+            except Exception as e:
+                records.append((upload.filename, None, f"Dosya okunurken hata oluştu: {str(e)}"))
+    records = records[:env_int("BATCH_MAX_RECORDS", 1000)]
+    
+    yield json.dumps({"type": "start", "total": len(records)}, ensure_ascii=False) + "\n"
+    
+    succeeded = 0
+    with ThreadPoolExecutor(max_workers=max(1, env_int("BATCH_CONCURRENCY", 4))) as executor:
+        futures = {}
+        pending = []
+        for index, (source, data, error) in enumerate(records):
+            if error is not None:
+                yield json.dumps({"type": "result", "index": index, "source": source,
+                                  "success": False, "error": error}, ensure_ascii=False) + "\n"
+                continue
+            # Dosyadan gelen değerler ortak girdileri ezer
+            pending.append((index, source, {**defaults, **{k: v for k, v in data.items() if v is not None}}))
+        # İklim normalleri tüm parseller için tek lookup_many çağrısıyla doldurulur
+        prompt_inputs = with_climate_normals_many([inputs for _, _, inputs in pending])
+        for (index, source, inputs), filled in zip(pending, prompt_inputs):
+            futures[executor.submit(recommend_for_record, inputs, filled)] = (index, source, inputs)
         
-        try:
-            if filename.endswith('.pdf'):
-                extracted_text = extract_text_from_pdf(file_content)
-                extraction_method = "PDF (pdfplumber - CPU)"
-            elif filename.endswith(('.doc', '.docx')):
-                extracted_text = extract_text_from_word(file_content)
-                extraction_method = "Word (python-docx - CPU)"
-            elif filename.endswith(('.csv', '.xlsx', '.xls')):
-                extracted_text = extract_data_from_csv(file_content)
-                extraction_method = "CSV/Excel (pandas - CPU)"
-            elif filename.endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')):
-                # Önce Docling, sonra Gemini Vision API fallback
-                extracted_text = extract_text_from_image_docling_or_gemini(file_content, mime_type)
-                if DOCLING_AVAILABLE and not (extracted_text.startswith("Resim OCR") or "hatası" in extracted_text.lower()):
-                    extraction_method = "Resim (Docling - CPU)"
-                elif extracted_text.startswith("Resim OCR") or "hatası" in extracted_text.lower():
-                    extraction_method = "Resim (Gemini Vision API - Bulut - Fallback)"
-                else:
-                    extraction_method = "Resim (Docling - CPU)"
+        for future in as_completed(futures):
+            index, source, inputs = futures[future]
+            try:
+                recommendation, error = future.result()
+            except Exception as e:
+                recommendation, error = None, str(e)
+            line = {"type": "result", "index": index, "source": source, "inputs": inputs,
+                    "success": error is None}
+            if error is None:
+                succeeded += 1
+                line["recommendation"] = recommendation
             else:
-                return jsonify({
-                    "success": False,
-                    "error": "Desteklenmeyen dosya formatı",
-                    "message": "PDF, Word, CSV, Excel veya resim dosyası yükleyin."
-                }), 400
-        except Exception as e:
-            return jsonify({
-                "success": False,
-                "error": "Dosya okuma hatası",
-                "message": f"Dosya okunurken hata oluştu: {str(e)}"
-            }), 400
-        
-        if not extracted_text or extracted_text.startswith("hata") or extracted_text.startswith("PDF okuma") or extracted_text.startswith("Word okuma") or extracted_text.startswith("CSV okuma") or extracted_text.startswith("Resim OCR"):
-            return jsonify({
-                "success": False,
-                "error": "Dosya okunamadı",
-                "message": extracted_text or "Dosya içeriği çıkarılamadı",
-                "extraction_method": extraction_method
-            }), 400
+                line["error"] = error
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    yield json.dumps({
+        "type": "summary",
+        "total": len(records),
+        "succeeded": succeeded,
+        "failed": len(records) - succeeded,
+        "elapsed_seconds": round(time.monotonic() - started_at, 3)
+    }, ensure_ascii=False) + "\n"
+
+
+def batch_request_defaults(form):
+    """Form'daki 'defaults' alanını (JSON) ortak girdilere çevir"""
+    defaults = json.loads(form.get('defaults') or '{}')
+    if not isinstance(defaults, dict):
+        raise ValueError("defaults bir JSON nesnesi olmalı")
+    return defaults
+
+
+def spool_batch(uploads):
+    """Toplu yüklemedeki dosyaları spool'da sahiplen - biri sınırı aşarsa hepsi silinir"""
+    spooled = []
+    try:
+        for file in uploads:
+            spooled.append(spool_upload(file))
+    except BaseException:
+        for upload in spooled:
+            upload.close()
+        raise
+    return spooled
+
+
+@app.route('/api/upload-batch', methods=['POST'])
+def upload_batch():
+    """Toplu parsel yükleme - her parselin önerisi hazır oldukça NDJSON satırı olarak akar"""
+    try:
+        uploads = request.files.getlist('files') + request.files.getlist('file')
+        uploads = [file for file in uploads if file.filename]
+        if not uploads:
+            return jsonify({"error": "Dosya bulunamadı"}), 400
         
-        # Çıkarılan metni parse et
         try:
-            parsed_data = parse_extracted_text(extracted_text)
-        except Exception as e:
-            return jsonify({
-                "success": False,
-                "error": "Veri parse hatası",
-                "message": f"Çıkarılan metin parse edilemedi: {str(e)}",
-                "extracted_text_preview": extracted_text[:500]
-            }), 400
-        
-        if "error" in parsed_data:
-            return jsonify({
-                "success": False,
-                "error": "Veri parse edilemedi",
-                "message": parsed_data.get("error", "Bilinmeyen hata"),
-                "extracted_text_preview": extracted_text[:500],
-                "extraction_method": extraction_method
-            }), 400
+            defaults = batch_request_defaults(request.form)
+        except ValueError as e:
+            return jsonify({"error": "Geçersiz defaults", "message": str(e)}), 400
         
-        # Eşleşen alanları say
-        matched_fields = [k for k, v in parsed_data.items() if v is not None and v != '']
-        
-        return jsonify({
-            "success": True,
-            "data": parsed_data,
-            "extracted_text_preview": extracted_text[:200],
-            "extraction_method": extraction_method,
-            "matched_fields_count": len(matched_fields),
-            "matched_fields": matched_fields
-        })
+        files = spool_batch(uploads)
+        return Response(
+            generate_batch_results(files, defaults),
+            mimetype='application/x-ndjson',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
     
+    except UploadTooLarge as e:
+        return jsonify(upload_too_large_payload(e)), 413
     except Exception as e:
         return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
 
 
+def readiness_payload():
+    """Hazırlık durumu ve HTTP kodu - Docling/çıkarıcı ön yüklemesi istendiyse yüklenene kadar 503"""
+    docling_status = get_converter_pool().status()
+    extraction_status = extraction_service.status()
+    if not DOCLING_WARMUP:
+        is_ready = True
+    elif extraction_service.inline:
+        is_ready = get_converter_pool().is_ready()
+    else:
+        is_ready = extraction_service.warm
+    if extraction_service.preload:
+        is_ready = is_ready and extraction_service.warm
+    return {
+        "ready": is_ready,
+        "docling": docling_status,
+        "extraction": extraction_status
+    }, 200 if is_ready else 503
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Hazırlık kontrolü"""
+    payload, status = readiness_payload()
+    return jsonify(payload), status
+
+
 @app.route('/')
 def index():
     """Ana sayfa"""
@@ -932,5 +1191,7 @@ def index():
 
 
 if __name__ == "__main__":
+    # Model çağrılarının token sayıları "llm_usage" logger'ı ile yazılır
+    logging.basicConfig(level=logging.INFO)
     app.run(debug=True, port=5001)
 
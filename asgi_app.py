@@ -0,0 +1,314 @@
+"""ASGI (Quart) sunum modu - bloklamayan LLM streaming
+
+Flask modunda (app.py) her /api/recommend akışı model üretimi boyunca (10-40 sn)
+bir worker thread'ini meşgul eder. Bu modda öneri akışı genai'nin async streaming
+API'si ile event loop üzerinde çalışır; tek süreç yüzlerce eşzamanlı akışı açık
+tutabilir. CPU'ya bağlı dosya çıkarma işleri ve senkron SQLite erişimleri (öneri
+ve çıkarma önbelleği, iş kuyruğu) thread'e devredilir.
+
+Route'lar ve yanıt formatları Flask uygulamasıyla aynıdır; Flask modu yedek
+(fallback) olarak kullanılmaya devam eder: python app.py
+
+Çalıştırma:
+    hypercorn asgi_app:app --bind 0.0.0.0:5001
+    # veya
+    python asgi_app.py
+"""
+
+import asyncio
+import time
+
+from quart import Quart, Request, Response, jsonify, request
+from quart_cors import cors
+
+from app import (
+    app as flask_app,
+    batch_request_defaults,
+    build_recommendation_prompt,
+    cache_metrics_payload,
+    cached_recommendation,
+    extraction_cache_metrics_payload,
+    generate_batch_results,
+    inference_backend,
+    inputs_cache_key,
+    job_accepted_payload,
+    job_events,
+    job_metrics_payload,
+    job_queue,
+    model_router,
+    process_upload,
+    readiness_payload,
+    recommendation_error_message,
+    response_cache,
+    rule_based_recommendation,
+    singleflight_metrics_payload,
+    spool_batch,
+    upload_too_large_payload,
+    wants_async_job,
+    wants_event_stream,
+    with_climate_normals,
+)
+import metrics
+from config import env_bool
+from prompt_builder import log_usage
+from rate_limiter import limiter_stats
+from singleflight import AsyncSingleFlight
+from stream_json import arecommendation_events
+from upload_spool import UploadTooLarge, spool_stream_factory, spool_upload
+
+
+class SpoolingRequest(Request):
+    """Yüklenen dosya parçalarını bellek yerine doğrudan spool klasörüne yazan request"""
+
+    def make_form_data_parser(self):
+        return self.form_data_parser_class(
+            max_content_length=self.max_content_length,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+            stream_factory=spool_stream_factory,
+        )
+
+
+app = cors(Quart(__name__))  # Frontend'den istekler için CORS desteği
+app.request_class = SpoolingRequest
+
+app.config['MAX_CONTENT_LENGTH'] = flask_app.config['MAX_CONTENT_LENGTH']
+# Uzun model akışları Quart'ın varsayılan 60 sn yanıt zaman aşımına takılmasın
+app.config['RESPONSE_TIMEOUT'] = None
+
+# Aynı anda gelen özdeş öneri istekleri tek model akışını paylaşır (RECOMMEND_SINGLEFLIGHT)
+recommendation_flights = AsyncSingleFlight() if env_bool("RECOMMEND_SINGLEFLIGHT", True) else None
+
+
+async def agenerate_recommendations(inputs):
+    """generate_recommendations'ın async karşılığı - aynı önbellek ve hata mesajlarını kullanır"""
+    local_result = rule_based_recommendation(inputs)
+    if local_result is not None:
+        yield local_result
+        return
+
+    # Önbellek SQLite'ta olabilir - okuma/yazma event loop'u bloklamasın
+    cache_key, cached = await asyncio.to_thread(cached_recommendation, inputs)
+    if cached is not None:
+        for chunk in response_cache.replay(cached):
+            yield chunk
+        return
+
+    prompt = build_recommendation_prompt(with_climate_normals(inputs))
+
+    async def generate():
+        full_text = ""
+        usage = None
+        model = None
+        started_at = time.monotonic()
+        meter = metrics.StreamMeter()
+        try:
+            # Kota sınırlayıcı ve model router Flask moduyla ortaktır
+            async for model, text, chunk_usage in inference_backend.astream("recommend", prompt):
+                if text:
+                    meter.chunk(text)
+                    full_text += text
+                    yield text
+                usage = chunk_usage or usage
+            log_usage("recommend", model, usage, time.monotonic() - started_at)
+            meter.finish(model)
+
+            if response_cache is not None:
+                await asyncio.to_thread(response_cache.set, cache_key, full_text, time.monotonic() - started_at)
+        except Exception as e:
+            yield recommendation_error_message(e)
+
+    # Aynı girdilerle devam eden bir üretim varsa ona katıl
+    if recommendation_flights is not None:
+        chunks = recommendation_flights.stream(cache_key or inputs_cache_key(inputs), generate)
+    else:
+        chunks = generate()
+    async for chunk in chunks:
+        yield chunk
+
+
+@app.route('/api/recommend', methods=['POST'])
+async def recommend():
+    """API endpoint - form verilerini alıp öneri döndürür"""
+    try:
+        inputs = await request.get_json()
+
+        if not inputs:
+            return jsonify({"error": "Input verisi bulunamadı"}), 400
+
+        stream = agenerate_recommendations(inputs)
+        mimetype = 'text/plain'
+        if wants_event_stream(request.headers.get('Accept')):
+            stream = arecommendation_events(stream)
+            mimetype = 'text/event-stream'
+
+        return Response(
+            stream,
+            mimetype=mimetype,
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/upload-file', methods=['POST'])
+async def upload_file():
+    """Dosya yükleme ve veri çıkarma endpoint'i - çıkarma işi thread'de çalışır"""
+    try:
+        files = await request.files
+        if 'file' not in files:
+            return jsonify({"error": "Dosya bulunamadı"}), 400
+
+        file = files['file']
+        if file.filename == '':
+            return jsonify({"error": "Dosya seçilmedi"}), 400
+
+        form = await request.form
+        if job_queue is not None and wants_async_job(
+            form.get('async') or request.args.get('async'), request.headers.get('Prefer')
+        ):
+            upload = await asyncio.to_thread(spool_upload, file)
+            job_id = await asyncio.to_thread(job_queue.submit, upload.as_dict())
+            return jsonify(job_accepted_payload(job_id)), 202, {"Location": f"/api/jobs/{job_id}"}
+
+        upload = await asyncio.to_thread(spool_upload, file)
+        try:
+            payload, status, headers = await asyncio.to_thread(process_upload, upload)
+        finally:
+            upload.close()
+        return jsonify(payload), status, headers
+
+    except UploadTooLarge as e:
+        return jsonify(upload_too_large_payload(e)), 413
+    except Exception as e:
+        return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
+
+
+async def _iterate_in_thread(generator):
+    """Senkron generator'ı event loop'u bloklamadan async olarak tüket"""
+    while True:
+        item = await asyncio.to_thread(next, generator, None)
+        if item is None:
+            break
+        yield item
+
+
+@app.route('/api/upload-batch', methods=['POST'])
+async def upload_batch():
+    """Toplu parsel yükleme - NDJSON akışı (işler thread havuzunda çalışır)"""
+    try:
+        files = await request.files
+        uploads = files.getlist('files') + files.getlist('file')
+        uploads = [file for file in uploads if file.filename]
+        if not uploads:
+            return jsonify({"error": "Dosya bulunamadı"}), 400
+
+        try:
+            defaults = batch_request_defaults(await request.form)
+        except ValueError as e:
+            return jsonify({"error": "Geçersiz defaults", "message": str(e)}), 400
+
+        batch = await asyncio.to_thread(spool_batch, uploads)
+        return Response(
+            _iterate_in_thread(generate_batch_results(batch, defaults)),
+            mimetype='application/x-ndjson',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    except UploadTooLarge as e:
+        return jsonify(upload_too_large_payload(e)), 413
+    except Exception as e:
+        return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    """Prometheus metin formatında metrikler - Flask moduyla aynı kayıt defteri"""
+    if not metrics.ENABLED:
+        return jsonify({"error": "Metrikler kapalı (METRICS_ENABLED)"}), 404
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/metrics/cache', methods=['GET'])
+async def cache_metrics():
+    """Öneri önbelleği metrikleri"""
+    return jsonify(await asyncio.to_thread(cache_metrics_payload))
+
+
+@app.route('/api/metrics/singleflight', methods=['GET'])
+async def singleflight_metrics():
+    """Birleştirilen (coalesced) öneri istekleri metrikleri"""
+    return jsonify(singleflight_metrics_payload(recommendation_flights))
+
+
+@app.route('/api/metrics/rate-limits', methods=['GET'])
+async def rate_limit_metrics():
+    """Model başına kota kuyruğu metrikleri"""
+    return jsonify(limiter_stats())
+
+
+@app.route('/api/metrics/models', methods=['GET'])
+async def model_metrics():
+    """Görev/model bazlı gecikme, hata oranı, fallback ve hedge sayıları"""
+    return jsonify(model_router.stats())
+
+
+@app.route('/api/metrics/jobs', methods=['GET'])
+async def job_metrics():
+    """Asenkron iş kuyruğu metrikleri"""
+    return jsonify(await asyncio.to_thread(job_metrics_payload))
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+async def job_status(job_id):
+    """Asenkron yükleme işinin durumu - bittiyse sonucu da içerir"""
+    snapshot = await asyncio.to_thread(job_queue.snapshot, job_id) if job_queue is not None else None
+    if snapshot is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return jsonify(snapshot)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+async def job_status_events(job_id):
+    """İş aşama değişikliklerini SSE ile akıt - bekleme event loop dışında yapılır"""
+    if job_queue is None or await asyncio.to_thread(job_queue.snapshot, job_id) is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return Response(
+        _iterate_in_thread(job_events(job_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@app.route('/api/metrics/extraction-cache', methods=['GET'])
+async def extraction_cache_metrics():
+    """Dosya çıkarma önbelleği metrikleri"""
+    return jsonify(await asyncio.to_thread(extraction_cache_metrics_payload))
+
+
+@app.route('/api/ready', methods=['GET'])
+async def ready():
+    """Hazırlık kontrolü"""
+    payload, status = readiness_payload()
+    return jsonify(payload), status
+
+
+@app.route('/')
+async def index():
+    """Ana sayfa"""
+    return "Tarım Asistanı API (ASGI) - /api/recommend ve /api/upload-file endpoint'lerini kullanın"
+
+
+if __name__ == "__main__":
+    app.run(port=5001)
@@ -0,0 +1,45 @@
+"""İklim normalleri: tek parsel (prompt öncesi) ve toplu parsel sorguları
+
+Izgara sentetik Türkiye ızgarasıdır; gerçek kullanımdaki gibi diske yazılıp
+memory-map ile açılır.
+"""
+
+import numpy as np
+import pytest
+
+from climate_normals import ClimateNormals, synthetic_normals, write_normals
+
+KONYA = {"lat": "37.8746", "lon": "32.4932", "month": "4", "pH": 7.2}
+
+
+@pytest.fixture(scope="module")
+def normals(tmp_path_factory):
+    grid = synthetic_normals()
+    path = str(tmp_path_factory.mktemp("climate") / "climate_normals.npy")
+    write_normals(path, grid.data, grid.lat_min, grid.lon_min, grid.step)
+    return ClimateNormals.load(path)
+
+
+def _parcels(count):
+    rng = np.random.default_rng(0)
+    return rng.uniform(36.0, 42.0, count), rng.uniform(26.0, 44.0, count), rng.integers(1, 13, count)
+
+
+@pytest.mark.parametrize("method", ["nearest", "bilinear"])
+def test_fill_single(benchmark, normals, method):
+    filled = benchmark(normals.fill, KONYA, method)
+    assert filled["avg_temp_c"] is not None
+
+
+@pytest.mark.parametrize("count", [1_000, 100_000])
+def test_lookup_many(benchmark, normals, count):
+    lats, lons, months = _parcels(count)
+    values = benchmark(normals.lookup_many, lats, lons, months)
+    assert values.shape == (count, len(normals.variables))
+
+
+def test_fill_many(benchmark, normals):
+    lats, lons, months = _parcels(10_000)
+    records = [{"lat": lat, "lon": lon, "month": int(month)} for lat, lon, month in zip(lats, lons, months)]
+    filled = benchmark(normals.fill_many, records)
+    assert sum("climate_source" in record for record in filled) > 9_000
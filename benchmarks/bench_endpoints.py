@@ -0,0 +1,80 @@
+"""Uçtan uca istek yolları (Flask test istemcisi + sahte Gemini istemcisi)
+
+/api/recommend: prompt oluşturma → model akışı → yanıt (düz metin ve SSE)
+/api/upload-file: spool → çıkarma → parse → normalize (PDF, CSV ve örnek JPG'ler)
+
+"streaming" profilinde süre, simüle edilen model akışı artı sunucu yüküdür.
+"""
+
+import io
+import os
+
+import pytest
+
+from conftest import SAMPLE_IMAGES
+from report_fixtures import soil_report_pdf, soil_table_csv
+
+RECOMMEND_INPUTS = {
+    "province": "Konya",
+    "district": "Karatay",
+    "season": "ilkbahar",
+    "irrigation": "orta",
+    "pH": 7.4,
+    "organic_matter": 1.8,
+    "phosphorus_P": 12,
+    "potassium_K": 280,
+    "soil_texture": "killi tın",
+    "previous_crop": "buğday",
+    "goal": "yüksek verim",
+}
+
+
+def _recommend(client, accept=None):
+    headers = {"Accept": accept} if accept else {}
+    response = client.post("/api/recommend", json=RECOMMEND_INPUTS, headers=headers)
+    # Akışın tamamını tüket (test istemcisi gövdeyi okurken generator'ı çalıştırır)
+    body = response.get_data()
+    assert response.status_code == 200
+    return body
+
+
+def test_recommend_text_stream(benchmark, client, stub_genai):
+    body = benchmark(_recommend, client)
+    assert b"primary_crop" in body
+
+
+def test_recommend_sse(benchmark, client, stub_genai):
+    body = benchmark(_recommend, client, "text/event-stream")
+    assert b"event: final" in body
+
+
+def _upload(client, content, filename, mime_type):
+    response = client.post(
+        "/api/upload-file",
+        data={"file": (io.BytesIO(content), filename, mime_type)},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.mark.parametrize("page_count", [1, 10])
+def test_upload_pdf(benchmark, client, instant_genai, page_count):
+    pdf = soil_report_pdf(page_count)
+    payload = benchmark(_upload, client, pdf, "rapor.pdf", "application/pdf")
+    assert payload["data"]["pH"] == 7.2
+
+
+@pytest.mark.parametrize("row_count", [10, 1000])
+def test_upload_csv(benchmark, client, instant_genai, row_count):
+    table = soil_table_csv(row_count)
+    payload = benchmark(_upload, client, table, "parseller.csv", "text/csv")
+    assert payload["success"]
+
+
+@pytest.mark.parametrize("path", SAMPLE_IMAGES, ids=os.path.basename)
+def test_upload_sample_image(benchmark, client, instant_genai, path):
+    with open(path, "rb") as f:
+        image = f.read()
+    payload = benchmark(_upload, client, image, os.path.basename(path), "image/jpeg")
+    assert payload["success"]
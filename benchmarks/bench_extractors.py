@@ -0,0 +1,41 @@
+"""Çıkarıcı sıcak yolları: PDF, Word, CSV/Excel ve OCR öncesi resim ön işleme
+
+Sentetik raporlar farklı boyutlarda üretilir (report_fixtures); resimler depo
+kökündeki örnek JPG'lerdir.
+"""
+
+import os
+
+import pytest
+
+from conftest import SAMPLE_IMAGES
+from extractors import extract_data_from_csv, extract_text_from_pdf, extract_text_from_word
+from image_preprocess import preprocess_file
+from report_fixtures import soil_report_docx, soil_report_pdf, soil_table_csv
+
+
+@pytest.mark.parametrize("page_count", [1, 10, 50])
+def test_extract_text_from_pdf(benchmark, page_count):
+    pdf = soil_report_pdf(page_count)
+    text = benchmark(extract_text_from_pdf, pdf, workers=0, early_exit=False)
+    assert "pH" in text
+
+
+@pytest.mark.parametrize("paragraph_count", [10, 200, 2000])
+def test_extract_text_from_word(benchmark, paragraph_count):
+    document = soil_report_docx(paragraph_count)
+    text = benchmark(extract_text_from_word, document)
+    assert "pH" in text
+
+
+@pytest.mark.parametrize("row_count", [10, 1000, 10000])
+def test_extract_data_from_csv(benchmark, row_count):
+    table = soil_table_csv(row_count)
+    text = benchmark(extract_data_from_csv, table)
+    assert "pH" in text
+
+
+@pytest.mark.parametrize("path", SAMPLE_IMAGES, ids=os.path.basename)
+def test_preprocess_sample_image(benchmark, path, tmp_path):
+    prepared = benchmark(preprocess_file, path, str(tmp_path / "prepared"))
+    assert prepared.size[0] > 0
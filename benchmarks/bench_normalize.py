@@ -0,0 +1,71 @@
+"""Normalizasyon fonksiyonları: her parse ve toplu yüklemede satır başına çalışır"""
+
+import pytest
+
+from app import normalize_parsed_data
+from normalization import normalize_date, normalize_frame, normalize_number, normalize_records
+
+NUMBERS = ["7,2", "%2.3", "45 mg/kg", "1.250,5", "0.12", "-", "", None, 350, "350 ppm", "5.5 %"]
+DATES = ["20.03.2024", "2024-03-20", "20/03/2024", "20-03-2024", "20.3.24", "Mart 2024", "", None]
+RECORD = {
+    "sample_code": "NUM-2024-001",
+    "sample_date": "15.03.2024",
+    "analysis_date": "20.03.2024",
+    "province": "konya",
+    "district": "Merkez",
+    "pH": "7,2",
+    "ec": "1.25 dS/m",
+    "organic_matter": "%2.3",
+    "phosphorus_P": "45 mg/kg",
+    "potassium_K": "350",
+    "lime_caco3": "5.5 %",
+    "nitrogen_N": "0.12",
+    "soil_texture": "tınlı",
+    "irrigation": "Orta",
+    "season": "İlkbahar",
+}
+
+
+def test_normalize_number(benchmark):
+    benchmark(lambda: [normalize_number(value) for value in NUMBERS])
+
+
+def test_normalize_date(benchmark):
+    benchmark(lambda: [normalize_date(value) for value in DATES])
+
+
+def test_normalize_parsed_data(benchmark):
+    result = benchmark(normalize_parsed_data, dict(RECORD))
+    assert result["pH"] == 7.2
+
+
+def _bulk_records(count):
+    """Toplu laboratuvar içe aktarması: tekrar eden tarih/il, birimli sayılar"""
+    return [
+        {
+            "sample_code": f"NUM-{index:06d}",
+            "sample_date": f"{1 + index % 28:02d}.03.2024",
+            "province": ("Konya", "Ankara", "İzmir")[index % 3],
+            "pH": f"{6 + (index % 20) / 10:.1f}".replace(".", ","),
+            "organic_matter": f"%{1 + (index % 30) / 10:.1f}",
+            "phosphorus_P": f"{20 + index % 60} mg/kg",
+            "potassium_K": 200 + index % 300,
+            "soil_texture": ("Tınlı", "killi", "Sandy")[index % 3],
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", [1_000, 20_000])
+def test_normalize_records(benchmark, count):
+    records = _bulk_records(count)
+    result = benchmark(normalize_records, records)
+    assert result[0]["organic_matter"] == 1.0
+
+
+@pytest.mark.parametrize("count", [20_000, 100_000])
+def test_normalize_frame(benchmark, count):
+    import pandas as pd
+    frame = pd.DataFrame(_bulk_records(count))
+    result = benchmark(normalize_frame, frame)
+    assert result["phosphorus_P"].iloc[0] == 20.0
@@ -0,0 +1,139 @@
+"""Benchmark suite ortak ayarları ve sahte (stub) Gemini istemcisi
+
+Ağa çıkılmaz: genai.Client yerine deterministik StubGenaiClient kullanılır.
+Akış, ilk parça gecikmesi + parça arası gecikme ile simüle edilir; "instant"
+profili sadece sunucu tarafı işleme maliyetini, "streaming" profili gerçekçi
+bir model akışındaki toplam süreyi ölçer.
+
+Önbellekler, kural motoru, kota sınırlayıcı ve süreç havuzu kapatılır; her
+tur aynı sıcak yolu (çıkarma → parse → normalize, prompt → akış → JSON) çalıştırır.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import time
+import types as pytypes
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# app import edilmeden önce ayarlanmalı (modül düzeyinde okunuyor)
+os.environ.update({
+    "GEMINI_API_KEY": "benchmark",
+    "INFERENCE_BACKEND": "gemini",
+    "EXTRACTION_WORKERS": "0",
+    "EXTRACTION_CACHE_ENABLED": "0",
+    "RECOMMEND_CACHE_ENABLED": "0",
+    "RECOMMEND_SINGLEFLIGHT": "0",
+    "RULE_ENGINE_ENABLED": "0",
+    "GENAI_RATE_LIMIT_ENABLED": "0",
+    "JOB_QUEUE_ENABLED": "0",
+    "EXTRACTOR_PRELOAD": "",
+    "UPLOAD_SPOOL_DIR": os.path.join(tempfile.gettempdir(), "code-night-bench-spool"),
+})
+
+from inference_backends import DEFAULT_REPLAY_RESPONSES  # noqa: E402
+from report_fixtures import soil_report_text  # noqa: E402
+
+TIMING_PROFILES = {
+    "instant": (0.0, 0.0),
+    # Gözlenen gemma-3-27b-it akışına yakın: ~0.4 sn ilk token, ~20 ms parça arası
+    "streaming": (0.4, 0.02),
+}
+
+SAMPLE_IMAGES = sorted(glob.glob(os.path.join(ROOT, "*.jpg")))
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class _Chunk:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def _has_image(contents):
+    for content in contents if isinstance(contents, list) else [contents]:
+        for part in getattr(content, "parts", None) or []:
+            if getattr(part, "inline_data", None) is not None:
+                return True
+    return False
+
+
+class StubGenaiClient:
+    """genai.Client yerine: models.generate_content ve models.generate_content_stream
+
+    Akış çağrıları öneri yanıtını chunk_size karakterlik parçalar halinde,
+    resimli çağrılar (OCR) rapor metnini, diğerleri (parse) alan JSON'unu döndürür.
+    """
+
+    def __init__(self, first_token_delay=0.0, chunk_delay=0.0, chunk_size=40):
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.models = pytypes.SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+
+    def _pieces(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def _generate_content(self, model, contents, config=None):
+        self.calls += 1
+        time.sleep(self.first_token_delay)
+        text = soil_report_text() if _has_image(contents) else '{"pH": 7.2, "organic_matter": 2.3}'
+        return _Chunk(text, _Usage(500, len(text) // 4))
+
+    def _generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        text = DEFAULT_REPLAY_RESPONSES["recommend"]
+        time.sleep(self.first_token_delay)
+        pieces = self._pieces(text)
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(self.chunk_delay)
+            usage = _Usage(800, len(text) // 4) if index == len(pieces) - 1 else None
+            yield _Chunk(piece, usage)
+
+
+@pytest.fixture(params=list(TIMING_PROFILES))
+def stub_genai(request, monkeypatch):
+    """Model çağrılarını StubGenaiClient'a yönlendir - zamanlama profiline göre parametrik"""
+    import app
+    import inference_backends
+
+    client = StubGenaiClient(*TIMING_PROFILES[request.param])
+    monkeypatch.setattr(inference_backends, "get_genai_client", lambda: client)
+    monkeypatch.setattr(app, "get_genai_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def instant_genai(monkeypatch):
+    """Gecikmesiz stub - sadece sunucu tarafı işleme maliyeti ölçülür"""
+    import app
+    import inference_backends
+
+    client = StubGenaiClient()
+    monkeypatch.setattr(inference_backends, "get_genai_client", lambda: client)
+    monkeypatch.setattr(app, "get_genai_client", lambda: client)
+    return client
+
+
+@pytest.fixture(scope="session")
+def client():
+    import app
+
+    return app.app.test_client()
@@ -0,0 +1,68 @@
+"""Docling soğuk / sıcak converter gecikme karşılaştırması
+
+Depo kökündeki örnek JPG'ler ile resim başına süreyi ölçer:
+- cold: her resim için yeni DocumentConverter() (eski davranış)
+- warm: docling_pool üzerinden paylaşılan, önceden yüklenmiş converter
+
+Çalıştırma (proje kökünden):
+    python benchmarks/docling_latency.py [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docling_pool import DOCLING_AVAILABLE, DoclingConverterPool  # noqa: E402
+
+
+def _convert_cold(path):
+    from docling.document_converter import DocumentConverter
+    started_at = time.perf_counter()
+    DocumentConverter().convert(path)
+    return time.perf_counter() - started_at
+
+
+def _convert_warm(pool, path):
+    started_at = time.perf_counter()
+    with pool.acquire() as converter:
+        converter.convert(path)
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Resim başına tekrar sayısı")
+    args = parser.parse_args()
+
+    if not DOCLING_AVAILABLE:
+        print("Docling yüklü değil: pip install docling")
+        return 1
+
+    images = sorted(glob.glob(os.path.join(ROOT, "*.jpg")))
+    if not images:
+        print("Depo kökünde örnek JPG bulunamadı")
+        return 1
+
+    pool = DoclingConverterPool(size=1)
+    started_at = time.perf_counter()
+    pool.warm_up()
+    print(f"Warm-up (model yükleme): {time.perf_counter() - started_at:.2f} s\n")
+
+    print(f"{'resim':<28} {'cold p50 (s)':>14} {'warm p50 (s)':>14} {'hızlanma':>10}")
+    for path in images:
+        cold = [_convert_cold(path) for _ in range(args.repeat)]
+        warm = [_convert_warm(pool, path) for _ in range(args.repeat)]
+        cold_p50 = statistics.median(cold)
+        warm_p50 = statistics.median(warm)
+        print(f"{os.path.basename(path):<28} {cold_p50:>14.2f} {warm_p50:>14.2f} {cold_p50 / warm_p50:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
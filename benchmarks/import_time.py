@@ -0,0 +1,98 @@
+"""app.py soğuk açılış (import) süresi profili - python -X importtime
+
+Yeni bir Python sürecinde `import app` çalıştırılır ve -X importtime çıktısı
+ayrıştırılır:
+- toplam app import süresi (sağlık kontrolünün cevap verebileceği en erken an)
+- kümülatif süreye göre en pahalı üst seviye paketler
+- ağır çıkarıcı bağımlılıklarının (pandas, pdfplumber, docx, PIL, docling)
+  açılışta yüklenip yüklenmediği
+- EXTRACTOR_PRELOAD ile ısıtmanın her çıkarıcı için süresi
+
+Çalıştırma (proje kökünden):
+    python benchmarks/import_time.py [--repeat 5] [--top 15] [--root DİZİN]
+
+--root ile başka bir checkout ölçülebilir (ör. önceki sürümle karşılaştırma).
+Son ölçüm: benchmarks/import_time_report.txt
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("pandas", "pdfplumber", "docx", "PIL", "docling", "numpy")
+
+_PRELOAD_SCRIPT = (
+    "import json, extraction_service as s; "
+    "print(json.dumps(s.preload_extractors(list(s.EXTRACTORS))))"
+)
+
+
+def _run(root, code, env=None):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=root, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+
+
+def parse_importtime(stderr):
+    """-X importtime çıktısı - [(modül, kendi süresi µs, kümülatif µs, derinlik)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Ölçüm tekrarı (medyan alınır)")
+    parser.add_argument("--top", type=int, default=15, help="Gösterilecek paket sayısı")
+    parser.add_argument("--root", default=ROOT, help="Ölçülecek proje kökü")
+    args = parser.parse_args()
+
+    # Açılışta arka plan işi başlatmasın: ön yükleme ve Docling ısıtması kapalı
+    env = {"EXTRACTOR_PRELOAD": "", "DOCLING_WARMUP": "0"}
+    totals = []
+    rows = []
+    for _ in range(args.repeat):
+        rows = parse_importtime(_run(args.root, "import app", env).stderr)
+        totals.append(next(cumulative for name, _, cumulative, depth in rows
+                           if name == "app" and depth == 0))
+    print(f"import app (medyan, {args.repeat} tekrar): {statistics.median(totals) / 1000:.0f} ms\n")
+
+    # Üst seviye paketlere göre topla (app'in doğrudan import ettikleri)
+    packages = {}
+    for name, _, cumulative, depth in rows:
+        if depth == 1:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + cumulative
+    print(f"{'paket':<28} {'kümülatif (ms)':>16}")
+    for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<28} {cumulative / 1000:>16.1f}")
+
+    loaded = {name.split(".")[0] for name, _, _, _ in rows}
+    print("\nAçılışta yüklenen ağır çıkarıcı bağımlılıkları:",
+          ", ".join(module for module in HEAVY_MODULES if module in loaded) or "yok")
+
+    try:
+        timings = json.loads(_run(args.root, _PRELOAD_SCRIPT, env).stdout)
+    except subprocess.CalledProcessError:
+        return 0
+    print(f"\n{'EXTRACTOR_PRELOAD':<28} {'ısıtma (ms)':>16}")
+    for kind, seconds in timings.items():
+        cell = "kurulu değil" if seconds is None else f"{seconds * 1000:.1f}"
+        print(f"{kind:<28} {cell:>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
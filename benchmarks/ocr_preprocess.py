@@ -0,0 +1,120 @@
+"""OCR öncesi resim ön işlemenin bayt ve gecikme etkisi
+
+Depo kökündeki örnek JPG'ler ve bunlardan üretilen telefon fotoğrafı benzeri
+bir resim (report_fixtures.phone_photo) için:
+- önce/sonra dosya boyutu (Gemini Vision'a giden bayt) ve piksel boyutu
+- ön işleme süresi
+- Docling yüklüyse önce/sonra OCR süresi (paylaşılan, ısıtılmış converter)
+- --gemini verilirse önce/sonra Gemini Vision süresi (GEMINI_API_KEY gerekir)
+
+Çalıştırma (proje kökünden):
+    python benchmarks/ocr_preprocess.py [--repeat 3] [--gemini]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image  # noqa: E402
+
+from docling_pool import DOCLING_AVAILABLE, DoclingConverterPool  # noqa: E402
+from image_preprocess import preprocess_file  # noqa: E402
+from report_fixtures import phone_photo  # noqa: E402
+
+
+def _timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples)
+
+
+def _docling_ocr(pool, path):
+    with pool.acquire() as converter:
+        converter.convert(path)
+
+
+def _gemini_ocr(path, mime_type):
+    from google.genai import types
+    from genai_client import get_client
+
+    with open(path, "rb") as f:
+        data = f.read()
+    get_client().models.generate_content(
+        model="gemini-1.5-flash",
+        contents=[types.Content(role="user", parts=[
+            types.Part.from_text(text="Bu resimdeki tüm metni çıkar."),
+            types.Part.from_bytes(data=data, mime_type=mime_type),
+        ])],
+    )
+
+
+def _samples(workdir):
+    images = sorted(glob.glob(os.path.join(ROOT, "*.jpg")))
+    if images:
+        phone_path = os.path.join(workdir, "telefon_fotografi.jpg")
+        with open(phone_path, "wb") as f:
+            f.write(phone_photo(images[-1]))
+        images.append(phone_path)
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Resim başına tekrar sayısı")
+    parser.add_argument("--gemini", action="store_true", help="Gemini Vision gecikmesini de ölç")
+    args = parser.parse_args()
+
+    pool = None
+    if DOCLING_AVAILABLE:
+        pool = DoclingConverterPool(size=1)
+        pool.warm_up()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        images = _samples(workdir)
+        if not images:
+            print("Depo kökünde örnek JPG bulunamadı")
+            return 1
+
+        columns = ["boyut (px)", "bayt", "ön işleme (ms)"]
+        if pool is not None:
+            columns.append("docling (s)")
+        if args.gemini:
+            columns.append("gemini (s)")
+        print(f"{'resim':<26} {'':<7} " + " ".join(f"{column:>16}" for column in columns))
+
+        for path in images:
+            output_base = os.path.join(workdir, "prepared")
+            prepare_ms = _timed(lambda: preprocess_file(path, output_base), args.repeat) * 1000
+            prepared = preprocess_file(path, output_base)
+            with Image.open(path) as image:
+                original_size = image.size
+                mime_type = Image.MIME.get(image.format, "image/jpeg")
+
+            rows = (
+                ("önce", path, mime_type, original_size, "-"),
+                ("sonra", prepared.path, prepared.mime_type, prepared.size, f"{prepare_ms:.0f}"),
+            )
+            for label, image_path, image_mime_type, size, prepare_cell in rows:
+                cells = [f"{size[0]}x{size[1]}", str(os.path.getsize(image_path)), prepare_cell]
+                if pool is not None:
+                    cells.append(f"{_timed(lambda: _docling_ocr(pool, image_path), args.repeat):.2f}")
+                if args.gemini:
+                    cells.append(f"{_timed(lambda: _gemini_ocr(image_path, image_mime_type), args.repeat):.2f}")
+                name = os.path.basename(path) if label == "önce" else ""
+                print(f"{name:<26} {label:<7} " + " ".join(f"{cell:>16}" for cell in cells))
+            print(f"{'':<26} {'aşamalar':<7} {', '.join(prepared.stages) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
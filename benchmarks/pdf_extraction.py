@@ -0,0 +1,67 @@
+"""extract_text_from_pdf modlarının sentetik 1/10/100 sayfalık raporlarda karşılaştırması
+
+Modlar:
+- baseline:   sıralı, her sayfada tablo tespiti (eski davranış)
+- fast-path:  sıralı, çizgisiz sayfalarda tablo tespiti atlanır
+- parallel:   sayfalar --workers süreç arasında paylaştırılır
+- early-exit: temel toprak değerleri görülünce okuma durur
+
+Çalıştırma (proje kökünden):
+    python benchmarks/pdf_extraction.py [--workers 4] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extractors import extract_text_from_pdf  # noqa: E402
+from report_fixtures import soil_report_pdf  # noqa: E402
+
+PAGE_COUNTS = (1, 10, 100)
+
+
+def _timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = {
+        "baseline": dict(workers=0, table_fast_path=False, early_exit=False),
+        "fast-path": dict(workers=0, table_fast_path=True, early_exit=False),
+        "parallel": dict(workers=args.workers, table_fast_path=True, early_exit=False),
+        "early-exit": dict(workers=0, table_fast_path=True, early_exit=True),
+    }
+
+    # Paralel havuzu ölçümden önce başlat (süreç açılışı ilk istekte bir kez ödenir)
+    os.environ.setdefault("PDF_PARALLEL_MIN_PAGES", "2")
+    extract_text_from_pdf(soil_report_pdf(args.workers * 2), workers=args.workers)
+
+    header = f"{'sayfa':>6} " + " ".join(f"{mode + ' (ms)':>16}" for mode in modes)
+    print(header)
+    for page_count in PAGE_COUNTS:
+        pdf = soil_report_pdf(page_count)
+        row = [f"{page_count:>6}"]
+        for options in modes.values():
+            median = _timed(lambda: extract_text_from_pdf(pdf, **options), args.repeat)
+            row.append(f"{median * 1000:>16.1f}")
+        print(" ".join(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Benchmark'lar için sentetik toprak analiz raporu üreticileri
+
+Harici bir PDF kütüphanesine ihtiyaç duymadan, pdfplumber'ın okuyabildiği
+minimal PDF dosyaları üretir. Her raporun ilk sayfasında temel toprak
+değerleri, kalan sayfalarda çizgili tablolar ve açıklama metni bulunur.
+
+phone_photo ise depodaki örnek rapor resminden telefonla çekilmiş gibi
+(yüksek çözünürlük, eğik, masa zemini, EXIF ile yan kaydedilmiş) bir JPEG üretir.
+"""
+
+import io
+
+SOIL_VALUES = (
+    ("Numune No", "NUM-2024-001"),
+    ("Analiz Tarihi", "20.03.2024"),
+    ("pH", "7,2"),
+    ("EC", "1.25 dS/m"),
+    ("Organik Madde", "%2.3"),
+    ("Fosfor (P)", "45 mg/kg"),
+    ("Potasyum (K)", "350 mg/kg"),
+    ("Azot (N)", "0.12"),
+    ("Kirec (CaCO3)", "5.5 %"),
+)
+
+FILLER = (
+    "Bu sayfa laboratuvar yontemleri ve aciklamalarini icermektedir.",
+    "Numuneler 0-30 cm derinlikten alinmis ve hava kurusu hale getirilmistir.",
+    "Degerlendirme siniflari Bakanlik referans tablolarina gore yapilmistir.",
+)
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines, ruled):
+    ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    if ruled:
+        # Basit 2 sütunlu tablo çizgileri (pdfplumber tablo tespiti için)
+        ops.append("0.5 w")
+        top, row_height, rows = 780, 14, len(lines)
+        for i in range(rows + 1):
+            y = top - i * row_height + 4
+            ops.append(f"45 {y} m 400 {y} l S")
+        bottom = top - rows * row_height + 4
+        for x in (45, 200, 400):
+            ops.append(f"{x} {top + 4} m {x} {bottom} l S")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(pages):
+    """pages: [(satırlar, çizgili_mi), ...] listesinden PDF baytları üret"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages - sayfa referansları belli olunca doldurulur
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for lines, ruled in pages:
+        stream = _page_stream(lines, ruled)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def soil_report_pdf(page_count):
+    """İlk sayfası değer tablosu, diğer sayfaları açıklama + ara sıra tablo olan rapor"""
+    pages = [([f"{label}: {value}" for label, value in SOIL_VALUES], True)]
+    for page_num in range(2, page_count + 1):
+        lines = [f"Sayfa {page_num} - Ek bilgiler"] + list(FILLER) * 4
+        pages.append((lines, page_num % 5 == 0))
+    return build_pdf(pages)
+
+
+def phone_photo(source_path, scale=6, angle=4.0, margin=400):
+    """Örnek rapor resminden telefon fotoğrafı benzeri JPEG baytları
+
+    scale: büyütme (650 px genişlik x6 ~ 12 MP), angle: eğiklik (derece),
+    margin: rapor çevresindeki masa zemini (piksel)
+    """
+    from PIL import Image
+
+    with Image.open(source_path) as source:
+        page = source.convert("RGB")
+    page = page.resize((page.width * scale, page.height * scale), Image.LANCZOS)
+    page = page.rotate(angle, Image.BICUBIC, expand=True, fillcolor=(255, 255, 255))
+    photo = Image.new("RGB", (page.width + 2 * margin, page.height + 2 * margin), (90, 70, 50))
+    photo.paste(page, (margin, margin))
+
+    # Telefon yan tutulmuş: pikseller 90 derece dönük, EXIF yönlendirmesi 6 (saat yönünde 90)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    photo.rotate(90, expand=True).save(buffer, "JPEG", quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def soil_report_text():
+    """OCR/parse stub'larının döndürdüğü rapor metni (ilk PDF sayfasıyla aynı değerler)"""
+    return "\n".join(f"{label}: {value}" for label, value in SOIL_VALUES)
+
+
+def soil_report_docx(paragraph_count):
+    """Değer tablosu + paragraph_count açıklama paragrafı olan Word raporu baytları"""
+    import docx
+
+    document = docx.Document()
+    table = document.add_table(rows=len(SOIL_VALUES), cols=2)
+    for row, (label, value) in zip(table.rows, SOIL_VALUES):
+        row.cells[0].text = label
+        row.cells[1].text = value
+    for index in range(paragraph_count):
+        document.add_paragraph(FILLER[index % len(FILLER)])
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def soil_table_csv(row_count):
+    """Her satırı bir parsel olan, noktalı virgül ayraçlı ve birimli CSV baytları"""
+    lines = ["Numune No;İl;pH;Organik Madde (%);Fosfor (P) mg/kg;Potasyum (K) mg/kg;EC dS/m;Analiz Tarihi"]
+    for index in range(row_count):
+        lines.append(
+            f"NUM-{index:05d};Konya;{6 + (index % 20) / 10:.1f};%{1 + (index % 30) / 10:.1f};"
+            f"{20 + index % 60} mg/kg;{200 + index % 300};{0.5 + (index % 15) / 10:.2f};"
+            f"{1 + index % 28:02d}.03.2024"
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
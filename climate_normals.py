@@ -0,0 +1,315 @@
+"""Koordinat ve ay için yerel iklim normalleri (memory-mapped NumPy ızgarası)
+
+lat/lon verildiğinde öneri prompt'u modelden "bölgenin tipik iklim verilerini
+varsaymasını" istiyordu; model bunu her çağrıda yeniden tahmin ettiği için yanıt
+hem yavaşlıyor hem de aynı parsel için değişebiliyordu. Burada:
+
+- Aylık ortalama/en düşük/en yüksek sıcaklık, yağış, nem ve donlu gün sayısı
+  (enlem, boylam, ay, değişken) boyutlu float32 bir ızgarada tutulur
+- Izgara np.load(mmap_mode="r") ile açılır; sorgu sadece ilgili hücrelerin
+  sayfalarını okur, açılış maliyeti dosya boyutundan bağımsızdır
+- Hücre indeksi koordinattan doğrudan hesaplanır (O(1)); en yakın hücre veya
+  dört komşu hücreden bilinear ağırlıklı ortalama (verisi olmayan/deniz
+  hücreleri NaN'dır ve ağırlığa katılmaz)
+- lookup_many ve fill_many binlerce parseli tek numpy işlemiyle sorgular
+- numpy modül yüklenirken değil, ızgara açılırken import edilir; dosya yoksa
+  uygulama açılışı bu maliyeti ödemez
+
+Dosya biçimi: <ad>.npy dizisi ve yanında <ad>.json meta verisi
+{"lat_min", "lon_min", "step", "variables"} - lat_min/lon_min ilk hücrenin
+merkezidir. Gerçek veriden (ör. WorldClim, MGM) üretilen dizi write_normals ile
+kaydedilir; test ve demo için synthetic_normals sentetik bir Türkiye ızgarası üretir.
+
+CLIMATE_NORMALS_ENABLED  (varsayılan: true - dosya yoksa özellik kapalıdır)
+CLIMATE_NORMALS_PATH     Izgara dosyası (varsayılan: modülün yanındaki data/climate_normals.npy);
+                         "synthetic" = sentetik ızgara (sadece test/demo)
+CLIMATE_NORMALS_METHOD   nearest veya bilinear (varsayılan: bilinear)
+"""
+
+import json
+import logging
+import math
+import os
+
+from config import env_bool, env_str
+
+logger = logging.getLogger(__name__)
+
+VARIABLES = ("avg_temp_c", "min_temp_c", "max_temp_c", "rainfall_mm", "humidity_pct", "frost_days")
+
+# Öneri girdisine yazılan işaret - prompt bu değerlerin normallerden geldiğini bilir
+CLIMATE_SOURCE = "iklim normalleri"
+
+METHODS = ("nearest", "bilinear")
+
+_DAYS_IN_MONTH = (31, 28.25, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Çalışma klasöründen bağımsız varsayılan ızgara yolu
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "climate_normals.npy")
+
+
+def _coordinate(value):
+    """Formdan gelen koordinat/ay değerini sayıya çevir ("37,87" dahil) - okunamazsa None"""
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip().replace(',', '.')) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _month(value):
+    month = _coordinate(value)
+    if month is None or not month.is_integer() or not 1 <= month <= 12:
+        return None
+    return int(month)
+
+
+class ClimateNormals:
+    """(enlem, boylam, ay, değişken) ızgarası üzerinde nokta ve toplu sorgu"""
+
+    def __init__(self, data, lat_min, lon_min, step, variables=VARIABLES, method="bilinear"):
+        import numpy as np
+        if method not in METHODS:
+            raise ValueError(f"Bilinmeyen yöntem: {method} ({', '.join(METHODS)})")
+        if data.ndim != 4 or data.shape[2] != 12 or data.shape[3] != len(variables):
+            raise ValueError(f"İklim ızgarası (enlem, boylam, 12, {len(variables)}) boyutunda olmalı: {data.shape}")
+        self.data = data
+        # memmap alt sınıfı her indekslemede ek iş yapar; aynı belleğe düz ndarray görünümü
+        self._grid = data.view(np.ndarray)
+        self.lat_min = float(lat_min)
+        self.lon_min = float(lon_min)
+        self.step = float(step)
+        self.variables = tuple(variables)
+        self.method = method
+
+    @classmethod
+    def load(cls, path, method="bilinear"):
+        """.npy ızgarasını memory-map ile aç (meta veri aynı adlı .json dosyasında)"""
+        import numpy as np
+        with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        data = np.load(path, mmap_mode="r")
+        return cls(data, meta["lat_min"], meta["lon_min"], meta["step"], meta.get("variables", VARIABLES), method)
+
+    @property
+    def bounds(self):
+        """(lat_min, lat_max, lon_min, lon_max) - hücre merkezleri"""
+        n_lat, n_lon = self.data.shape[:2]
+        return (self.lat_min, self.lat_min + (n_lat - 1) * self.step,
+                self.lon_min, self.lon_min + (n_lon - 1) * self.step)
+
+    def lookup_many(self, lats, lons, months, method=None):
+        """Koordinat ve ay dizileri için (n, değişken) float dizisi - ızgara dışı/eksikler NaN"""
+        import numpy as np
+        method = method or self.method
+        if method not in METHODS:
+            raise ValueError(f"Bilinmeyen yöntem: {method} ({', '.join(METHODS)})")
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        months = np.asarray(months, dtype=float)
+        n_lat, n_lon = self.data.shape[:2]
+        y = (lats - self.lat_min) / self.step
+        x = (lons - self.lon_min) / self.step
+        # Kenar hücrelerin yarım hücre ötesine kadar ızgara içinde sayılır
+        valid = (
+            np.isfinite(y) & np.isfinite(x) & (y >= -0.5) & (y <= n_lat - 0.5)
+            & (x >= -0.5) & (x <= n_lon - 0.5) & (months >= 1) & (months <= 12)
+        )
+        month_index = np.clip(np.nan_to_num(months, nan=1.0), 1, 12).astype(np.intp) - 1
+        y = np.nan_to_num(y)
+        x = np.nan_to_num(x)
+
+        if method == "nearest" or n_lat < 2 or n_lon < 2:
+            iy = np.clip(np.rint(y), 0, n_lat - 1).astype(np.intp)
+            ix = np.clip(np.rint(x), 0, n_lon - 1).astype(np.intp)
+            values = self._grid[iy, ix, month_index].astype(float)
+        else:
+            y0 = np.clip(np.floor(y), 0, n_lat - 2).astype(np.intp)
+            x0 = np.clip(np.floor(x), 0, n_lon - 2).astype(np.intp)
+            fy = np.clip(y - y0, 0.0, 1.0)[:, None]
+            fx = np.clip(x - x0, 0.0, 1.0)[:, None]
+            corners = (
+                (y0, x0, (1 - fy) * (1 - fx)),
+                (y0, x0 + 1, (1 - fy) * fx),
+                (y0 + 1, x0, fy * (1 - fx)),
+                (y0 + 1, x0 + 1, fy * fx),
+            )
+            total = np.zeros((len(lats), len(self.variables)))
+            weight = np.zeros_like(total)
+            for iy, ix, corner_weight in corners:
+                cell = self._grid[iy, ix, month_index].astype(float)
+                present = ~np.isnan(cell)
+                total += np.where(present, cell, 0.0) * corner_weight
+                weight += present * corner_weight
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = np.where(weight > 0, total / weight, np.nan)
+
+        values[~valid] = np.nan
+        return values
+
+    def _point(self, lat, lon, month, method):
+        """Tek nokta için değişken değerleri listesi (NaN olabilir) - ızgara dışındaysa None
+
+        Dizi oluşturmadan en fazla dört hücre görünümü okunur (O(1)).
+        """
+        method = method or self.method
+        if method not in METHODS:
+            raise ValueError(f"Bilinmeyen yöntem: {method} ({', '.join(METHODS)})")
+        n_lat, n_lon = self._grid.shape[:2]
+        y = (lat - self.lat_min) / self.step
+        x = (lon - self.lon_min) / self.step
+        if not (-0.5 <= y <= n_lat - 0.5 and -0.5 <= x <= n_lon - 0.5 and 1 <= month <= 12):
+            return None
+        m = int(month) - 1
+        if method == "nearest" or n_lat < 2 or n_lon < 2:
+            iy = min(max(int(round(y)), 0), n_lat - 1)
+            ix = min(max(int(round(x)), 0), n_lon - 1)
+            return self._grid[iy, ix, m].tolist()
+        y0 = min(max(int(y // 1), 0), n_lat - 2)
+        x0 = min(max(int(x // 1), 0), n_lon - 2)
+        fy = min(max(y - y0, 0.0), 1.0)
+        fx = min(max(x - x0, 0.0), 1.0)
+        cells = (
+            (self._grid[y0, x0, m].tolist(), (1 - fy) * (1 - fx)),
+            (self._grid[y0, x0 + 1, m].tolist(), (1 - fy) * fx),
+            (self._grid[y0 + 1, x0, m].tolist(), fy * (1 - fx)),
+            (self._grid[y0 + 1, x0 + 1, m].tolist(), fy * fx),
+        )
+        values = []
+        for index in range(len(self.variables)):
+            total = weight = 0.0
+            for cell, cell_weight in cells:
+                value = cell[index]
+                if value == value:  # NaN değil
+                    total += value * cell_weight
+                    weight += cell_weight
+            values.append(total / weight if weight > 0 else float("nan"))
+        return values
+
+    def lookup(self, lat, lon, month, method=None):
+        """Tek nokta için {değişken: değer} - ızgara dışındaysa veya veri yoksa None"""
+        values = self._point(float(lat), float(lon), month, method)
+        if values is None:
+            return None
+        result = {name: round(value, 1) for name, value in zip(self.variables, values) if value == value}
+        return result or None
+
+    def _merge(self, inputs, values):
+        """Eksik iklim alanlarını values ile doldur - eklenen yoksa inputs aynen döner"""
+        added = {
+            name: round(value, 1)
+            for name, value in zip(self.variables, values)
+            if value == value and inputs.get(name) in (None, '')
+        }
+        if not added:
+            return inputs
+        return {**inputs, **added, "climate_source": CLIMATE_SOURCE}
+
+    def _target(self, inputs):
+        """Doldurulacak alan ve geçerli (lat, lon, month) varsa üçlü, yoksa None"""
+        if all(inputs.get(name) not in (None, '') for name in self.variables):
+            return None
+        lat, lon, month = _coordinate(inputs.get("lat")), _coordinate(inputs.get("lon")), _month(inputs.get("month"))
+        if lat is None or lon is None or month is None:
+            return None
+        return lat, lon, month
+
+    def fill(self, inputs, method=None):
+        """lat, lon ve month verilmişse eksik iklim alanlarını doldurulmuş yeni sözlük döndür
+
+        Kullanıcının girdiği değerler korunur; doldurulacak bir şey yoksa inputs aynen döner.
+        """
+        target = self._target(inputs)
+        if target is None:
+            return inputs
+        values = self._point(*target, method)
+        return inputs if values is None else self._merge(inputs, values)
+
+    def fill_many(self, records, method=None):
+        """fill'in toplu hali - tüm parseller tek lookup_many çağrısıyla sorgulanır"""
+        filled = list(records)
+        targets = [(index, target) for index, target in enumerate(map(self._target, filled)) if target is not None]
+        if not targets:
+            return filled
+
+        indexes, points = zip(*targets)
+        lats, lons, months = zip(*points)
+        values = self.lookup_many(lats, lons, months, method).tolist()
+        for index, row in zip(indexes, values):
+            filled[index] = self._merge(filled[index], row)
+        return filled
+
+
+def write_normals(path, data, lat_min, lon_min, step, variables=VARIABLES):
+    """Izgarayı .npy (float32) ve meta verisini .json olarak kaydet"""
+    import numpy as np
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.save(path, np.asarray(data, dtype=np.float32))
+    with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump({"lat_min": lat_min, "lon_min": lon_min, "step": step, "variables": list(variables)}, f)
+
+
+def synthetic_normals(step=0.25, lat_range=(35.75, 42.25), lon_range=(25.75, 44.75), method="bilinear"):
+    """Türkiye için sentetik iklim ızgarası - gerçek ölçüm değildir, test/demo içindir
+
+    Sıcaklık enlem ve iç kesimlere (yükselti vekili olarak doğuya) gidildikçe düşer,
+    mevsimsel genlik karasallıkla artar; yağış Karadeniz kıyısında yüksek ve kış
+    ağırlıklıdır. Karadeniz ve Akdeniz'e düşen hücreler NaN'dır.
+    """
+    import numpy as np
+    lats = np.arange(lat_range[0], lat_range[1] + step / 2, step)
+    lons = np.arange(lon_range[0], lon_range[1] + step / 2, step)
+    lat, lon = np.meshgrid(lats, lons, indexing="ij")
+    lat = lat[:, :, None]
+    lon = lon[:, :, None]
+    month = np.arange(1, 13)[None, None, :]
+
+    continentality = np.clip((lon - 27.0) / 18.0, 0.0, 1.0)
+    black_sea = np.clip((lat - 40.5) / 1.5, 0.0, 1.0)
+    elevation_km = 0.2 + 1.6 * continentality * (1 - 0.5 * black_sea)
+    season = np.cos(2 * np.pi * (month - 7) / 12)  # Temmuz'da 1, Ocak'ta -1
+
+    avg_temp = 19.5 - 0.8 * (lat - 36.0) - 5.5 * elevation_km + (7.0 + 8.0 * continentality * (1 - 0.6 * black_sea)) * season
+    diurnal = 8.0 + 6.0 * continentality
+    min_temp = avg_temp - diurnal / 2
+    max_temp = avg_temp + diurnal / 2
+    annual_rain = 400.0 + 900.0 * black_sea + 250.0 * (1 - continentality) * (lat < 37.5)
+    rainfall = annual_rain / 12 * (1 - (0.8 - 0.6 * black_sea) * season)
+    humidity = np.clip(68.0 - 18.0 * continentality + 12.0 * black_sea - 10.0 * season, 20.0, 95.0)
+    frost_days = np.array(_DAYS_IN_MONTH)[None, None, :] * np.clip(0.5 - min_temp / 6.0, 0.0, 1.0)
+
+    data = np.stack(
+        [np.broadcast_to(values, avg_temp.shape) for values in
+         (avg_temp, min_temp, max_temp, rainfall, humidity, frost_days)],
+        axis=-1,
+    ).astype(np.float32)
+
+    # Deniz hücreleri: Karadeniz kıyısı ~41-42°K, Akdeniz kıyısı ~36.2°K
+    lat2d, lon2d = lat[:, :, 0], lon[:, :, 0]
+    sea = ((lon2d > 28.0) & (lon2d < 41.0) & (lat2d > 41.3 + 0.7 * np.sin(np.pi * (lon2d - 28.0) / 13.0)))
+    sea |= (lon2d > 29.0) & (lon2d < 35.5) & (lat2d < 36.2)
+    data[sea] = np.nan
+    return ClimateNormals(data, float(lats[0]), float(lons[0]), step, method=method)
+
+
+def create_climate_normals():
+    """Ortam değişkenlerine göre ızgarayı aç - kapalıysa veya dosya yoksa None döner"""
+    if not env_bool("CLIMATE_NORMALS_ENABLED", True):
+        return None
+    method = env_str("CLIMATE_NORMALS_METHOD", "bilinear")
+    if method not in METHODS:
+        method = "bilinear"
+    path = env_str("CLIMATE_NORMALS_PATH", DEFAULT_PATH)
+    if path == "synthetic":
+        return synthetic_normals(method=method)
+    if not os.path.exists(path):
+        return None
+    try:
+        return ClimateNormals.load(path, method)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("İklim normalleri yüklenemedi (%s): %s", path, e)
+        return None
@@ -0,0 +1,53 @@
+"""Ortam değişkenlerinden yapılandırma okumak için yardımcı fonksiyonlar
+
+Tüm ayarlar .env dosyasından veya ortam değişkenlerinden okunur (bkz. GEMINI_API_KEY).
+Geçersiz bir değer verilirse varsayılan değer kullanılır.
+"""
+
+import os
+
+
+def env_str(name, default=None):
+    """String ayar oku - boş değerler verilmemiş sayılır"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip()
+
+
+def env_int(name, default):
+    """Tam sayı ayar oku"""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_float(name, default):
+    """Ondalıklı sayı ayar oku"""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_bool(name, default=False):
+    """Evet/hayır ayar oku (1/true/yes/on/evet)"""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on', 'evet')
+
+
+def env_list(name, default=None):
+    """Virgülle ayrılmış liste ayar oku"""
+    value = env_str(name)
+    if value is None:
+        return list(default or [])
+    return [item.strip() for item in value.split(',') if item.strip()]
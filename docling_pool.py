@@ -0,0 +1,146 @@
+"""Süreç genelinde paylaşılan Docling DocumentConverter havuzu
+
+DocumentConverter her oluşturulduğunda layout ve OCR modellerini yeniden yükler;
+bu yüzden converter'lar bir kez oluşturulur ve istekler arasında yeniden kullanılır.
+Her converter aynı anda tek bir istek tarafından kullanılır (thread-safe).
+
+DOCLING_POOL_SIZE   Havuzdaki converter sayısı (varsayılan: 1) - havuz ilk
+                    get_converter_pool() çağrısında oluşturulur; .env'den de okunur
+DOCLING_WARMUP      true ise uygulama açılışında modeller arka planda yüklenir (bkz. app.py)
+
+Docling (torch ile birlikte saniyeler süren bir import) modül yüklenirken import
+edilmez; sadece kurulu olup olmadığına bakılır, import ilk converter oluşturulurken yapılır.
+"""
+
+import importlib.util
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from config import env_int
+
+DOCLING_AVAILABLE = importlib.util.find_spec("docling") is not None
+
+STATE_UNAVAILABLE = "unavailable"
+STATE_COLD = "cold"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_ERROR = "error"
+
+
+class DoclingConverterPool:
+    """Tembel (lazy) oluşturulan, boyutu sınırlı converter havuzu"""
+
+    def __init__(self, size=1, factory=None):
+        self.size = max(1, size)
+        self._factory = factory or self._default_factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self.state = STATE_COLD if DOCLING_AVAILABLE or factory else STATE_UNAVAILABLE
+        self.warmup_requested = False
+        self.warmup_seconds = None
+        self.error = None
+
+    @staticmethod
+    def _default_factory():
+        from docling.document_converter import DocumentConverter
+        from docling.datamodel.base_models import InputFormat
+        converter = DocumentConverter()
+        # Modelleri ilk istekte değil, converter oluşturulurken yükle
+        if hasattr(converter, 'initialize_pipeline'):
+            converter.initialize_pipeline(InputFormat.IMAGE)
+        return converter
+
+    def _try_create(self):
+        """Havuz dolu değilse yeni converter oluştur, doluysa None döndür"""
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Bir converter'ı özel kullanım için al, iş bitince havuza geri koy"""
+        if self.state == STATE_UNAVAILABLE:
+            raise RuntimeError("Docling yüklü değil")
+        try:
+            converter = self._idle.get_nowait()
+        except queue.Empty:
+            converter = self._try_create()
+            if converter is None:
+                converter = self._idle.get(timeout=timeout)
+        if self.state == STATE_COLD:
+            self.state = STATE_READY
+        try:
+            yield converter
+        finally:
+            self._idle.put(converter)
+
+    def warm_up(self):
+        """Havuzdaki tüm converter'ları oluştur ve modelleri yükle"""
+        if self.state == STATE_UNAVAILABLE:
+            return False
+        self.state = STATE_WARMING
+        started_at = time.monotonic()
+        try:
+            while True:
+                converter = self._try_create()
+                if converter is None:
+                    break
+                self._idle.put(converter)
+        except Exception as e:
+            self.state = STATE_ERROR
+            self.error = str(e)
+            return False
+        self.warmup_seconds = round(time.monotonic() - started_at, 3)
+        self.state = STATE_READY
+        return True
+
+    def start_background_warmup(self):
+        """Modelleri arka plan thread'inde yükle - uygulama açılışını bekletmez"""
+        self.warmup_requested = True
+        if self._warmup_thread is not None or self.state == STATE_UNAVAILABLE:
+            return
+        self._warmup_thread = threading.Thread(target=self.warm_up, name="docling-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    def is_ready(self):
+        return self.state == STATE_READY
+
+    def status(self):
+        return {
+            "available": self.state != STATE_UNAVAILABLE,
+            "state": self.state,
+            "pool_size": self.size,
+            "converters_loaded": self._created,
+            "warmup_requested": self.warmup_requested,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+_converter_pool = None
+_converter_pool_lock = threading.Lock()
+
+
+def get_converter_pool():
+    """Süreç genelinde paylaşılan converter havuzu - ilk çağrıda oluşturulur
+
+    Modül import edilirken değil ilk kullanımda oluşturulur; böylece app.py'deki
+    load_dotenv() sonrasında okunan DOCLING_POOL_SIZE de geçerli olur.
+    """
+    global _converter_pool
+    if _converter_pool is None:
+        with _converter_pool_lock:
+            if _converter_pool is None:
+                _converter_pool = DoclingConverterPool(size=env_int("DOCLING_POOL_SIZE", 1))
+    return _converter_pool
@@ -0,0 +1,153 @@
+"""/api/upload-file için dosya özeti (SHA-256) ile anahtarlanmış iki seviyeli önbellek
+
+Aynı laboratuvar raporu tekrar yüklendiğinde OCR / pdfplumber / LLM çağrısı yapılmaz.
+
+- Seviye 1 (text): Dosyadan çıkarılan ham metin + çıkarma yöntemi
+- Seviye 2 (parsed): parse_extracted_text sonrası normalize edilmiş sözlük; sadece
+  tam parse'lar yazılır (LLM hatası nedeniyle kısmi kalan sonuçlar yazılmaz)
+
+Kayıtlar disk üzerindeki bir SQLite dosyasında tutulur. Toplam boyut
+EXTRACTION_CACHE_MAX_BYTES sınırını aşarsa en uzun süredir kullanılmayan
+kayıtlar silinir.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import env_bool, env_int, env_str
+
+LEVEL_TEXT = "text"
+LEVEL_PARSED = "parsed"
+
+
+def file_digest(file_content):
+    """Dosya içeriğinin SHA-256 özeti"""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+class ExtractionCache:
+    """Disk üzerinde, boyut sınırlı, iki seviyeli çıkarma önbelleği"""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_cache ("
+            " level TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (level, digest))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extraction_cache_accessed ON extraction_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self.hits = {LEVEL_TEXT: 0, LEVEL_PARSED: 0}
+        self.misses = {LEVEL_TEXT: 0, LEVEL_PARSED: 0}
+
+    def _get(self, level, digest):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM extraction_cache WHERE level = ? AND digest = ?",
+                (level, digest),
+            ).fetchone()
+            if row is None:
+                self.misses[level] += 1
+                return None
+            self._conn.execute(
+                "UPDATE extraction_cache SET accessed_at = ? WHERE level = ? AND digest = ?",
+                (time.time(), level, digest),
+            )
+            self._conn.commit()
+            self.hits[level] += 1
+        return json.loads(row[0])
+
+    def _set(self, level, digest, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (level, digest, value, size, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (level, digest, payload, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def _evict(self):
+        """Toplam boyut sınırı aşıldıysa en eski erişilen kayıtları sil (kilit altında çağrılır)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT level, digest, size FROM extraction_cache ORDER BY accessed_at ASC"
+        ).fetchall()
+        for level, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM extraction_cache WHERE level = ? AND digest = ?", (level, digest)
+            )
+            total -= size
+
+    def get_text(self, digest):
+        """Seviye 1: {"text", "extraction_method"} veya None"""
+        return self._get(LEVEL_TEXT, digest)
+
+    def set_text(self, digest, text, extraction_method):
+        return self._set(LEVEL_TEXT, digest, {"text": text, "extraction_method": extraction_method})
+
+    def get_parsed(self, digest):
+        """Seviye 2: {"data", "extracted_text_preview", "extraction_method"} veya None"""
+        return self._get(LEVEL_PARSED, digest)
+
+    def set_parsed(self, digest, data, extracted_text, extraction_method):
+        return self._set(LEVEL_PARSED, digest, {
+            "data": data,
+            "extracted_text_preview": extracted_text[:200],
+            "extraction_method": extraction_method,
+        })
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM extraction_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+def create_extraction_cache():
+    """Ortam değişkenlerine göre önbellek oluştur - devre dışıysa None döner
+
+    EXTRACTION_CACHE_ENABLED    (varsayılan: true)
+    EXTRACTION_CACHE_PATH       (varsayılan: .cache/extraction_cache.sqlite3)
+    EXTRACTION_CACHE_MAX_BYTES  (varsayılan: 256 MB)
+    """
+    if not env_bool("EXTRACTION_CACHE_ENABLED", True):
+        return None
+    path = env_str("EXTRACTION_CACHE_PATH", os.path.join(".cache", "extraction_cache.sqlite3"))
+    return ExtractionCache(path, max_bytes=env_int("EXTRACTION_CACHE_MAX_BYTES", 256 * 1024 * 1024))
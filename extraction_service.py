@@ -0,0 +1,265 @@
+"""CPU'ya bağlı dosya çıkarma işlerini süreç havuzunda çalıştıran servis
+
+pdfplumber / python-docx / pandas / Docling istek thread'inde GIL altında
+çalıştığında büyük bir PDF aynı worker'daki diğer istekleri durdurur. Bu servis
+işleri ProcessPoolExecutor'a devreder ve:
+
+- Sınırlı kuyruk: aynı anda en fazla EXTRACTION_MAX_QUEUE iş (çalışan + bekleyen).
+  Kuyruk doluysa ExtractionQueueFull fırlatılır (HTTP 503 + Retry-After).
+- İş başına zaman aşımı: EXTRACTION_JOB_TIMEOUT saniye (ExtractionTimeout).
+- Çıkarıcı bazlı eşzamanlılık sınırı: OCR'ın PDF işlerini aç bırakmaması için,
+  örn. EXTRACTION_LIMITS="pdf=2,word=2,csv=2,image=2,docling=1".
+
+EXTRACTION_WORKERS=0 ise işler eskisi gibi istek thread'inde çalışır.
+
+Çıkarıcı modülleri ve ağır bağımlılıkları (pdfplumber, python-docx, pandas,
+Pillow, Docling) ilk işte yüklenir. EXTRACTOR_PRELOAD ile seçilenler açılışta
+arka planda (süreç havuzu modunda her worker'da) ısıtılır, örn. "pdf,csv".
+"""
+
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from config import env_bool, env_float, env_int, env_list
+
+# Tür -> (modül, fonksiyon); modül ilk kullanımda import edilir
+EXTRACTORS = {
+    "pdf": ("extractors", "extract_text_from_pdf"),
+    "word": ("extractors", "extract_text_from_word"),
+    "csv": ("extractors", "extract_tabular_data"),
+    "image": ("image_preprocess", "preprocess_file"),
+    "docling": ("extractors", "extract_text_from_image_docling"),
+}
+
+# Türün ilk işinde yüklenen ağır bağımlılıklar (EXTRACTOR_PRELOAD bunları ısıtır)
+EXTRACTOR_DEPENDENCIES = {
+    "pdf": ("pdfplumber",),
+    "word": ("docx",),
+    "csv": ("pandas",),
+    "image": ("PIL.Image",),
+    "docling": ("docling.document_converter",),
+}
+
+DEFAULT_LIMITS = {"pdf": 2, "word": 2, "csv": 2, "image": 2, "docling": 1}
+
+
+class ExtractionQueueFull(Exception):
+    """Kuyruk dolu - istemci Retry-After süresi sonra tekrar denemeli"""
+
+    def __init__(self, retry_after):
+        super().__init__("Dosya işleme kuyruğu dolu")
+        self.retry_after = retry_after
+
+
+class ExtractionTimeout(Exception):
+    """İş, izin verilen süre içinde tamamlanmadı"""
+
+
+def get_extractor(kind):
+    """kind türünün çıkarıcı fonksiyonu - modülü gerekirse import edilir"""
+    module_name, func_name = EXTRACTORS[kind]
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def preload_extractors(kinds):
+    """Verilen türlerin çıkarıcılarını ve bağımlılıklarını import et - {tür: saniye veya None}
+
+    Kurulu olmayan bağımlılıklar (ör. Docling) None ile işaretlenir, hata fırlatılmaz.
+    """
+    timings = {}
+    for kind in kinds:
+        if kind not in EXTRACTORS:
+            continue
+        started_at = time.monotonic()
+        try:
+            for module_name in EXTRACTOR_DEPENDENCIES.get(kind, ()):
+                importlib.import_module(module_name)
+            get_extractor(kind)
+        except ImportError:
+            timings[kind] = None
+            continue
+        timings[kind] = round(time.monotonic() - started_at, 3)
+    return timings
+
+
+def _init_worker(warm_docling, preload=()):
+    """Worker süreci başlangıcı - seçilen çıkarıcıları ve istenirse Docling modellerini önceden yükle"""
+    preload_extractors(preload)
+    if warm_docling:
+        from docling_pool import get_converter_pool
+        get_converter_pool().warm_up()
+
+
+def _ping():
+    return os.getpid()
+
+
+class ExtractionService:
+    """Sınırlı kuyruklu, zaman aşımlı, çıkarıcı bazlı eşzamanlılık sınırlı süreç havuzu"""
+
+    def __init__(self, workers=2, max_queue=16, job_timeout=120.0, limits=None,
+                 retry_after=5, warm_docling=False, preload=()):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.retry_after = retry_after
+        self.warm_docling = warm_docling
+        self.preload = tuple(preload)
+        self.preload_seconds = None
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._kind_slots = {kind: threading.BoundedSemaphore(limit)
+                            for kind, limit in self.limits.items() if limit > 0}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.warm = False
+
+    @property
+    def inline(self):
+        return self.workers <= 0
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.warm_docling, self.preload),
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def run(self, kind, *args):
+        """kind türündeki çıkarıcıyı çalıştır ve sonucunu döndür"""
+        func = get_extractor(kind)
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise ExtractionQueueFull(self.retry_after)
+
+        with self._stats_lock:
+            self.in_flight += 1
+        deadline = time.monotonic() + self.job_timeout
+        kind_slot = self._kind_slots.get(kind)
+        try:
+            # Aynı türden çok fazla iş varsa sıra bekle (süre iş zaman aşımına dahil)
+            if kind_slot is not None and not kind_slot.acquire(timeout=self.job_timeout):
+                self._count_timeout()
+                raise ExtractionTimeout(f"{kind} işi sırada beklerken zaman aşımına uğradı")
+            try:
+                if self.inline:
+                    return func(*args)
+                return self._run_in_pool(func, args, deadline)
+            finally:
+                if kind_slot is not None:
+                    kind_slot.release()
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _run_in_pool(self, func, args, deadline):
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            # Bir worker çöktüyse havuzu yeniden oluştur
+            self._reset_executor()
+            future = self._get_executor().submit(func, *args)
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Çalışmaya başlamış bir iş durdurulamaz; sonucu yok sayılır
+            future.cancel()
+            self._count_timeout()
+            raise ExtractionTimeout("Dosya işleme zaman aşımına uğradı")
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise
+
+    def _count_timeout(self):
+        with self._stats_lock:
+            self.timeouts += 1
+
+    def warm_up(self):
+        """Tüm worker süreçlerini başlat (ve warm_docling ise modelleri yükle)
+
+        Satır içi modda EXTRACTOR_PRELOAD çıkarıcıları bu süreçte yüklenir.
+        """
+        if self.inline:
+            self.preload_seconds = preload_extractors(self.preload)
+        else:
+            executor = self._get_executor()
+            futures = [executor.submit(_ping) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+        self.warm = True
+
+    def start_background_warmup(self):
+        threading.Thread(target=self.warm_up, name="extraction-warmup", daemon=True).start()
+
+    def shutdown(self):
+        self._reset_executor()
+
+    def status(self):
+        with self._stats_lock:
+            return {
+                "mode": "inline" if self.inline else "process",
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "limits": dict(self.limits),
+                "preload": list(self.preload),
+                "preload_seconds": self.preload_seconds,
+                "warm": self.warm,
+            }
+
+
+def _limits_from_env():
+    limits = dict(DEFAULT_LIMITS)
+    for item in env_list("EXTRACTION_LIMITS"):
+        kind, _, value = item.partition('=')
+        try:
+            limits[kind.strip()] = int(value)
+        except ValueError:
+            continue
+    return limits
+
+
+def create_extraction_service(warm_docling=False):
+    """Ortam değişkenlerine göre servis oluştur
+
+    EXTRACTION_WORKERS      Süreç sayısı, 0 = istek thread'inde çalıştır (varsayılan: min(4, CPU))
+    EXTRACTION_MAX_QUEUE    Aynı anda kabul edilen en fazla iş (varsayılan: 16)
+    EXTRACTION_JOB_TIMEOUT  İş başına zaman aşımı, saniye (varsayılan: 120)
+    EXTRACTION_RETRY_AFTER  Kuyruk doluyken önerilen bekleme, saniye (varsayılan: 5)
+    EXTRACTION_LIMITS       Çıkarıcı bazlı eşzamanlılık, örn. "pdf=2,docling=1"
+    EXTRACTOR_PRELOAD       Açılışta ısıtılacak çıkarıcılar, örn. "pdf,csv" veya "all" (varsayılan: yok)
+    """
+    preload = env_list("EXTRACTOR_PRELOAD")
+    if "all" in preload:
+        preload = list(EXTRACTORS)
+    return ExtractionService(
+        workers=env_int("EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)),
+        max_queue=env_int("EXTRACTION_MAX_QUEUE", 16),
+        job_timeout=env_float("EXTRACTION_JOB_TIMEOUT", 120.0),
+        limits=_limits_from_env(),
+        retry_after=env_int("EXTRACTION_RETRY_AFTER", 5),
+        warm_docling=warm_docling or env_bool("DOCLING_WARMUP", False),
+        preload=[kind for kind in preload if kind in EXTRACTORS],
+    )
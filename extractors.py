@@ -0,0 +1,337 @@
+"""Dosyalardan metin çıkaran CPU'ya bağlı fonksiyonlar
+
+Bu modül Flask'a ve genai'ye bağımlı değildir; böylece extraction_service
+tarafından ayrı süreçlerde (ProcessPoolExecutor) çalıştırılabilir.
+
+Çıkarıcılar kaynağı dosya yolu (str, bkz. upload_spool) veya bayt olarak alır;
+yol verildiğinde içerik belleğe kopyalanmaz ve süreç havuzuna sadece yol gönderilir.
+
+pdfplumber, python-docx ve pandas modül yüklenirken değil, ilgili çıkarıcı ilk
+kullanıldığında import edilir (toplam ~0.5 sn); /api/recommend ve sağlık
+kontrolleri bu maliyeti hiç ödemez. Açılışta ısıtmak için: EXTRACTOR_PRELOAD.
+"""
+
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import env_bool, env_int
+from docling_pool import DOCLING_AVAILABLE, get_converter_pool
+from normalization import normalize_column
+from soil_fields import EARLY_EXIT_FIELDS, NUMERIC_FIELDS, fields_with_values, match_column
+
+
+def _open_source(source):
+    """Dosya yolunu olduğu gibi, bayt içeriği BytesIO olarak döndür"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def _read_head(source, size):
+    """Kaynağın ilk size baytı (dosya imzası kontrolü için)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    with open(source, "rb") as f:
+        return f.read(size)
+
+
+def _page_has_ruling_lines(page):
+    """Sayfada tablo çizgisi var mı? Çizgi yoksa pdfplumber'ın varsayılan
+    ("lines") stratejisi zaten tablo bulamaz; tablo tespiti atlanabilir."""
+    return bool(page.lines or page.rects)
+
+
+def _extract_pdf_page(page, page_num, table_fast_path=True):
+    """Tek bir sayfanın metnini ve tablolarını çıkar"""
+    parts = [f"\n--- Sayfa {page_num} ---\n", page.extract_text() or ""]
+    
+    # Tabloları da çıkar (çok önemli!)
+    if table_fast_path and not _page_has_ruling_lines(page):
+        return "".join(parts)
+    tables = page.extract_tables()
+    if tables:
+        parts.append(f"\n--- Sayfa {page_num} Tabloları ---\n")
+        for table_num, table in enumerate(tables, 1):
+            parts.append(f"\nTablo {table_num}:\n")
+            for row in table:
+                if row:
+                    # Satırı temizle ve birleştir
+                    clean_row = [str(cell).strip() if cell else "" for cell in row]
+                    parts.append(" | ".join(clean_row) + "\n")
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _extract_pdf_pages(source, page_numbers, table_fast_path=True):
+    """Verilen sayfa numaralarını (1'den başlar) çıkar - paralel worker'larda çalışır"""
+    import pdfplumber
+    with pdfplumber.open(_open_source(source)) as pdf:
+        return [_extract_pdf_page(pdf.pages[num - 1], num, table_fast_path) for num in page_numbers]
+
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def _get_page_executor(workers):
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ProcessPoolExecutor(max_workers=workers)
+        return _page_executor
+
+
+def _select_pages(page_count, page_range=None, max_pages=None):
+    first, last = 1, page_count
+    if page_range:
+        first = max(1, page_range[0])
+        last = min(page_count, page_range[1])
+    pages = list(range(first, last + 1))
+    if max_pages:
+        pages = pages[:max_pages]
+    return pages
+
+
+def extract_text_from_pdf(source, page_range=None, max_pages=None, early_exit=None,
+                          workers=None, table_fast_path=None):
+    """PDF dosyasından metin çıkar - pdfplumber kütüphanesi kullanılıyor (CPU'da hızlı çalışır)
+    
+    source: dosya yolu veya bayt içerik
+    page_range: (ilk, son) sayfa aralığı, 1'den başlar ve son sayfa dahildir
+    max_pages: en fazla okunacak sayfa sayısı (PDF_MAX_PAGES)
+    early_exit: temel toprak değerlerinin hepsi görülünce okumayı bırak (PDF_EARLY_EXIT)
+    workers: sayfaları paralel işleyen süreç sayısı, 0 = sıralı (PDF_PAGE_WORKERS)
+    table_fast_path: çizgisiz sayfalarda tablo tespitini atla (PDF_TABLE_FAST_PATH)
+    """
+    if max_pages is None:
+        max_pages = env_int("PDF_MAX_PAGES", 0)
+    if early_exit is None:
+        early_exit = env_bool("PDF_EARLY_EXIT", False)
+    if workers is None:
+        workers = env_int("PDF_PAGE_WORKERS", 0)
+    if table_fast_path is None:
+        table_fast_path = env_bool("PDF_TABLE_FAST_PATH", True)
+    
+    try:
+        import pdfplumber
+        with pdfplumber.open(_open_source(source)) as pdf:
+            page_numbers = _select_pages(len(pdf.pages), page_range, max_pages)
+            
+            # Paralel mod: sayfalar worker'lar arasında ardışık parçalara bölünür
+            parallel = (workers > 1 and not early_exit
+                        and len(page_numbers) >= env_int("PDF_PARALLEL_MIN_PAGES", 8))
+            if not parallel:
+                parts = []
+                seen_fields = set()
+                for page_num in page_numbers:
+                    page_text = _extract_pdf_page(pdf.pages[page_num - 1], page_num, table_fast_path)
+                    parts.append(page_text)
+                    if early_exit:
+                        # Toprak alanlarının hepsi görüldüyse kalan sayfaları okuma
+                        seen_fields |= fields_with_values(page_text)
+                        if len(seen_fields) == len(EARLY_EXIT_FIELDS):
+                            break
+                return "".join(parts).strip()
+        
+        chunk_size = -(-len(page_numbers) // workers)
+        chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+        executor = _get_page_executor(workers)
+        # Yol verildiyse worker'lara içerik değil sadece yol gönderilir
+        futures = [executor.submit(_extract_pdf_pages, source, chunk, table_fast_path)
+                   for chunk in chunks]
+        return "".join(part for future in futures for part in future.result()).strip()
+    except Exception as e:
+        return f"PDF okuma hatası: {str(e)}"
+
+
+def extract_text_from_word(source):
+    """Word dosyasından metin çıkar - python-docx kütüphanesi kullanılıyor (CPU'da hızlı çalışır)"""
+    try:
+        import docx
+        doc = docx.Document(_open_source(source))
+        text = ""
+        
+        # Paragrafları oku
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                text += paragraph.text + "\n"
+        
+        # Tabloları da oku (çok önemli!)
+        for table_num, table in enumerate(doc.tables, 1):
+            text += f"\n--- Tablo {table_num} ---\n"
+            for row in table.rows:
+                row_text = []
+                for cell in row.cells:
+                    cell_text = cell.text.strip()
+                    if cell_text:
+                        row_text.append(cell_text)
+                if row_text:
+                    text += " | ".join(row_text) + "\n"
+            text += "\n"
+        
+        return text.strip()
+    except Exception as e:
+        return f"Word okuma hatası: {str(e)}"
+
+
+_XLSX_MAGIC = b"PK\x03\x04"
+_XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+
+
+def _read_table(source):
+    """CSV veya Excel dosyasını DataFrame'e oku - Excel imzası varsa doğrudan read_excel"""
+    import pandas as pd
+    if _read_head(source, 4) in (_XLSX_MAGIC, _XLS_MAGIC):
+        return pd.read_excel(_open_source(source)), "Excel"
+    last_error = None
+    for encoding in ('utf-8', 'iso-8859-9', 'latin-1'):
+        # Önce ayırıcıyı (, ; \t) otomatik tespit et, olmazsa virgül kullan
+        for options in ({'sep': None, 'engine': 'python'}, {}):
+            try:
+                return pd.read_csv(_open_source(source), encoding=encoding, **options), "CSV"
+            except Exception as e:
+                last_error = e
+    raise last_error
+
+
+def map_soil_columns(df):
+    """Sütun başlıklarını bilinen toprak alanlarına eşle - {sütun: alan}"""
+    mapping = {}
+    for column in df.columns:
+        field = match_column(column)
+        if field is not None and field not in mapping.values():
+            mapping[column] = field
+    return mapping
+
+
+def table_to_records(df, mapping):
+    """Eşleşen sütunlardan satır başına alan sözlüğü üret (iterrows yok)"""
+    import pandas as pd
+    mapped = df[list(mapping)].rename(columns=mapping)
+    for field in mapped.columns:
+        if field in NUMERIC_FIELDS:
+            # Metin yoluyla aynı sayı ayrıştırıcısı (normalization.normalize_number)
+            mapped[field] = normalize_column(mapped[field], field)
+        elif pd.api.types.is_datetime64_any_dtype(mapped[field]):
+            mapped[field] = mapped[field].dt.strftime('%Y-%m-%d')
+    mapped = mapped.astype(object).where(mapped.notna(), None)
+    return [
+        {field: value for field, value in record.items() if value is not None and value != ''}
+        for record in mapped.to_dict('records')
+    ]
+
+
+def render_table_text(df, kind, max_rows):
+    """Tabloyu LLM için kompakt metne çevir - en fazla max_rows satır"""
+    shown = df.head(max_rows)
+    lines = [
+        f"{kind} Dosyası İçeriği:",
+        f"Sütunlar: {', '.join(str(column) for column in df.columns)}",
+        f"Satır Sayısı: {len(df)}" + (f" (ilk {len(shown)} satır gösteriliyor)" if len(shown) < len(df) else ""),
+        "",
+        shown.to_csv(index=False, sep='|', na_rep=''),
+    ]
+    return "\n".join(lines).strip()
+
+
+def extract_tabular_data(source, max_rows=None):
+    """CSV/Excel dosyasını oku - (kayıtlar, metin) döndürür
+
+    Başlıkların en az TABLE_MIN_MATCHED_COLUMNS tanesi bilinen toprak alanlarına
+    eşleşirse kayıtlar (satır başına sözlük) LLM'e gerek kalmadan döner; aksi halde
+    kayıtlar None olur ve sadece kompakt metin (TABLE_TEXT_MAX_ROWS satır) kullanılır.
+    """
+    if max_rows is None:
+        max_rows = env_int("TABLE_TEXT_MAX_ROWS", 50)
+    try:
+        df, kind = _read_table(source)
+    except Exception as e:
+        return None, f"CSV/Excel okuma hatası: {str(e)}"
+    
+    # Boş satır/sütunları at, başlıkları temizle
+    df = df.dropna(how='all').dropna(axis=1, how='all')
+    df.columns = [str(column).strip() for column in df.columns]
+    
+    text = render_table_text(df, kind, max_rows)
+    mapping = map_soil_columns(df)
+    if len(mapping) < env_int("TABLE_MIN_MATCHED_COLUMNS", 2):
+        return None, text
+    return table_to_records(df, mapping), text
+
+
+def extract_data_from_csv(source):
+    """CSV/Excel dosyasından veri çıkar - pandas kütüphanesi kullanılıyor (CPU'da hızlı çalışır)"""
+    return extract_tabular_data(source)[1]
+
+
+def extract_text_from_image_docling(source, mime_type):
+    """Docling kullanarak resimden metin çıkar ve JSON formatına dönüştür
+    
+    source dosya yolu ise (uzantısıyla) doğrudan kullanılır; bayt ise geçici dosyaya yazılır.
+    """
+    if not DOCLING_AVAILABLE:
+        return None
+    
+    try:
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            return _convert_image_docling(source)
+        
+        # Dosya uzantısını mime_type'a göre belirle
+        suffix = '.jpg'
+        if 'png' in mime_type:
+            suffix = '.png'
+        elif 'gif' in mime_type:
+            suffix = '.gif'
+        elif 'bmp' in mime_type:
+            suffix = '.bmp'
+        elif 'webp' in mime_type:
+            suffix = '.webp'
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+            tmp_file.write(source)
+            tmp_path = tmp_file.name
+        
+        try:
+            return _convert_image_docling(tmp_path)
+        finally:
+            # Geçici dosyayı sil
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    except Exception as e:
+        # Hata durumunda None döndür (fallback için)
+        return None
+
+
+def _convert_image_docling(path):
+    """Diskteki resmi paylaşılan Docling converter'ı ile metne çevir"""
+    # Paylaşılan converter'ı kullan - modeller her istekte yeniden yüklenmez
+    with get_converter_pool().acquire() as converter:
+        result = converter.convert(path)
+    
+    # Metni çıkar - Docling'in text özelliğini kullan
+    extracted_text = ""
+    if hasattr(result.document, 'text'):
+        extracted_text = result.document.text
+    elif hasattr(result.document, 'export_to_dict'):
+        # Dict formatına çevir
+        doc_json = result.document.export_to_dict()
+        # Metni çıkar (text, tables, vb.)
+        if 'content' in doc_json:
+            for item in doc_json['content']:
+                if 'text' in item:
+                    extracted_text += item['text'] + "\n"
+                elif 'table' in item:
+                    # Tablo varsa
+                    if 'rows' in item['table']:
+                        for row in item['table']['rows']:
+                            if 'cells' in row:
+                                row_text = " | ".join([cell.get('text', '') for cell in row['cells']])
+                                extracted_text += row_text + "\n"
+    else:
+        # Fallback: string'e çevir
+        extracted_text = str(result.document)
+    
+    return extracted_text.strip() if extracted_text else None
@@ -2,6 +2,17 @@ import { useState } from 'react';
 import CropForm from './components/CropForm';
 import ResultDisplay from './components/ResultDisplay';
 
+// SSE desteklemeyen sunucular için: ham metinden (```json bloğu dahil) JSON nesnesini çıkar
+const parsePlainResult = (text) => {
+  const jsonMatch = text.match(/\{[\s\S]*\}/);
+  if (!jsonMatch) return null;
+  try {
+    return JSON.parse(jsonMatch[0]);
+  } catch (e) {
+    return null;
+  }
+};
+
 function App() {
   const [result, setResult] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -17,6 +28,7 @@ function App() {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          Accept: 'text/event-stream',
         },
         body: JSON.stringify(formData),
       });
@@ -27,71 +39,37 @@ function App() {
 
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
-      let resultText = '';
+      const isEventStream = (response.headers.get('Content-Type') || '').includes('text/event-stream');
+
+      if (!isEventStream) {
+        // Sunucu SSE desteklemiyorsa ham metni sonda bir kez parse et
+        let resultText = '';
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          resultText += decoder.decode(value, { stream: true });
+        }
+        const parsed = parsePlainResult(resultText);
+        if (parsed?.error) {
+          setError(parsed);
+        } else if (parsed) {
+          setResult(parsed);
+        }
+        return;
+      }
 
+      // Sunucu her tamamlanan alan/madde için bir SSE olayı gönderir; sadece yeni gelen kısım işlenir
+      let buffer = '';
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        const chunk = decoder.decode(value, { stream: true });
-        resultText += chunk;
-
-        try {
-          let trimmed = resultText.trim();
-          trimmed = trimmed.replace(/^```json\s*/i, '');
-          trimmed = trimmed.replace(/^```\s*/g, '');
-          trimmed = trimmed.replace(/\s*```$/g, '');
-          trimmed = trimmed.trim();
-
-          let parsed = null;
-          if (trimmed.startsWith('{') || trimmed.startsWith('[')) {
-            parsed = JSON.parse(trimmed);
-          } else {
-            const jsonMatch = trimmed.match(/\{[\s\S]*\}/);
-            if (jsonMatch) {
-              try {
-                parsed = JSON.parse(jsonMatch[0]);
-              } catch (e) {
-                // Still parsing
-              }
-            }
-          }
-
-          if (parsed) {
-            if (parsed.error) {
-              setError(parsed);
-              break;
-            }
-            setResult(parsed);
-          }
-        } catch (e) {
-          // Still streaming
-        }
-      }
-
-      if (!error) {
-        try {
-          let trimmed = resultText.trim();
-          trimmed = trimmed.replace(/^```json\s*/i, '');
-          trimmed = trimmed.replace(/^```\s*/g, '');
-          trimmed = trimmed.replace(/\s*```$/g, '');
-          trimmed = trimmed.trim();
-
-          let finalResult;
-          if (trimmed.startsWith('{') || trimmed.startsWith('[')) {
-            finalResult = JSON.parse(trimmed);
-          } else {
-            const jsonMatch = trimmed.match(/\{[\s\S]*\}/);
-            if (jsonMatch) {
-              finalResult = JSON.parse(jsonMatch[0]);
-            }
-          }
-
-          if (finalResult && !finalResult.error) {
-            setResult(finalResult);
-          }
-        } catch (e) {
-          // Already displayed
+        buffer += decoder.decode(value, { stream: true });
+        let boundary = buffer.indexOf('\n\n');
+        while (boundary !== -1) {
+          handleServerEvent(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf('\n\n');
         }
       }
     } catch (err) {
@@ -101,6 +79,32 @@ function App() {
     }
   };
 
+  const handleServerEvent = (rawEvent) => {
+    let event = 'message';
+    let data = '';
+    for (const line of rawEvent.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (!data) return;
+    const payload = JSON.parse(data);
+
+    if (event === 'field') {
+      setResult((prev) => ({ ...prev, [payload.key]: payload.value }));
+    } else if (event === 'item') {
+      setResult((prev) => {
+        const items = [...((prev && prev[payload.key]) || [])];
+        items[payload.index] = payload.value;
+        return { ...prev, [payload.key]: items };
+      });
+    } else if (event === 'final') {
+      setResult(payload);
+    } else if (event === 'error') {
+      setResult(null);
+      setError(payload);
+    }
+  };
+
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-50 via-blue-50/30 to-indigo-50/20">
       {/* Premium Header */}
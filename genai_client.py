@@ -0,0 +1,87 @@
+"""Paylaşılan genai.Client fabrikası
+
+Her çağrıda yeni genai.Client oluşturmak HTTP bağlantılarını ve TLS oturumlarını
+çöpe atar; kısa parse çağrılarında gecikmenin çoğu bağlantı kurulumuna gider.
+Bu modül tüm çağrı noktalarının kullandığı tek bir client ve havuzlu bir HTTP
+transport sağlar.
+
+GENAI_MAX_CONNECTIONS      Havuzdaki en fazla bağlantı (varsayılan: 20)
+GENAI_MAX_KEEPALIVE        Açık tutulan en fazla boşta bağlantı (varsayılan: 10)
+GENAI_KEEPALIVE_EXPIRY     Boşta bağlantının açık kalma süresi, saniye (varsayılan: 60)
+GENAI_DEFAULT_TIMEOUT      Model bazlı ayar yoksa istek zaman aşımı, saniye (varsayılan: 120)
+GENAI_MODEL_TIMEOUTS       Model bazlı zaman aşımları, örn: "gemini-1.5-flash=30,gemma-3-27b-it=120"
+"""
+
+import os
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+
+from config import env_float, env_int, env_list
+
+# Varsayılan model zaman aşımları (saniye) - GENAI_MODEL_TIMEOUTS ile ezilebilir
+DEFAULT_MODEL_TIMEOUTS = {
+    "gemini-1.5-flash": 60,
+    "gemma-3-27b-it": 120,
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _connection_limits():
+    return httpx.Limits(
+        max_connections=env_int("GENAI_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=env_int("GENAI_MAX_KEEPALIVE", 10),
+        keepalive_expiry=env_float("GENAI_KEEPALIVE_EXPIRY", 60.0),
+    )
+
+
+def _model_timeouts():
+    timeouts = dict(DEFAULT_MODEL_TIMEOUTS)
+    for item in env_list("GENAI_MODEL_TIMEOUTS"):
+        model, _, seconds = item.partition('=')
+        try:
+            timeouts[model.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return timeouts
+
+
+def get_client():
+    """Süreç genelinde paylaşılan genai.Client'ı döndür (ilk çağrıda oluşturulur)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                limits = _connection_limits()
+                _client = genai.Client(
+                    api_key=os.environ.get("GEMINI_API_KEY"),
+                    http_options=types.HttpOptions(
+                        client_args={"limits": limits},
+                        async_client_args={"limits": limits},
+                    ),
+                )
+    return _client
+
+
+def reset_client():
+    """Paylaşılan client'ı bırak - bir sonraki get_client() yenisini oluşturur (örn. API key değişince)"""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def model_timeout(model):
+    """Model için istek zaman aşımı (saniye)"""
+    return _model_timeouts().get(model, env_float("GENAI_DEFAULT_TIMEOUT", 120.0))
+
+
+def model_config(model, **kwargs):
+    """Model bazlı zaman aşımı eklenmiş GenerateContentConfig oluştur"""
+    return types.GenerateContentConfig(
+        http_options=types.HttpOptions(timeout=int(model_timeout(model) * 1000)),
+        **kwargs,
+    )
@@ -0,0 +1,259 @@
+"""OCR öncesi resim ön işleme (Pillow)
+
+Laboratuvar raporlarının telefon fotoğrafları tam kamera çözünürlüğünde
+(ör. 4032x3024, 3-5 MB) Docling'e ve Gemini Vision'a gidiyordu. OCR için
+~200 DPI yeterlidir; fazlası sadece yükleme baytı ve işlem süresidir.
+
+Aşamalar (sırasıyla, IMAGE_PREPROCESS_STAGES ile tek tek açılıp kapatılır):
+- exif:      EXIF yönlendirmesine göre döndür (telefon yan tutulduysa)
+- downscale: IMAGE_TARGET_DPI'ye küçült; JPEG'lerde DCT ölçekleme (draft) ile
+             tam çözünürlüklü resim hiç çözülmez
+- grayscale: tek kanala indir
+- crop:      mürekkep yoğunluğu profillerinden tablo/içerik bölgesini bul,
+             masa ve kenar boşluklarını kırp
+- deskew:    küçük önizlemede satır profili varyansını en büyükleyen açıyı bul
+             ve resmi o kadar döndür (eğik çekilmiş fotoğraflar)
+- threshold: yerel ortalamaya göre uyarlamalı eşikleme (gölge ve parlamaya
+             dayanıklı); çıktı 1-bit PNG olur
+
+Sonuç, kaynak dosyanın yanına ara dosya olarak yazılır (Docling dosya yolu ister);
+çağıran iş bitince siler. Sadece renk dönüşümü gerekiyorsa (küçük, düz çekilmiş
+resimler) yeniden kodlanmaz, kaynak dosya aynen kullanılır.
+
+IMAGE_PREPROCESS          Ön işlemeyi aç/kapat (varsayılan: true)
+IMAGE_PREPROCESS_STAGES   Çalışacak aşamalar, örn. "exif,downscale,grayscale"
+IMAGE_TARGET_DPI          Hedef çözünürlük (varsayılan: 200)
+IMAGE_THRESHOLD_OFFSET    Eşikleme için yerel ortalamadan fark (varsayılan: 10)
+IMAGE_DESKEW_MAX_ANGLE    Aranan en büyük eğiklik açısı, derece (varsayılan: 10)
+IMAGE_JPEG_QUALITY        Eşiklenmemiş çıktı için JPEG kalitesi (varsayılan: 85)
+"""
+
+from collections import namedtuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+from config import env_float, env_int, env_list
+
+STAGES = ("exif", "downscale", "grayscale", "crop", "deskew", "threshold")
+
+# DPI bilgisi olmayan (veya 72/96 varsayılanını yazan) fotoğraflarda resmin kısa
+# kenarı A4 genişliği (8.27 inç) sayılır
+ASSUMED_PAGE_WIDTH_IN = 8.27
+_DEFAULT_DPI_VALUES = 96
+_EXIF_ORIENTATION = 0x0112
+
+# Eğiklik ve bölge tespiti bu boyuttaki önizlemede yapılır
+_ANALYSIS_SIZE = 800
+_DESKEW_MIN_ANGLE = 0.3
+# Bu çözünürlüğün altında eşikleme ince rakam çizgilerini koparır
+_THRESHOLD_MIN_DPI = 120
+# Tespit edilen bölge resmin bu oranından küçükse kırpılmaz (yanlış tespit)
+_CROP_MIN_AREA = 0.2
+_CROP_MARGIN = 0.02
+
+PreparedImage = namedtuple("PreparedImage", "path mime_type size stages")
+
+
+def enabled_stages():
+    """IMAGE_PREPROCESS_STAGES'teki aşamalar (bilinmeyen adlar yok sayılır)"""
+    selected = set(env_list("IMAGE_PREPROCESS_STAGES", STAGES))
+    return tuple(stage for stage in STAGES if stage in selected)
+
+
+def source_dpi(image):
+    """Resmin yatay DPI değeri - bilgi yoksa kısa kenar A4 genişliği varsayılır"""
+    dpi = image.info.get("dpi")
+    if dpi and float(dpi[0]) > _DEFAULT_DPI_VALUES:
+        return float(dpi[0])
+    return min(image.size) / ASSUMED_PAGE_WIDTH_IN
+
+
+def downscale(image, dpi, target_dpi):
+    """dpi çözünürlüğündeki resmi target_dpi'ye küçült - (resim, yeni dpi)"""
+    if dpi <= target_dpi:
+        return image, dpi
+    scale = target_dpi / dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS, reducing_gap=2.0), target_dpi
+
+
+def adaptive_threshold(gray, offset=10, radius=None):
+    """Yerel ortalamadan offset kadar koyu pikselleri mürekkep say - L modunda 0/255 resim
+
+    Tek bir global eşik gölgeli fotoğrafta sayfanın yarısını siyaha boyar;
+    burada her piksel kendi çevresinin ortalamasıyla karşılaştırılır.
+    """
+    if radius is None:
+        radius = max(4, min(gray.size) // 40)
+    local_mean = gray.filter(ImageFilter.BoxBlur(radius))
+    darkness = ImageChops.subtract(local_mean, gray)
+    return darkness.point(lambda value: 0 if value > offset else 255)
+
+
+def _ink_mask(gray, offset):
+    """Önizleme üzerinde mürekkep maskesi (mürekkep = 255)"""
+    preview = gray.copy()
+    preview.thumbnail((_ANALYSIS_SIZE, _ANALYSIS_SIZE))
+    return ImageOps.invert(adaptive_threshold(preview, offset)), preview.width / gray.width
+
+
+def _profile(mask, axis):
+    """Satır (axis=0) veya sütun (axis=1) başına ortalama mürekkep yoğunluğu (0-255)"""
+    size = (1, mask.height) if axis == 0 else (mask.width, 1)
+    return list(mask.resize(size, Image.BOX).tobytes())
+
+
+def _variance(values):
+    mean = sum(values) / len(values)
+    return sum((value - mean) ** 2 for value in values) / len(values)
+
+
+def estimate_skew(gray, offset=10, max_angle=10.0):
+    """Metin satırlarının eğikliğini derece cinsinden tahmin et
+
+    Satırlar yataya oturduğunda satır profili keskinleşir (satır/boşluk
+    ardışıklığı); önce 1 derecelik, sonra 0.25 derecelik adımlarla en yüksek
+    profil varyansını veren açı aranır.
+    """
+    mask, _ = _ink_mask(gray, offset)
+
+    def score(angle):
+        return _variance(_profile(mask.rotate(angle, Image.BILINEAR), 0))
+
+    best = max((step for step in range(-int(max_angle), int(max_angle) + 1)), key=score)
+    fine = [best + step / 4 for step in range(-3, 4)]
+    return max(fine, key=score)
+
+
+def rotate(image, angle):
+    """Resmi döndür, açılan köşeleri beyazla doldur"""
+    fill = 255 if image.mode == "L" else (255, 255, 255)
+    return image.rotate(angle, Image.BICUBIC, expand=True, fillcolor=fill)
+
+
+def _dense_span(profile, threshold):
+    indices = [i for i, value in enumerate(profile) if value > threshold]
+    if not indices:
+        return None
+    return indices[0], indices[-1] + 1
+
+
+def content_box(gray, offset=10):
+    """Tablo/içerik bölgesinin kutusu (sol, üst, sağ, alt) - bulunamazsa None
+
+    Satır ve sütun mürekkep profillerinde, en yoğun satırın/sütunun onda birini
+    geçen ilk ve son indeks bölgenin sınırıdır; masa dokusu ve kenar gölgeleri
+    uyarlamalı eşiklemede mürekkep sayılmadığı için dışarıda kalır.
+    """
+    mask, scale = _ink_mask(gray, offset)
+    rows, cols = _profile(mask, 0), _profile(mask, 1)
+    if not max(rows) or not max(cols):
+        return None
+    row_span = _dense_span(rows, max(rows) / 10)
+    col_span = _dense_span(cols, max(cols) / 10)
+    if row_span is None or col_span is None:
+        return None
+
+    margin_x, margin_y = mask.width * _CROP_MARGIN, mask.height * _CROP_MARGIN
+    left = max(0, int((col_span[0] - margin_x) / scale))
+    top = max(0, int((row_span[0] - margin_y) / scale))
+    right = min(gray.width, int((col_span[1] + margin_x) / scale) + 1)
+    bottom = min(gray.height, int((row_span[1] + margin_y) / scale) + 1)
+    if (right - left) * (bottom - top) < _CROP_MIN_AREA * gray.width * gray.height:
+        return None
+    return left, top, right, bottom
+
+
+def preprocess_image(image, stages=None, target_dpi=None, threshold_offset=None,
+                     deskew_max_angle=None, dpi=None):
+    """Aşamaları bellekteki resme uygula - (resim, uygulanan aşamalar)
+
+    stages: çalışacak aşamalar (IMAGE_PREPROCESS_STAGES)
+    target_dpi: küçültme hedefi (IMAGE_TARGET_DPI)
+    threshold_offset: eşikleme farkı (IMAGE_THRESHOLD_OFFSET)
+    deskew_max_angle: aranan en büyük eğiklik (IMAGE_DESKEW_MAX_ANGLE)
+    dpi: resmin mevcut çözünürlüğü (verilmezse resimden okunur/tahmin edilir)
+    """
+    if stages is None:
+        stages = enabled_stages()
+    if target_dpi is None:
+        target_dpi = env_int("IMAGE_TARGET_DPI", 200)
+    if threshold_offset is None:
+        threshold_offset = env_int("IMAGE_THRESHOLD_OFFSET", 10)
+    if deskew_max_angle is None:
+        deskew_max_angle = env_float("IMAGE_DESKEW_MAX_ANGLE", 10.0)
+    if dpi is None:
+        dpi = source_dpi(image)
+
+    applied = []
+    if "exif" in stages and image.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+        applied.append("exif")
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    if "downscale" in stages and dpi > target_dpi:
+        image, dpi = downscale(image, dpi, target_dpi)
+        applied.append("downscale")
+    if "grayscale" in stages and image.mode != "L":
+        image = ImageOps.grayscale(image)
+        applied.append("grayscale")
+
+    if not {"crop", "deskew", "threshold"} & set(stages):
+        return image, tuple(applied)
+
+    # Analiz aşamaları gri tonlu kopya üzerinde çalışır (renk korunduysa).
+    # Kırpma döndürmeden önce yapılır: döndürmede açılan beyaz köşeler masa
+    # zeminiyle kenar oluşturup bölge tespitini bozar.
+    gray = image if image.mode == "L" else ImageOps.grayscale(image)
+    if "crop" in stages:
+        box = content_box(gray, threshold_offset)
+        if box is not None and box != (0, 0, gray.width, gray.height):
+            image = image.crop(box)
+            gray = image if image.mode == "L" else gray.crop(box)
+            applied.append("crop")
+    if "deskew" in stages:
+        angle = estimate_skew(gray, threshold_offset, deskew_max_angle)
+        if abs(angle) >= _DESKEW_MIN_ANGLE:
+            image = rotate(image, angle)
+            gray = image if image.mode == "L" else rotate(gray, angle)
+            applied.append("deskew")
+    if "threshold" in stages and dpi >= _THRESHOLD_MIN_DPI:
+        image = adaptive_threshold(gray, threshold_offset).convert("1", dither=Image.NONE)
+        applied.append("threshold")
+    return image, tuple(applied)
+
+
+def preprocess_file(path, output_base, stages=None, target_dpi=None):
+    """Diskteki resmi ön işle ve output_base + uzantı olarak kaydet - PreparedImage
+
+    JPEG'lerde küçültme draft() ile çözme sırasında yapılır (DCT ölçekleme).
+    Eşiklenmiş çıktı 1-bit PNG, diğerleri JPEG olarak yazılır.
+    """
+    if stages is None:
+        stages = enabled_stages()
+    if target_dpi is None:
+        target_dpi = env_int("IMAGE_TARGET_DPI", 200)
+
+    with Image.open(path) as image:
+        dpi = source_dpi(image)
+        if "downscale" in stages and dpi > target_dpi and image.format == "JPEG":
+            scale = target_dpi / dpi
+            mode = "L" if "grayscale" in stages else "RGB"
+            original_width = image.width
+            image.draft(mode, (int(image.width * scale), int(image.height * scale)))
+            dpi *= image.width / original_width
+        image.load()
+        result, applied = preprocess_image(image, stages, target_dpi, dpi=dpi)
+        mime_type = Image.MIME.get(image.format, "image/jpeg")
+
+    if set(applied) <= {"grayscale"}:
+        # Geometri değişmedi - yeniden kodlamak baytı azaltmaz, kaynak aynen kullanılır
+        return PreparedImage(path, mime_type, result.size, ())
+
+    if result.mode == "1":
+        output_path, mime_type = output_base + ".png", "image/png"
+        result.save(output_path, "PNG")
+    else:
+        output_path, mime_type = output_base + ".jpg", "image/jpeg"
+        result.save(output_path, "JPEG", quality=env_int("IMAGE_JPEG_QUALITY", 85))
+    return PreparedImage(output_path, mime_type, result.size, applied)
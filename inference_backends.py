@@ -0,0 +1,371 @@
+"""Öneri ve parse çağrıları için değiştirilebilir çıkarım (inference) arka uçları
+
+generate_recommendations ve parse_text_with_llm modeli doğrudan değil bu
+arayüz üzerinden çağırır. Her arka uç aynı akış semantiğini sağlar:
+
+    stream(task, prompt, priority)   -> (model, metin parçası, usage) üçlüleri
+    astream(task, prompt, priority)  -> stream'in async karşılığı
+    generate(task, prompt, priority) -> (model, tam metin, usage)
+
+usage, Gemini usage_metadata ile aynı alanları taşır (prompt_token_count,
+candidates_token_count, total_token_count) ve genelde son parçada gelir.
+
+Arka uçlar (INFERENCE_BACKEND):
+- gemini  Google API; model router, kota sınırlayıcı ve fallback ile (varsayılan)
+- local   llama.cpp ile yerel GGUF model (llama-cpp-python opsiyonel) - ağ gerektirmez
+- replay  Kaydedilmiş veya sabit yanıtları parça parça tekrar oynatır (test/benchmark)
+
+INFERENCE_BACKEND              gemini | local | replay (varsayılan: gemini)
+INFERENCE_RECORD_PATH          Verilirse gemini yanıtları replay için bu JSON dosyasına kaydedilir
+INFERENCE_REPLAY_PATH          replay yanıt dosyası (prompt özeti veya görev adı -> yanıt metni)
+INFERENCE_REPLAY_CHUNK_SIZE    replay parça boyutu, karakter (varsayılan: 40)
+INFERENCE_REPLAY_FIRST_TOKEN_DELAY  replay ilk parça gecikmesi, saniye (varsayılan: 0)
+INFERENCE_REPLAY_CHUNK_DELAY   replay parçalar arası gecikme, saniye (varsayılan: 0)
+LOCAL_MODEL_PATH               local için GGUF model dosyası
+LOCAL_MODEL_CTX                Bağlam uzunluğu (varsayılan: 4096)
+LOCAL_MODEL_THREADS            CPU thread sayısı (varsayılan: 0 = llama.cpp seçer)
+LOCAL_MODEL_MAX_TOKENS         En fazla üretilecek token (varsayılan: 1024)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from google.genai import types
+
+from config import env_float, env_int, env_str
+from genai_client import get_client as get_genai_client, model_config
+from prompt_builder import estimate_tokens
+from rate_limiter import (
+    BULK,
+    INTERACTIVE,
+    arate_limited_stream,
+    rate_limited_call,
+    rate_limited_stream,
+    request_tokens,
+)
+
+try:
+    from llama_cpp import Llama
+    LLAMA_CPP_AVAILABLE = True
+except ImportError:
+    Llama = None
+    LLAMA_CPP_AVAILABLE = False
+
+Usage = namedtuple("Usage", "prompt_token_count candidates_token_count total_token_count")
+
+# replay dosyasında karşılığı olmayan istekler için sabit yanıtlar
+DEFAULT_REPLAY_RESPONSES = {
+    "recommend": json.dumps({
+        "primary_crop": "Buğday",
+        "alternatives": ["Arpa", "Nohut", "Ayçiçeği"],
+        "confidence": 70,
+        "reasons": ["Kayıtlı örnek yanıt (replay arka ucu)"],
+        "risks": [],
+        "quick_actions": [],
+        "missing_inputs": [],
+        "assumptions": ["Model çağrılmadı"],
+    }, ensure_ascii=False),
+    "parse": "{}",
+}
+
+
+def prompt_digest(prompt):
+    """Kayıt/replay anahtarı - prompt metninin SHA-256 özeti"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def estimated_usage(prompt, text):
+    """Token sayısı bildirmeyen arka uçlar için tahmini usage"""
+    prompt_tokens = estimate_tokens(prompt)
+    output_tokens = estimate_tokens(text) if text else 0
+    return Usage(prompt_tokens, output_tokens, prompt_tokens + output_tokens)
+
+
+def _collect(chunks):
+    model = None
+    parts = []
+    usage = None
+    for model, text, chunk_usage in chunks:
+        if text:
+            parts.append(text)
+        usage = chunk_usage or usage
+    return model, "".join(parts), usage
+
+
+class GeminiBackend:
+    """Google API - model seçimi router'dan, kota izni rate limiter'dan"""
+
+    name = "gemini"
+
+    def __init__(self, router):
+        self.router = router
+
+    @staticmethod
+    def _contents(prompt):
+        return [types.Content(role="user", parts=[types.Part.from_text(text=prompt)])]
+
+    @staticmethod
+    def _config(model, temperature):
+        # Gemma modeli system_instruction ve GoogleSearch tool'unu desteklemiyor,
+        # sadece model bazlı zaman aşımı (ve istenirse temperature) kullanılır
+        if temperature is None:
+            return model_config(model)
+        return model_config(model, temperature=temperature)
+
+    def stream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        client = get_genai_client()
+        contents = self._contents(prompt)
+        tokens = request_tokens(prompt)
+
+        def open_stream(model):
+            # Kota izni alınır; ilk parçadan önce gelen 429'lar geri çekilip tekrar denenir
+            return rate_limited_stream(
+                model,
+                lambda: client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=self._config(model, temperature),
+                ),
+                priority,
+                tokens,
+            )
+
+        # Router en hızlı sağlıklı modeli seçer, hata olursa sıradakine geçer
+        for model, chunk in self.router.stream(task, open_stream):
+            yield model, chunk.text, chunk.usage_metadata
+
+    async def astream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        client = get_genai_client()
+        contents = self._contents(prompt)
+        tokens = request_tokens(prompt)
+
+        async def open_stream(model):
+            return arate_limited_stream(
+                model,
+                lambda: client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=self._config(model, temperature),
+                ),
+                priority,
+                tokens,
+            )
+
+        # Hedge'te kaybeden deneme görevi iptal edilir
+        async for model, chunk in self.router.astream(task, open_stream):
+            yield model, chunk.text, chunk.usage_metadata
+
+    def generate(self, task, prompt, priority=BULK, temperature=None):
+        client = get_genai_client()
+        contents = self._contents(prompt)
+        tokens = request_tokens(prompt)
+        model, response = self.router.call(task, lambda model: rate_limited_call(
+            model,
+            lambda: client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=self._config(model, temperature),
+            ),
+            priority,
+            tokens,
+        ))
+        return model, response.text, response.usage_metadata
+
+
+class LocalBackend:
+    """llama.cpp ile yerel GGUF model - model ilk kullanımda bir kez yüklenir"""
+
+    name = "local"
+
+    def __init__(self, model_path, n_ctx=4096, n_threads=0, max_tokens=1024):
+        if not LLAMA_CPP_AVAILABLE:
+            raise RuntimeError("local arka ucu için llama-cpp-python kurulu olmalı (pip install llama-cpp-python)")
+        if not model_path or not os.path.exists(model_path):
+            raise RuntimeError(f"LOCAL_MODEL_PATH bulunamadı: {model_path!r}")
+        self.model_path = model_path
+        self.model = os.path.splitext(os.path.basename(model_path))[0]
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self.max_tokens = max_tokens
+        self._llm = None
+        # llama.cpp bağlamı thread-safe değil - üretimler sıraya girer
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._llm is None:
+            self._llm = Llama(
+                model_path=self.model_path,
+                n_ctx=self.n_ctx,
+                n_threads=self.n_threads or None,
+                verbose=False,
+            )
+        return self._llm
+
+    def stream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        with self._lock:
+            llm = self._load()
+            parts = []
+            for part in llm.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.max_tokens,
+                temperature=0.2 if temperature is None else temperature,
+                stream=True,
+            ):
+                text = part["choices"][0]["delta"].get("content")
+                if text:
+                    parts.append(text)
+                    yield self.model, text, None
+            prompt_tokens = len(llm.tokenize(prompt.encode("utf-8")))
+            output_tokens = len(llm.tokenize("".join(parts).encode("utf-8"), add_bos=False))
+            yield self.model, "", Usage(prompt_tokens, output_tokens, prompt_tokens + output_tokens)
+
+    async def astream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        async for item in _iterate_in_thread(self.stream(task, prompt, priority, temperature)):
+            yield item
+
+    def generate(self, task, prompt, priority=BULK, temperature=None):
+        return _collect(self.stream(task, prompt, priority, temperature))
+
+
+class ReplayBackend:
+    """Kaydedilmiş yanıtları ağ olmadan, ayarlanabilir gecikmeyle parça parça oynat
+
+    Yanıt önce prompt özetiyle, sonra görev adıyla aranır; ikisi de yoksa
+    DEFAULT_REPLAY_RESPONSES kullanılır.
+    """
+
+    name = "replay"
+
+    def __init__(self, responses=None, chunk_size=40, first_token_delay=0.0, chunk_delay=0.0):
+        self.responses = dict(DEFAULT_REPLAY_RESPONSES)
+        self.responses.update(responses or {})
+        self.chunk_size = max(1, chunk_size)
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        responses = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                responses = json.load(f)
+        return cls(responses, **kwargs)
+
+    def response_for(self, task, prompt):
+        text = self.responses.get(prompt_digest(prompt))
+        if text is None:
+            text = self.responses.get(task, "")
+        return text
+
+    def _chunks(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def stream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        text = self.response_for(task, prompt)
+        time.sleep(self.first_token_delay)
+        for index, chunk in enumerate(self._chunks(text)):
+            if index:
+                time.sleep(self.chunk_delay)
+            yield self.name, chunk, None
+        yield self.name, "", estimated_usage(prompt, text)
+
+    async def astream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        text = self.response_for(task, prompt)
+        await asyncio.sleep(self.first_token_delay)
+        for index, chunk in enumerate(self._chunks(text)):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+            yield self.name, chunk, None
+        yield self.name, "", estimated_usage(prompt, text)
+
+    def generate(self, task, prompt, priority=BULK, temperature=None):
+        return _collect(self.stream(task, prompt, priority, temperature))
+
+
+class RecordingBackend:
+    """Başka bir arka ucun tamamlanan yanıtlarını replay dosyasına kaydet"""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _save(self, prompt, text):
+        with self._lock:
+            responses = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    responses = json.load(f)
+            responses[prompt_digest(prompt)] = text
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(responses, f, ensure_ascii=False, indent=2)
+
+    def stream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        parts = []
+        for model, text, usage in self.inner.stream(task, prompt, priority, temperature):
+            if text:
+                parts.append(text)
+            yield model, text, usage
+        self._save(prompt, "".join(parts))
+
+    async def astream(self, task, prompt, priority=INTERACTIVE, temperature=None):
+        parts = []
+        async for model, text, usage in self.inner.astream(task, prompt, priority, temperature):
+            if text:
+                parts.append(text)
+            yield model, text, usage
+        await asyncio.to_thread(self._save, prompt, "".join(parts))
+
+    def generate(self, task, prompt, priority=BULK, temperature=None):
+        model, text, usage = self.inner.generate(task, prompt, priority, temperature)
+        self._save(prompt, text)
+        return model, text, usage
+
+
+async def _iterate_in_thread(iterator):
+    """Bloklayan generator'ı event loop'u tutmadan async olarak tüket"""
+    done = object()
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        # Generator kendi thread'inde kapatılır (tuttuğu kilit de bırakılır)
+        await asyncio.to_thread(iterator.close)
+
+
+def create_inference_backend(router):
+    """INFERENCE_BACKEND ortam değişkenine göre arka ucu oluştur"""
+    name = env_str("INFERENCE_BACKEND", "gemini").lower()
+    if name == "local":
+        return LocalBackend(
+            env_str("LOCAL_MODEL_PATH", ""),
+            n_ctx=env_int("LOCAL_MODEL_CTX", 4096),
+            n_threads=env_int("LOCAL_MODEL_THREADS", 0),
+            max_tokens=env_int("LOCAL_MODEL_MAX_TOKENS", 1024),
+        )
+    if name in ("replay", "mock"):
+        return ReplayBackend.from_file(
+            env_str("INFERENCE_REPLAY_PATH", ""),
+            chunk_size=env_int("INFERENCE_REPLAY_CHUNK_SIZE", 40),
+            first_token_delay=env_float("INFERENCE_REPLAY_FIRST_TOKEN_DELAY", 0.0),
+            chunk_delay=env_float("INFERENCE_REPLAY_CHUNK_DELAY", 0.0),
+        )
+    if name != "gemini":
+        raise ValueError(f"Bilinmeyen INFERENCE_BACKEND: {name}")
+    backend = GeminiBackend(router)
+    record_path = env_str("INFERENCE_RECORD_PATH", "")
+    if record_path:
+        return RecordingBackend(backend, record_path)
+    return backend
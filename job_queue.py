@@ -0,0 +1,377 @@
+"""Dosya çıkarma + parse işleri için SQLite tabanlı arka plan iş kuyruğu
+
+/api/upload-file çıkarma ve LLM parse'ını istek içinde yapar; yavaş OCR
+yüklemelerinde bağlantı dakikalarca açık kalır ve proxy zaman aşımına takılır.
+Asenkron modda yükleme hemen bir iş kimliği (job id) döndürür, iş yerel
+worker thread'lerinde çalışır:
+
+- İşler SQLite dosyasında tutulur; sunucu yeniden başlasa da kaybolmaz.
+  Çalışan işler süreli kiralanır (lease) ve handler çalıştığı sürece kira
+  arka planda yenilenir; kirası dolan iş (çöken worker) deneme hakkı kaldıysa
+  tekrar kuyruğa alınır, kalmadıysa başarısız sayılır - aynı dosyayı paylaşan
+  birden çok süreç de güvenle çalışır.
+- İlerleme aşamaları: queued → extracting → parsing → normalized → (succeeded | failed)
+- RetryJob fırlatan (ör. çıkarma kuyruğu dolu, zaman aşımı) veya beklenmedik
+  hata veren işler üstel gecikmeyle JOB_MAX_ATTEMPTS kez denenir.
+- Biten işlerin sonucu JOB_RESULT_TTL saniye saklanır, sonra silinir.
+
+İstemci /api/jobs/<id> ile sorgular veya /api/jobs/<id>/events (SSE) ile
+aşama değişikliklerine abone olur.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import env_bool, env_float, env_int, env_str
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+_COLUMNS = ("id", "status", "stage", "attempts", "max_attempts", "payload", "result",
+            "status_code", "error", "created_at", "updated_at", "run_after", "lease_until",
+            "expires_at")
+
+
+class RetryJob(Exception):
+    """Geçici hata - iş deneme hakkı kaldıysa gecikmeyle tekrar kuyruğa alınır
+
+    result/status_code verilirse deneme hakkı bittiğinde iş bu sonuçla biter.
+    """
+
+    def __init__(self, message, result=None, status_code=None):
+        super().__init__(message)
+        self.result = result
+        self.status_code = status_code
+
+
+class JobQueue:
+    """SQLite'ta kalıcı, thread worker'lı iş kuyruğu
+
+    handler(payload, progress) -> (sonuç sözlüğü, HTTP kodu)
+    cleanup(payload): iş kesin olarak bittiğinde (başarı veya son hata) çağrılır
+    """
+
+    def __init__(self, path, handler, cleanup=None, workers=2, max_attempts=3,
+                 retry_delay=2.0, result_ttl=3600.0, lease_seconds=300.0, poll_interval=1.0):
+        self.path = path
+        self.handler = handler
+        self.cleanup = cleanup
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # İş eklendiğinde veya durum değiştiğinde worker'ları ve aboneleri uyandırır
+        self._changed = threading.Condition()
+        self._threads = []
+        self._started = False
+        self._last_purge = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " status_code INTEGER,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " run_after REAL NOT NULL,"
+            " lease_until REAL,"
+            " expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after)")
+        self._conn.commit()
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        # Önceki çalıştırmadan kalan işler varsa worker'ları hemen başlat
+        if self._count_pending():
+            self.start()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _count_pending(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def start(self):
+        """Worker thread'lerini başlat (ilk submit'te otomatik çağrılır)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload):
+        """Yeni iş ekle - iş kimliğini döndür"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, stage, attempts, max_attempts, payload,"
+            " created_at, updated_at, run_after) VALUES (?, ?, ?, 0, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, QUEUED, self.max_attempts, json.dumps(payload, ensure_ascii=False),
+             now, now, now),
+        )
+        self.start()
+        self._notify()
+        return job_id
+
+    def get(self, job_id):
+        """İşin güncel durumu (sözlük) - yoksa veya süresi dolduysa None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        if job["expires_at"] is not None and job["expires_at"] <= time.time():
+            return None
+        return job
+
+    def snapshot(self, job_id):
+        """API yanıtı için iş özeti - yoksa None"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        snapshot = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+        if job["status"] in TERMINAL_STATUSES:
+            snapshot["status_code"] = job["status_code"]
+            snapshot["result"] = json.loads(job["result"]) if job["result"] else None
+            snapshot["expires_at"] = job["expires_at"]
+        if job["error"]:
+            snapshot["error"] = job["error"]
+        return snapshot
+
+    def events(self, job_id, timeout=None):
+        """İş özeti her değiştiğinde onu üreten generator - iş bitince (veya timeout'ta) durur
+
+        Aynı süreçteki worker'lar aboneleri hemen uyandırır; başka süreçlerdeki
+        değişiklikler poll_interval aralığıyla SQLite'tan okunur.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        last = None
+        while True:
+            snapshot = self.snapshot(job_id)
+            if snapshot is None:
+                return
+            state = (snapshot["status"], snapshot["stage"], snapshot["attempts"])
+            if state != last:
+                last = state
+                yield snapshot
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            with self._changed:
+                self._changed.wait(self.poll_interval)
+
+    def _fail_abandoned(self):
+        """Kirası dolmuş ve deneme hakkı bitmiş işleri başarısız olarak kapat
+
+        Worker'ı çökerten bir iş böylece sonsuza kadar tekrar denenmez.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM jobs"
+                " WHERE status = ? AND lease_until <= ? AND attempts >= max_attempts",
+                (RUNNING, now),
+            ).fetchall()
+        for job_id, payload, attempts in rows:
+            result = {"success": False, "error": "İş hatası",
+                      "message": "İş deneme hakkı bitene kadar tamamlanamadı"}
+            self._finish(job_id, json.loads(payload), attempts, FAILED, result, 500,
+                         "Kira süresi doldu, deneme hakkı kalmadı")
+
+    def _claim(self):
+        """Çalışmaya hazır bir işi kirala - (id, payload, attempts) veya None"""
+        self._fail_abandoned()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, payload, attempts FROM jobs"
+                " WHERE (status = ? AND run_after <= ?)"
+                " OR (status = ? AND lease_until <= ? AND attempts < max_attempts)"
+                " ORDER BY run_after LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            # Koşullu güncelleme: aynı işi başka bir süreç kiraladıysa satır değişmez
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, updated_at = ?"
+                " WHERE id = ? AND attempts = ? AND status IN (?, ?)",
+                (RUNNING, attempts + 1, now + self.lease_seconds, now, job_id, attempts, QUEUED, RUNNING),
+            )
+            self._conn.commit()
+            if cursor.rowcount != 1:
+                return None
+        return job_id, json.loads(payload), attempts + 1
+
+    def _set_stage(self, job_id, stage):
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET stage = ?, updated_at = ?, lease_until = ? WHERE id = ?",
+            (stage, now, now + self.lease_seconds, job_id),
+        )
+        self._notify()
+
+    def _heartbeat(self, job_id, attempts, stop):
+        """Handler çalıştığı sürece kirayı yenile - yavaş iş başka worker'a geçmesin"""
+        interval = max(0.1, self.lease_seconds / 3)
+        while not stop.wait(interval):
+            now = time.time()
+            self._execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (now + self.lease_seconds, job_id, RUNNING, attempts),
+            )
+
+    def _finish(self, job_id, payload, attempts, status, result, status_code, error=None):
+        now = time.time()
+        # Sadece bu denemenin kirası hâlâ geçerliyse; iş başka worker'a geçtiyse
+        # onun kullandığı spool dosyası silinmesin
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, status_code = ?, error = ?, updated_at = ?,"
+            " lease_until = NULL, expires_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+            (status, json.dumps(result, ensure_ascii=False), status_code, error, now,
+             now + self.result_ttl, job_id, RUNNING, attempts),
+        )
+        if cursor.rowcount != 1:
+            return
+        if status == SUCCEEDED:
+            self.completed += 1
+        else:
+            self.failed += 1
+        if self.cleanup is not None:
+            self.cleanup(payload)
+        self._notify()
+
+    def _retry_later(self, job_id, attempts, error):
+        now = time.time()
+        delay = self.retry_delay * (2 ** (attempts - 1))
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ?, run_after = ?,"
+            " lease_until = NULL WHERE id = ? AND status = ? AND attempts = ?",
+            (QUEUED, QUEUED, error, now, now + delay, job_id, RUNNING, attempts),
+        )
+        if cursor.rowcount != 1:
+            return
+        self.retried += 1
+        self._notify()
+
+    def _run(self, job_id, payload, attempts):
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, attempts, stop),
+                         name=f"job-heartbeat-{job_id[:8]}", daemon=True).start()
+        try:
+            result, status_code = self.handler(payload, lambda stage: self._set_stage(job_id, stage))
+        except Exception as e:
+            result = getattr(e, "result", None) or {"success": False, "error": "İş hatası", "message": str(e)}
+            status_code = getattr(e, "status_code", None) or 500
+            if attempts < self.max_attempts:
+                self._retry_later(job_id, attempts, str(e))
+            else:
+                self._finish(job_id, payload, attempts, FAILED, result, status_code, str(e))
+            return
+        finally:
+            stop.set()
+        status = SUCCEEDED if 200 <= status_code < 300 else FAILED
+        self._finish(job_id, payload, attempts, status, result, status_code)
+
+    def _work(self):
+        while True:
+            claimed = self._claim()
+            if claimed is None:
+                self._purge_expired()
+                with self._changed:
+                    self._changed.wait(self.poll_interval)
+                continue
+            self._run(*claimed)
+
+    def _purge_expired(self):
+        """Sonuç süresi dolan işleri sil (en fazla poll_interval * 60'ta bir)"""
+        now = time.time()
+        if now - self._last_purge < self.poll_interval * 60:
+            return
+        self._last_purge = now
+        self._execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall())
+        return {
+            "workers": self.workers,
+            "queued": counts.get(QUEUED, 0),
+            "running": counts.get(RUNNING, 0),
+            "succeeded": counts.get(SUCCEEDED, 0),
+            "failed": counts.get(FAILED, 0),
+            "completed_total": self.completed,
+            "failed_total": self.failed,
+            "retried_total": self.retried,
+        }
+
+
+def create_job_queue(handler, cleanup=None):
+    """Ortam değişkenlerine göre iş kuyruğu oluştur - devre dışıysa None döner
+
+    JOB_QUEUE_ENABLED     (varsayılan: true)
+    JOB_QUEUE_PATH        (varsayılan: .cache/jobs.sqlite3)
+    JOB_WORKERS           Worker thread sayısı (varsayılan: 2)
+    JOB_MAX_ATTEMPTS      İş başına en fazla deneme (varsayılan: 3)
+    JOB_RETRY_DELAY       İlk tekrar gecikmesi, her denemede iki katına çıkar (varsayılan: 2 sn)
+    JOB_RESULT_TTL        Biten işin sonucunun saklanma süresi (varsayılan: 3600 sn)
+    JOB_LEASE_SECONDS     Kira süresi; çalışan worker kirayı bunun üçte birinde bir yeniler (varsayılan: 300 sn)
+    """
+    if not env_bool("JOB_QUEUE_ENABLED", True):
+        return None
+    return JobQueue(
+        env_str("JOB_QUEUE_PATH", os.path.join(".cache", "jobs.sqlite3")),
+        handler,
+        cleanup=cleanup,
+        workers=max(1, env_int("JOB_WORKERS", 2)),
+        max_attempts=max(1, env_int("JOB_MAX_ATTEMPTS", 3)),
+        retry_delay=env_float("JOB_RETRY_DELAY", 2.0),
+        result_ttl=env_float("JOB_RESULT_TTL", 3600.0),
+        lease_seconds=env_float("JOB_LEASE_SECONDS", 300.0),
+    )
@@ -0,0 +1,321 @@
+"""Aşama bazlı gecikme metrikleri ve Prometheus metin formatında /metrics çıktısı
+
+upload_file yanıtındaki extraction_method yavaş bir yüklemenin zamanını nerede
+harcadığını (pdfplumber, Docling, Gemini Vision, parse, normalizasyon) söylemez.
+Burada:
+
+- Yükleme aşamaları için histogram: soil_upload_stage_seconds{stage}
+- /api/recommend akışları için model başına ilk token süresi (TTFT), toplam
+  akış süresi, parça sayısı ve çıktı boyutu
+- Upstream model hataları model ve görev başına sınıflandırılarak sayılır
+  (429 = kota, 401 = yetki/API anahtarı, other)
+- timed() ile ölçülen aşamalar istek boyunca toplanabilir (collect_timings);
+  böylece aynı ölçümler Server-Timing başlığına da yazılır
+
+prometheus_client bağımlılığı yoktur; metin formatı (0.0.4) burada üretilir.
+Ayarlar configure() ile okunur; app.py bunu load_dotenv() sonrasında çağırır,
+böylece .env'deki METRICS_* değerleri de geçerli olur.
+
+METRICS_ENABLED        /metrics endpoint'i ve ölçümler (varsayılan: true)
+METRICS_SERVER_TIMING  Yükleme yanıtlarına Server-Timing başlığı ekle (varsayılan: false)
+METRICS_STAGE_BUCKETS  Aşama histogramı sınırları (saniye), virgülle ayrılmış
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from config import env_bool, env_list
+from rate_limiter import is_rate_limit_error
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# configure() ile ortam değişkenlerinden güncellenir
+ENABLED = True
+SERVER_TIMING = False
+
+DEFAULT_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30)
+STREAM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+CHUNK_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} etiketleri {self.labelnames} olmalı")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(line for key, value in items for line in self._sample_lines(key, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _sample_lines(self, key, value):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Kümülatif kovalı histogram (_bucket, _sum, _count)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def set_buckets(self, buckets):
+        """Kova sınırlarını değiştir - mevcut ölçümler silinir"""
+        with self._lock:
+            self.buckets = tuple(sorted(float(bound) for bound in buckets))
+            self._values.clear()
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _sample_lines(self, key, state):
+        counts, total, count = state
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key, (("le", "+Inf"),))
+        yield f"{self.name}_bucket{labels} {count}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    """Kayıtlı metrikleri Prometheus metin formatında yazar"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = [line for metric in self._metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+def _stage_buckets():
+    try:
+        return tuple(float(bound) for bound in env_list("METRICS_STAGE_BUCKETS")) or DEFAULT_STAGE_BUCKETS
+    except ValueError:
+        return DEFAULT_STAGE_BUCKETS
+
+
+REGISTRY = Registry()
+
+upload_stage_seconds = REGISTRY.register(Histogram(
+    "soil_upload_stage_seconds",
+    "Dosya yükleme aşamalarının süresi (saniye)",
+    ("stage",),
+))
+recommend_ttft_seconds = REGISTRY.register(Histogram(
+    "soil_recommend_ttft_seconds",
+    "Öneri akışında ilk parçaya kadar geçen süre (saniye)",
+    ("model",),
+    TTFT_BUCKETS,
+))
+recommend_stream_seconds = REGISTRY.register(Histogram(
+    "soil_recommend_stream_seconds",
+    "Öneri akışının toplam süresi (saniye)",
+    ("model",),
+    STREAM_BUCKETS,
+))
+recommend_chunks = REGISTRY.register(Histogram(
+    "soil_recommend_chunks",
+    "Öneri akışı başına metin parçası sayısı",
+    ("model",),
+    CHUNK_BUCKETS,
+))
+recommend_output_bytes = REGISTRY.register(Histogram(
+    "soil_recommend_output_bytes",
+    "Öneri akışı başına çıktı boyutu (UTF-8 bayt)",
+    ("model",),
+    SIZE_BUCKETS,
+))
+genai_errors_total = REGISTRY.register(Counter(
+    "soil_genai_errors_total",
+    "Upstream model hataları (error_class: 429, 401, other)",
+    ("model", "task", "error_class"),
+))
+
+
+
+def configure():
+    """METRICS_ENABLED, METRICS_SERVER_TIMING ve METRICS_STAGE_BUCKETS'ı oku
+
+    Modül yüklenirken bir kez çağrılır; .env sonradan yüklendiyse (app.py) tekrar çağrılmalıdır.
+    """
+    global ENABLED, SERVER_TIMING
+    ENABLED = env_bool("METRICS_ENABLED", True)
+    SERVER_TIMING = env_bool("METRICS_SERVER_TIMING", False)
+    buckets = tuple(sorted(float(bound) for bound in _stage_buckets()))
+    if buckets != upload_stage_seconds.buckets:
+        upload_stage_seconds.set_buckets(buckets)
+
+
+configure()
+
+# İstek boyunca ölçülen aşamalar - collect_timings içinde (aşama, süre) listesi
+_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def timed(stage):
+    """Bloğun süresini stage aşaması olarak ölç - histogram ve Server-Timing için"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        if ENABLED:
+            upload_stage_seconds.observe(elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+@contextmanager
+def collect_timings():
+    """Blok içinde timed() ile ölçülen aşamaları listede topla"""
+    timings = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def server_timing_header(timings):
+    """Aşama sürelerinden Server-Timing başlığı - aynı aşama birden çok kez ölçüldüyse toplanır"""
+    totals = {}
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+def error_class(error):
+    """Upstream hatasını sınıflandır: 429 (kota), 401 (yetki/API anahtarı) veya other"""
+    if is_rate_limit_error(error):
+        return "429"
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in (401, 403):
+        return "401"
+    message = str(error)
+    if "401" in message or "UNAUTHENTICATED" in message or "API_KEY_INVALID" in message:
+        return "401"
+    return "other"
+
+
+def record_upstream_error(model, task, error):
+    if ENABLED:
+        genai_errors_total.inc(model=model, task=task, error_class=error_class(error))
+
+
+class StreamMeter:
+    """Bir öneri akışının TTFT, süre, parça ve bayt sayısını ölçer"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_token = None
+        self.chunks = 0
+        self.size = 0
+
+    def chunk(self, text):
+        if self.first_token is None:
+            self.first_token = time.monotonic() - self.started_at
+        self.chunks += 1
+        self.size += len(text.encode("utf-8"))
+
+    def finish(self, model):
+        """Başarıyla biten akışı kaydet (model bilinmiyorsa "unknown")"""
+        if not ENABLED:
+            return
+        model = model or "unknown"
+        if self.first_token is not None:
+            recommend_ttft_seconds.observe(self.first_token, model=model)
+        recommend_stream_seconds.observe(time.monotonic() - self.started_at, model=model)
+        recommend_chunks.observe(self.chunks, model=model)
+        recommend_output_bytes.observe(self.size, model=model)
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,404 @@
+"""Görev bazlı model yönlendirme, gecikme takibi ve hedge'li istekler
+
+Sabit kodlu "önce X, 404 gelirse Y" fallback'leri yerine her görev (ocr, parse,
+recommend) için bir model listesi tanımlanır. Router her (görev, model) çifti
+için kayan pencerede ilk token gecikmesini (p50/p95) ve hata oranını tutar:
+
+- Adaylar sıralanırken sağlıklı modeller önce, aralarında p50'si en düşük olan
+  başa gelir; yeterli örneği olmayan model bir kez denensin diye öne alınır
+- Bir model hata verirse (ilk parçadan önce) sıradaki modele geçilir
+- Hedge açıksa ve ilk model p95 süresinde ilk parçayı üretmediyse ikinci model
+  paralel başlatılır; ilk parçayı üreten kazanır, kaybeden iptal edilir (akışı
+  kapatılır). Tek parçalık call() (OCR, parse) hedge'lenmez: bloklayan çağrı
+  yarıda kesilemez, kaybeden sonuna kadar çalışıp kotayı iki kez harcardı
+
+MODEL_ROUTES              Görev başına model sırası, örn. "recommend=gemma-3-27b-it|gemini-1.5-flash"
+MODEL_HEDGING             Hedge'li istekleri aç (varsayılan: false - ek kota harcar)
+MODEL_HEDGE_MIN_DELAY     Hedge için en kısa bekleme, saniye (varsayılan: 0.5)
+MODEL_ROUTER_WINDOW       İstatistik penceresi, saniye (varsayılan: 300)
+MODEL_ROUTER_MIN_SAMPLES  p50/p95 ve hata oranı için gereken en az örnek (varsayılan: 5)
+MODEL_ROUTER_MAX_ERROR_RATE  Bu oranın üstündeki model sağlıksız sayılır (varsayılan: 0.5)
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+import metrics
+from config import env_bool, env_float, env_int, env_list
+
+DEFAULT_ROUTES = {
+    "recommend": ("gemma-3-27b-it", "gemini-1.5-flash"),
+    "ocr": ("gemini-1.5-flash", "gemma-3-27b-it"),
+    "parse": ("gemini-1.5-flash", "gemma-3-27b-it"),
+}
+
+_MAX_SAMPLES = 200
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ModelStats:
+    """Tek (görev, model) çifti için kayan pencere: ilk token gecikmesi ve sonuçlar"""
+
+    def __init__(self, window):
+        self.window = window
+        self.latencies = deque(maxlen=_MAX_SAMPLES)  # (zaman, saniye)
+        self.outcomes = deque(maxlen=_MAX_SAMPLES)  # (zaman, başarılı mı)
+
+    def _recent(self, samples):
+        cutoff = time.monotonic() - self.window
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [value for _, value in samples]
+
+    def record(self, latency, ok):
+        now = time.monotonic()
+        if latency is not None:
+            self.latencies.append((now, latency))
+        self.outcomes.append((now, ok))
+
+    def latency_percentiles(self, min_samples):
+        latencies = self._recent(self.latencies)
+        if len(latencies) < min_samples:
+            return None, None
+        return _percentile(latencies, 0.5), _percentile(latencies, 0.95)
+
+    def error_rate(self, min_samples):
+        outcomes = self._recent(self.outcomes)
+        if len(outcomes) < min_samples:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def as_dict(self):
+        p50, p95 = self.latency_percentiles(1)
+        return {
+            "samples": len(self._recent(self.outcomes)),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "error_rate": round(self.error_rate(1), 3),
+        }
+
+
+class _Attempt:
+    """Arka plan thread'inde çalışan tek model denemesi; olayları ortak kuyruğa yazar"""
+
+    def __init__(self, router, task, model, open_stream, events):
+        self.router = router
+        self.task = task
+        self.model = model
+        self.cancelled = threading.Event()
+        self.started_at = time.monotonic()
+        self.first_token = None
+        self.finished = False
+        self.iterator = None
+        threading.Thread(target=self._run, args=(open_stream, events),
+                         name=f"model-{model}", daemon=True).start()
+
+    def _run(self, open_stream, events):
+        iterator = None
+        try:
+            iterator = self.iterator = iter(open_stream(self.model))
+            for chunk in iterator:
+                if self.cancelled.is_set():
+                    return
+                if self.first_token is None:
+                    self.first_token = time.monotonic() - self.started_at
+                    self.router.record(self.task, self.model, self.first_token, ok=True)
+                events.put((self, "chunk", chunk))
+            if self.cancelled.is_set():
+                return
+            if self.first_token is None:
+                self.router.record(self.task, self.model, time.monotonic() - self.started_at, ok=True)
+            events.put((self, "done", None))
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.router.record(self.task, self.model, None, ok=False, error=e)
+                events.put((self, "error", e))
+        finally:
+            self.finished = True
+            # Kaybeden akış kapatılır (rate limiter izni de böylece bırakılır)
+            close = getattr(iterator, "close", None)
+            if self.cancelled.is_set() and close is not None:
+                close()
+
+    def cancel(self):
+        if not self.finished and not self.cancelled.is_set():
+            self.cancelled.set()
+            if self.first_token is None:
+                # İlk token gecikmesi en az bu kadar - yavaş model p95'te cezalandırılsın
+                self.router.record(self.task, self.model, time.monotonic() - self.started_at, ok=True)
+            # Parçalar arasında bekleyen akış hemen kapatılır (upstream yanıtı ve rate
+            # limiter izni bırakılır); parça beklerken çalışıyorsa (ValueError) _run
+            # bir sonraki parçada kapatır
+            close = getattr(self.iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except ValueError:
+                    pass
+
+
+class ModelRouter:
+    """Görev başına model seçimi, fallback ve hedge"""
+
+    def __init__(self, routes, hedging=False, hedge_min_delay=0.5, window=300.0,
+                 min_samples=5, max_error_rate=0.5):
+        self.routes = {task: tuple(models) for task, models in routes.items()}
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def _model_stats(self, task, model):
+        key = (task, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ModelStats(self.window)
+        return stats
+
+    def record(self, task, model, latency, ok, error=None):
+        with self._lock:
+            self._model_stats(task, model).record(latency, ok)
+        if error is not None:
+            # /metrics için model ve görev başına hata sınıfı (429/401/other)
+            metrics.record_upstream_error(model, task, error)
+
+    def candidates(self, task):
+        """Görev için modeller - sağlıklı ve hızlı olan önce"""
+        models = self.routes.get(task, ())
+        with self._lock:
+            def sort_key(indexed):
+                index, model = indexed
+                stats = self._model_stats(task, model)
+                unhealthy = stats.error_rate(self.min_samples) > self.max_error_rate
+                p50, _ = stats.latency_percentiles(self.min_samples)
+                return (unhealthy, p50 if p50 is not None else 0.0, index)
+            return [model for _, model in sorted(enumerate(models), key=sort_key)]
+
+    def hedge_delay(self, task, model):
+        """Hedge isteği başlatmadan önce ilk parça için beklenecek süre (None = hedge yok)"""
+        if not self.hedging:
+            return None
+        with self._lock:
+            _, p95 = self._model_stats(task, model).latency_percentiles(self.min_samples)
+        if p95 is None:
+            return None
+        return max(self.hedge_min_delay, p95)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stream(self, task, open_stream, hedge=True):
+        """open_stream(model) akışını en uygun modelle oku; (model, parça) çiftleri üret
+
+        İlk parçadan önceki hatalarda sıradaki modele geçilir; ilk parçadan sonra
+        gelen hata olduğu gibi yükseltilir. hedge=False ise hedge isteği başlatılmaz.
+        """
+        pending = self.candidates(task)
+        if not pending:
+            raise ValueError(f"'{task}' görevi için model tanımlı değil")
+        events = queue.Queue()
+        live = []
+        winner = None
+        last_error = None
+        deadline = None
+
+        def launch():
+            nonlocal deadline
+            attempt = _Attempt(self, task, pending.pop(0), open_stream, events)
+            live.append(attempt)
+            delay = self.hedge_delay(task, attempt.model) if hedge and pending else None
+            deadline = None if delay is None else attempt.started_at + delay
+            return attempt
+
+        hedged = False
+        try:
+            first = launch()
+            while winner is None:
+                if not live:
+                    if not pending:
+                        raise last_error
+                    self._count("fallbacks")
+                    launch()
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    self._count("hedges")
+                    hedged = True
+                    launch()
+                    continue
+                if attempt.cancelled.is_set():
+                    continue
+                if kind == "error":
+                    live.remove(attempt)
+                    last_error = payload
+                    continue
+                winner = attempt
+                if hedged and winner is not first:
+                    self._count("hedge_wins")
+                for other in live:
+                    if other is not winner:
+                        other.cancel()
+            while kind != "done":
+                if kind == "error":
+                    raise payload
+                yield winner.model, payload
+                attempt, kind, payload = events.get()
+                while attempt is not winner:
+                    attempt, kind, payload = events.get()
+        finally:
+            for attempt in live:
+                attempt.cancel()
+
+    def call(self, task, func):
+        """func(model) çağrısını en uygun modelle yap; (model, sonuç) döndür
+
+        Hedge uygulanmaz, sadece hata durumunda sıradaki modele geçilir: func tek
+        bloklayan çağrıdır ve yarıda kesilemez; kaybeden deneme yine de sonuna kadar
+        çalışıp kotayı iki kez harcar ve limiter iznini tutardı.
+        """
+        stream = self.stream(task, lambda model: (func(model),), hedge=False)
+        try:
+            return next(stream)
+        finally:
+            stream.close()
+
+    async def astream(self, task, open_stream):
+        """stream'in async karşılığı - open_stream(model) async iterator döndüren bir coroutine
+
+        Kaybeden deneme görevi gerçekten iptal edilir (upstream bağlantısı kapanır).
+        """
+        pending = self.candidates(task)
+        if not pending:
+            raise ValueError(f"'{task}' görevi için model tanımlı değil")
+        events = asyncio.Queue()
+        live = {}
+        winner = None
+        last_error = None
+        deadline = None
+
+        async def run(model, started_at):
+            first_token = None
+            stream = None
+            try:
+                stream = await open_stream(model)
+                async for chunk in stream:
+                    if first_token is None:
+                        first_token = time.monotonic() - started_at
+                        self.record(task, model, first_token, ok=True)
+                    await events.put((model, "chunk", chunk))
+                if first_token is None:
+                    self.record(task, model, time.monotonic() - started_at, ok=True)
+                await events.put((model, "done", None))
+            except asyncio.CancelledError:
+                if first_token is None:
+                    self.record(task, model, time.monotonic() - started_at, ok=True)
+                raise
+            except Exception as e:
+                self.record(task, model, None, ok=False, error=e)
+                await events.put((model, "error", e))
+            finally:
+                # İptal edilen akış hemen kapatılır (rate limiter izni de böylece bırakılır)
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+        def launch():
+            nonlocal deadline
+            model = pending.pop(0)
+            started_at = time.monotonic()
+            live[model] = asyncio.create_task(run(model, started_at))
+            delay = self.hedge_delay(task, model) if pending else None
+            deadline = None if delay is None else started_at + delay
+
+        hedged = False
+        try:
+            launch()
+            first_model = next(iter(live))
+            while winner is None:
+                if not live:
+                    if not pending:
+                        raise last_error
+                    self._count("fallbacks")
+                    launch()
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    model, kind, payload = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    self._count("hedges")
+                    hedged = True
+                    launch()
+                    continue
+                if model not in live:
+                    continue
+                if kind == "error":
+                    del live[model]
+                    last_error = payload
+                    continue
+                winner = model
+                if hedged and model != first_model:
+                    self._count("hedge_wins")
+                for other, task_ in list(live.items()):
+                    if other != winner:
+                        task_.cancel()
+                        del live[other]
+            while kind != "done":
+                if kind == "error":
+                    raise payload
+                yield winner, payload
+                model, kind, payload = await events.get()
+                while model != winner:
+                    model, kind, payload = await events.get()
+        finally:
+            for task_ in live.values():
+                task_.cancel()
+
+    def stats(self):
+        with self._lock:
+            tasks = {}
+            for (task, model), stats in self._stats.items():
+                tasks.setdefault(task, {})[model] = stats.as_dict()
+            return {
+                "routes": {task: list(models) for task, models in self.routes.items()},
+                "hedging": self.hedging,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "fallbacks": self.fallbacks,
+                "models": tasks,
+            }
+
+
+def _routes_from_env():
+    routes = dict(DEFAULT_ROUTES)
+    for item in env_list("MODEL_ROUTES"):
+        task, _, models = item.partition('=')
+        models = tuple(model.strip() for model in models.split('|') if model.strip())
+        if task.strip() and models:
+            routes[task.strip()] = models
+    return routes
+
+
+def create_model_router():
+    """Ortam değişkenlerine göre router oluştur"""
+    return ModelRouter(
+        _routes_from_env(),
+        hedging=env_bool("MODEL_HEDGING", False),
+        hedge_min_delay=env_float("MODEL_HEDGE_MIN_DELAY", 0.5),
+        window=env_float("MODEL_ROUTER_WINDOW", 300.0),
+        min_samples=env_int("MODEL_ROUTER_MIN_SAMPLES", 5),
+        max_error_rate=env_float("MODEL_ROUTER_MAX_ERROR_RATE", 0.5),
+    )
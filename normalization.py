@@ -0,0 +1,289 @@
+"""Parse edilmiş rapor verileri için normalizasyon motoru
+
+Her yüklemede ve toplu içe aktarmada satır başına çalışan normalize_* fonksiyonları
+eskiden her değerde deseni yeniden derliyor (re.sub + IGNORECASE), tarihleri 12
+strptime formatını (bir kısmı tekrar) istisnalarla deneyerek çözüyor ve sayısal
+alan listesini her anahtar için yeniden kuruyordu. Burada:
+
+- Birim, sayı ve tarih desenleri modül yüklenirken bir kez derlenir
+- Tarih biçimi tek bir desenle sezilir (YYYY.MM.DD, DD.MM.YYYY, DD.MM.YY; ayırıcı
+  . / -), sonra yalnızca tarih geçerliliği denetlenir; sonuçlar önbelleklenir
+- Alan türü (tarih, sayı, bünye, seviye, metin) anahtar başına bir kez çözülür;
+  eşleme tabloları değiştirilemez (frozenset / MappingProxyType)
+- Toplu API: normalize_records kayıt listesini sütun sütun, normalize_frame ve
+  normalize_column pandas sütunlarını factorize ederek (her benzersiz değer bir
+  kez) vektörel olarak normalize eder
+
+Sonuçlar normalize_record ile değer değer aynıdır; toplu yol sadece daha hızlıdır.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+
+from soil_fields import NUMERIC_FIELDS
+
+# Alan türleri
+DATE = "date"
+NUMBER = "number"
+TEXTURE = "texture"
+LEVEL = "level"
+TEXT = "text"
+
+SOIL_TEXTURES = MappingProxyType({
+    'kumlu': 'kumlu',
+    'kum': 'kumlu',
+    'sandy': 'kumlu',
+    'sand': 'kumlu',
+    'tınlı': 'tınlı',
+    'tin': 'tınlı',
+    'tinli': 'tınlı',
+    'loam': 'tınlı',
+    'loamy': 'tınlı',
+    'killi': 'killi',
+    'kil': 'killi',
+    'clay': 'killi',
+    'clayey': 'killi',
+})
+
+EVALUATION_LEVELS = MappingProxyType({
+    'düşük': 'düşük',
+    'dusuk': 'düşük',
+    'low': 'düşük',
+    'orta': 'orta',
+    'medium': 'orta',
+    'yüksek': 'yüksek',
+    'yuksek': 'yüksek',
+    'high': 'yüksek',
+})
+
+# Birimler (mg/kg, dS/m, cm, mm, g/cm3 vb.) - içinde rakam olanlar sayıya karışmasın diye önce kaldırılır
+_UNITS = re.compile(r'\s*(mg/kg|mg kg-1|dS/m|cm|mm|g/cm3|kg/ha|ppm|meq/100g)\s*', re.IGNORECASE)
+_NON_NUMERIC = re.compile(r'[^\d.,]')
+# Birim ve işaret içermeyen sayı ("7.2", "350") - temizlemeden doğrudan float
+_PLAIN_NUMBER = re.compile(r'\d+(?:\.\d*)?|\.\d+')
+
+# Tarih biçimi sezici: üç sayı grubu ve iki aynı ayırıcı
+_DATE_SHAPE = re.compile(r'(\d{1,4})([./-])(\d{1,2})\2(\d{1,4})')
+# Biçim sezilemezse metin içinde tarih ara (geçerlilik denetimi yok)
+_DATE_SEARCH_YMD = re.compile(r'(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})')
+_DATE_SEARCH_DMY = (
+    re.compile(r'(\d{1,2})[.\-/](\d{1,2})[.\-/](\d{4})'),
+    re.compile(r'(\d{1,2})[.\-/](\d{1,2})[.\-/](\d{2})'),
+)
+
+
+@lru_cache(maxsize=None)
+def field_kind(key):
+    """Alan adından tür: date, number, texture, level veya text"""
+    if 'date' in key.lower():
+        return DATE
+    if key in NUMERIC_FIELDS:
+        return NUMBER
+    if key == 'soil_texture':
+        return TEXTURE
+    if key == 'evaluation_level':
+        return LEVEL
+    return TEXT
+
+
+def _sniff_date(text):
+    """Tam tarih biçimlerinden biriyse (yıl, ay, gün) döndür, değilse None"""
+    match = _DATE_SHAPE.fullmatch(text)
+    if match is None:
+        return None
+    first, _, month, last = match.groups()
+    if len(first) == 4 and len(last) <= 2:
+        year, day = int(first), int(last)
+    elif len(first) <= 2 and len(last) == 4:
+        day, year = int(first), int(last)
+    elif len(first) <= 2 and len(last) == 2:
+        # strptime %y kuralı: 69-99 -> 19xx, 00-68 -> 20xx
+        day, year = int(first), int(last)
+        year += 1900 if year >= 69 else 2000
+    else:
+        return None
+    return year, int(month), day
+
+
+@lru_cache(maxsize=8192)
+def _parse_date(text):
+    parts = _sniff_date(text)
+    if parts is not None:
+        try:
+            return datetime(*parts).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+
+    match = _DATE_SEARCH_YMD.search(text)
+    if match:
+        year, month, day = match.groups()
+        return f"{year}-{int(month):02d}-{int(day):02d}"
+    for pattern in _DATE_SEARCH_DMY:
+        match = pattern.search(text)
+        if match:
+            day, month, year = match.groups()
+            if len(year) == 2:
+                year = '20' + year
+            return f"{year}-{int(month):02d}-{int(day):02d}"
+    return None
+
+
+def normalize_date(date_str):
+    """Tarih string'ini YYYY-MM-DD formatına çevir"""
+    if not date_str or not isinstance(date_str, str):
+        return None
+    return _parse_date(date_str.strip())
+
+
+def parse_number(text):
+    """"1,250.5", "1.250,5", "6,5", "45" -> float - okunamazsa None
+
+    Hem virgül hem nokta varsa önce gelen binlik ayırıcıdır; tek ayırıcı ondalık
+    sayılır. Rapor metni (report_parser) ve tablo (extractors) yolları aynı sonucu verir.
+    """
+    if "," in text and "." in text:
+        # Önce gelen ayırıcı binlik ayırıcıdır
+        thousands = "," if text.index(",") < text.index(".") else "."
+        text = text.replace(thousands, "")
+    text = text.replace(",", ".")
+    if text.count(".") > 1:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def normalize_number(value):
+    """Sayısal değeri normalize et - birimleri kaldır, ayırıcıları parse_number ile çöz"""
+    if value is None:
+        return None
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    if not isinstance(value, str):
+        try:
+            return float(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    value = value.strip()
+    if _PLAIN_NUMBER.fullmatch(value):
+        return float(value)
+
+    # Yüzde ve birimleri kaldır, sadece rakam ve ayırıcıları bırak
+    value = value.replace('%', '').strip()
+    value = _UNITS.sub('', value)
+    value = _NON_NUMERIC.sub('', value)
+    return parse_number(value) if value else None
+
+
+def normalize_soil_texture(value):
+    """Toprak bünyesi değerini normalize et"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.lower().strip()
+    return SOIL_TEXTURES.get(value, value)
+
+
+def normalize_evaluation_level(value):
+    """Değerlendirme seviyesini normalize et"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.lower().strip()
+    return EVALUATION_LEVELS.get(value, value)
+
+
+_STRING_NORMALIZERS = {
+    DATE: normalize_date,
+    TEXTURE: normalize_soil_texture,
+    LEVEL: normalize_evaluation_level,
+}
+
+
+def normalize_value(key, value):
+    """Tek bir alan değerini türüne göre normalize et"""
+    if value is None or value == '':
+        return None
+    kind = field_kind(key)
+    if kind == NUMBER:
+        return normalize_number(value)
+    # Tarih, bünye ve seviye dönüşümleri sadece metin değerlere uygulanır
+    normalizer = _STRING_NORMALIZERS.get(kind)
+    if normalizer is not None and isinstance(value, str):
+        return normalizer(value)
+    return str(value).strip() if value else None
+
+
+def normalize_record(record):
+    """Parse edilmiş verileri normalize et - tarih formatları, sayı formatları, birimler"""
+    return {key: normalize_value(key, value) for key, value in record.items()}
+
+
+def _column_normalizer(key):
+    """Bir sütun için normalize fonksiyonu - tekrar eden metin değerler bir kez dönüştürülür"""
+    seen = {}
+
+    def normalize(value):
+        if not isinstance(value, str):
+            return normalize_value(key, value)
+        try:
+            return seen[value]
+        except KeyError:
+            result = seen[value] = normalize_value(key, value)
+            return result
+
+    return normalize
+
+
+def normalize_records(records):
+    """Kayıt listesini toplu normalize et - normalize_record ile aynı sonuç
+
+    Alan türü ve sütundaki tekrar eden değerler (tarih, il, bünye...) bir kez çözülür.
+    """
+    normalizers = {}
+    normalized = []
+    for record in records:
+        row = {}
+        for key, value in record.items():
+            normalize = normalizers.get(key)
+            if normalize is None:
+                normalize = normalizers[key] = _column_normalizer(key)
+            row[key] = normalize(value)
+        normalized.append(row)
+    return normalized
+
+
+def normalize_column(series, field):
+    """pandas sütununu field alanının türüne göre normalize et
+
+    Sütun bir kez factorize edilir; her benzersiz değer normalize_value ile bir
+    kez dönüştürülür ve sonuç kodlar üzerinden tek bir numpy take ile yayılır.
+    Sayısal alanlar float sütun (eksikler NaN), diğerleri object sütun (eksikler None) olur.
+    """
+    import numpy as np
+    import pandas as pd
+    number = field_kind(field) == NUMBER
+    if number and pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    codes, uniques = pd.factorize(series)
+    converted = [normalize_value(field, value) for value in uniques]
+    if number:
+        # Son eleman eksik değerler (kod -1) içindir
+        table = np.array([np.nan if value is None else value for value in converted] + [np.nan], dtype=float)
+    else:
+        table = np.empty(len(converted) + 1, dtype=object)
+        table[:-1] = converted
+    return pd.Series(table[codes], index=series.index, name=series.name)
+
+
+def normalize_frame(frame):
+    """DataFrame'in her sütununu (sütun adı alan adıdır) normalize et"""
+    import pandas as pd
+    return pd.DataFrame(
+        {column: normalize_column(frame[column], column) for column in frame.columns},
+        index=frame.index,
+    )
@@ -0,0 +1,121 @@
+"""LLM prompt'larını küçültme ve token kullanımını kaydetme yardımcıları
+
+- compact_inputs: null/boş girdileri atar, girintisiz (compact) JSON üretir
+- fit_text_to_budget: çıkarılan rapor metnini token bütçesine sığdırır; önce
+  toprak değeri içeren satırlar, sonra tablo satırları, sonra sayı içeren satırlar
+  korunur; tekrarlanan satırlar en son sıraya düşer, atılan bölümlerin yerine
+  kısa bir işaret konur
+- log_usage: her model çağrısının giriş/çıkış token sayısını ve süresini loglar
+
+PROMPT_TEXT_TOKEN_BUDGET  Prompt'a eklenen rapor metni için token bütçesi (varsayılan: 3000)
+PROMPT_CHARS_PER_TOKEN    Token tahmini için karakter/token oranı (varsayılan: 4)
+"""
+
+import json
+import logging
+import re
+
+from config import env_float, env_int
+from soil_fields import FIELD_SYNONYMS, label_regex
+
+logger = logging.getLogger("llm_usage")
+
+TRUNCATION_MARKER = "[... {count} satır kısaltıldı ...]"
+
+# Herhangi bir toprak alanı etiketi + kısa ara + sayı ("Fosfor (P): 45")
+_SOIL_VALUE_LINE = re.compile(
+    label_regex({name for synonyms in FIELD_SYNONYMS.values() for name in synonyms})
+    + r"[^\d\n]{0,25}?\d",
+    re.IGNORECASE,
+)
+# "a | b", sekme ile ayrılmış veya en az üç boşlukla hizalanmış sütunlar
+_TABLE_LINE = re.compile(r"\||\t|\S {2,}\S.* {2,}\S")
+_DIGIT = re.compile(r"\d")
+_WIDE_SPACE = re.compile(r" {3,}")
+
+
+def compact_inputs(inputs):
+    """Verilmemiş (null/boş) alanları at ve girintisiz JSON döndür"""
+    given = {key: value for key, value in inputs.items() if value not in (None, "", [])}
+    return json.dumps(given, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text, chars_per_token=None):
+    """Karakter sayısından yaklaşık token sayısı"""
+    if chars_per_token is None:
+        chars_per_token = env_float("PROMPT_CHARS_PER_TOKEN", 4.0)
+    return int(len(text) / chars_per_token) + 1
+
+
+def _line_priority(line):
+    if _SOIL_VALUE_LINE.search(line):
+        return 3
+    if _TABLE_LINE.search(line):
+        return 2
+    if _DIGIT.search(line):
+        return 1
+    return 0
+
+
+def fit_text_to_budget(text, max_tokens=None, chars_per_token=None):
+    """Metni token bütçesine sığdır - öncelikli satırları orijinal sırasıyla koru"""
+    if max_tokens is None:
+        max_tokens = env_int("PROMPT_TEXT_TOKEN_BUDGET", 3000)
+    if chars_per_token is None:
+        chars_per_token = env_float("PROMPT_CHARS_PER_TOKEN", 4.0)
+
+    # Boş satırları ve hizalama boşluklarını at (tablo sütunları iki boşlukla ayrılı kalır)
+    lines = [_WIDE_SPACE.sub("  ", line.rstrip()) for line in text.splitlines()]
+    lines = [line for line in lines if line.strip(" |\t")]
+    compacted = "\n".join(lines)
+    if max_tokens <= 0 or estimate_tokens(compacted, chars_per_token) <= max_tokens:
+        return compacted
+
+    # Tekrarlanan satırlar (sayfa başlıkları, aynı tablonun metin hali) en son sıraya düşer
+    seen = set()
+    priorities = []
+    for line in lines:
+        priorities.append(-1 if line in seen else _line_priority(line))
+        seen.add(line)
+
+    budget = int(max_tokens * chars_per_token)
+    order = sorted(range(len(lines)), key=lambda i: (-priorities[i], i))
+    keep = set()
+    used = 0
+    for i in order:
+        # Önceki satır tutulmuyorsa araya kısaltma işareti girecek
+        cost = len(lines[i]) + 1 + (0 if i - 1 in keep else len(TRUNCATION_MARKER) + 1)
+        if used + cost > budget:
+            continue
+        keep.add(i)
+        used += cost
+
+    output = []
+    skipped = 0
+    for i, line in enumerate(lines):
+        if i in keep:
+            if skipped:
+                output.append(TRUNCATION_MARKER.format(count=skipped))
+                skipped = 0
+            output.append(line)
+        else:
+            skipped += 1
+    if skipped:
+        output.append(TRUNCATION_MARKER.format(count=skipped))
+    return "\n".join(output)
+
+
+def log_usage(endpoint, model, usage, elapsed):
+    """Model çağrısının token sayılarını logla (usage: response.usage_metadata)"""
+    if usage is None:
+        logger.info("endpoint=%s model=%s tokens=unknown elapsed_ms=%.0f", endpoint, model, elapsed * 1000)
+        return
+    logger.info(
+        "endpoint=%s model=%s input_tokens=%s output_tokens=%s total_tokens=%s elapsed_ms=%.0f",
+        endpoint,
+        model,
+        usage.prompt_token_count,
+        usage.candidates_token_count,
+        usage.total_token_count,
+        elapsed * 1000,
+    )
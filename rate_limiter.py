@@ -0,0 +1,423 @@
+"""Gemini kotası için istemci tarafı hız sınırlayıcı ve uyarlanabilir eşzamanlılık
+
+429 hatalarını sonradan yakalamak yerine istekler kota tavanına göre sıraya alınır:
+
+- Model başına token bucket: dakikalık istek (RPM) ve token (TPM) sınırları
+- AIMD eşzamanlılık: her başarılı çağrıda sınır yavaşça artar (+1/sınır),
+  her 429'da yarıya iner
+- 429'da üstel geri çekilme + rastgele sapma (full jitter) ile tekrar deneme
+- Öncelik kuyruğu: etkileşimli öneriler (INTERACTIVE) toplu parse/OCR ve
+  batch işlerinden (BULK) önce izin alır
+
+GENAI_RATE_LIMIT_ENABLED  (varsayılan: true)
+GENAI_RATE_LIMITS         Model başına "rpm:tpm", örn. "gemma-3-27b-it=30:15000,gemini-1.5-flash=15:1000000"
+GENAI_MAX_CONCURRENCY     Model başına en fazla eşzamanlı çağrı, AIMD üst sınırı (varsayılan: 8)
+GENAI_MAX_RETRIES         429 sonrası en fazla tekrar deneme (varsayılan: 3)
+GENAI_BACKOFF_BASE        Geri çekilme taban süresi, saniye (varsayılan: 1)
+GENAI_BACKOFF_MAX         Geri çekilme üst sınırı, saniye (varsayılan: 30)
+GENAI_QUEUE_TIMEOUT       Kuyrukta en fazla bekleme, saniye (varsayılan: 60)
+GENAI_OUTPUT_TOKEN_ESTIMATE  TPM kovasından peşin düşülen çıktı token tahmini (varsayılan: 1024)
+
+Peşin düşülen tahmin, çağrı bitince usage_metadata'daki gerçek sayıyla düzeltilir.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from config import env_bool, env_float, env_int, env_list
+from prompt_builder import estimate_tokens
+
+INTERACTIVE = 0
+BULK = 10
+
+# Varsayılan (rpm, tpm) sınırları - ücretsiz katman değerleri, GENAI_RATE_LIMITS ile ezilebilir
+DEFAULT_MODEL_LIMITS = {
+    "gemini-1.5-flash": (15, 1_000_000),
+    "gemma-3-27b-it": (30, 15_000),
+}
+
+
+class RateLimitTimeout(Exception):
+    """İstek, kuyrukta izin verilen süre içinde kota alamadı"""
+
+
+def is_rate_limit_error(error):
+    """Model hatası kota/hız sınırı (429) hatası mı"""
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "quota" in message.lower()
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """attempt. tekrar için bekleme süresi (full jitter)"""
+    if base is None:
+        base = env_float("GENAI_BACKOFF_BASE", 1.0)
+    if cap is None:
+        cap = env_float("GENAI_BACKOFF_MAX", 30.0)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_tokens(prompt_text):
+    """Bir çağrı için TPM kovasından peşin düşülecek token tahmini (giriş + beklenen çıkış)"""
+    return estimate_tokens(prompt_text) + env_int("GENAI_OUTPUT_TOKEN_ESTIMATE", 1024)
+
+
+def usage_tokens(usage):
+    """usage_metadata'dan toplam token sayısı (yoksa None)"""
+    if usage is None:
+        return None
+    return usage.total_token_count
+
+
+class TokenBucket:
+    """Saniyede rate kadar dolan, en fazla capacity tutan kova"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, now):
+        """amount almak için beklenmesi gereken süre (0 = hemen alınabilir)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Tahmin ile gerçek kullanım farkını iade et (+) veya borçlandır (-)"""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Permit:
+    """Tek bir model çağrısı için alınmış izin - sonuç bildirilip bırakılır"""
+
+    def __init__(self, limiter, tokens):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.released = False
+
+    def success(self, actual_tokens=None):
+        self.limiter._release(self, throttled=False, actual_tokens=actual_tokens)
+
+    def throttled(self):
+        self.limiter._release(self, throttled=True)
+
+    def release(self):
+        self.limiter._release(self, throttled=None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelLimiter:
+    """Tek model için token bucket + AIMD eşzamanlılık + öncelik kuyruğu"""
+
+    def __init__(self, model, rpm, tpm, max_concurrency=8, min_concurrency=1):
+        self.model = model
+        self.requests = TokenBucket(rpm / 60.0, rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm / 60.0, tpm) if tpm > 0 else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._waiters = []
+        # aacquire ile bekleyenler: (event loop, future)
+        self._async_waiters = []
+        self._sequence = itertools.count()
+        self.granted = 0
+        self.throttled_count = 0
+        self.wait_seconds = 0.0
+
+    def _bucket_wait(self, tokens, now):
+        waits = [0.0]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens, now))
+        return max(waits)
+
+    def _try_grant(self, ticket, tokens, started_at, now):
+        """Sıra bu bilette ve kota uygunsa izni ver - (Permit, None) veya (None, bekleme)
+
+        Bekleme None ise eşzamanlılık veya sıra nedeniyle bir bırakma beklenir.
+        """
+        if self._waiters[0] != ticket or self.in_flight >= int(self.concurrency):
+            return None, None
+        wait = self._bucket_wait(tokens, now)
+        if wait > 0:
+            return None, wait
+        heapq.heappop(self._waiters)
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self.in_flight += 1
+        self.granted += 1
+        self.wait_seconds += now - started_at
+        # Sıradaki bekleyen de kontrol etsin
+        self._notify()
+        return Permit(self, tokens), None
+
+    def _deadline_wait(self, wait, deadline, now):
+        if deadline is None:
+            return wait
+        remaining = deadline - now
+        if remaining <= 0:
+            raise RateLimitTimeout(f"{self.model} için kota kuyruğunda bekleme süresi aşıldı")
+        return remaining if wait is None else min(wait, remaining)
+
+    def _notify(self):
+        """Thread ve async bekleyenleri uyandır (self._cond tutulurken çağrılır)"""
+        self._cond.notify_all()
+        for loop, future in self._async_waiters:
+            loop.call_soon_threadsafe(_wake, future)
+        self._async_waiters.clear()
+
+    def _abandon(self, ticket):
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._notify()
+
+    def acquire(self, priority=INTERACTIVE, tokens=0, timeout=None):
+        """Sıra, eşzamanlılık ve kota uygun olunca Permit döndür; timeout aşılırsa RateLimitTimeout"""
+        ticket = (priority, next(self._sequence))
+        started_at = time.monotonic()
+        deadline = None if timeout is None else started_at + timeout
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    permit, wait = self._try_grant(ticket, tokens, started_at, now)
+                    if permit is not None:
+                        return permit
+                    self._cond.wait(self._deadline_wait(wait, deadline, now))
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def aacquire(self, priority=INTERACTIVE, tokens=0, timeout=None):
+        """acquire'ın async karşılığı - bekleme için iş parçacığı tutmaz ve iptal edilebilir
+
+        İzin await olmadan, kilit altında verilir; istemci koptuğunda (CancelledError)
+        ya bilet kuyruktan çıkarılır ya da izin zaten çağırana dönmüştür, sızıntı olmaz.
+        """
+        loop = asyncio.get_running_loop()
+        ticket = (priority, next(self._sequence))
+        started_at = time.monotonic()
+        deadline = None if timeout is None else started_at + timeout
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                future = loop.create_future()
+                with self._cond:
+                    now = time.monotonic()
+                    permit, wait = self._try_grant(ticket, tokens, started_at, now)
+                    if permit is not None:
+                        return permit
+                    wait = self._deadline_wait(wait, deadline, now)
+                    self._async_waiters.append((loop, future))
+                try:
+                    await asyncio.wait_for(future, wait)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if (loop, future) in self._async_waiters:
+                            self._async_waiters.remove((loop, future))
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+
+    def _release(self, permit, throttled, actual_tokens=None):
+        with self._cond:
+            if permit.released:
+                return
+            permit.released = True
+            self.in_flight -= 1
+            if throttled:
+                # Multiplicative decrease
+                self.throttled_count += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            elif throttled is False:
+                # Additive increase
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                if actual_tokens is not None and self.tokens is not None:
+                    self.tokens.adjust(permit.tokens - actual_tokens)
+            self._notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.concurrency, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "granted": self.granted,
+                "throttled": self.throttled_count,
+                "avg_wait_seconds": round(self.wait_seconds / self.granted, 3) if self.granted else 0.0,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _model_limits():
+    limits = dict(DEFAULT_MODEL_LIMITS)
+    for item in env_list("GENAI_RATE_LIMITS"):
+        model, _, value = item.partition('=')
+        rpm, _, tpm = value.partition(':')
+        try:
+            limits[model.strip()] = (int(rpm), int(tpm or 0))
+        except ValueError:
+            continue
+    return limits
+
+
+def limiter_for(model):
+    """Model için süreç genelinde paylaşılan sınırlayıcı (devre dışıysa None)"""
+    if not env_bool("GENAI_RATE_LIMIT_ENABLED", True):
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            rpm, tpm = _model_limits().get(model, (0, 0))
+            limiter = _limiters[model] = ModelLimiter(
+                model, rpm, tpm, max_concurrency=env_int("GENAI_MAX_CONCURRENCY", 8)
+            )
+        return limiter
+
+
+def limiter_stats():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.stats() for model, limiter in limiters.items()}
+
+
+def _queue_timeout():
+    return env_float("GENAI_QUEUE_TIMEOUT", 60.0)
+
+
+def rate_limited_call(model, func, priority=INTERACTIVE, tokens=0):
+    """func() çağrısını kota izniyle yap; 429'da geri çekilip tekrar dene
+
+    func, usage_metadata taşıyan bir yanıt döndürmelidir (generate_content).
+    """
+    limiter = limiter_for(model)
+    if limiter is None:
+        return func()
+    max_retries = env_int("GENAI_MAX_RETRIES", 3)
+    attempt = 0
+    while True:
+        permit = limiter.acquire(priority, tokens, timeout=_queue_timeout())
+        try:
+            response = func()
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            permit.throttled()
+            if attempt >= max_retries:
+                raise
+        else:
+            permit.success(usage_tokens(getattr(response, "usage_metadata", None)))
+            return response
+        finally:
+            permit.release()
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def rate_limited_stream(model, open_stream, priority=INTERACTIVE, tokens=0):
+    """open_stream() akışını kota izniyle oku; ilk parçadan önce gelen 429'da tekrar dene
+
+    İzin akış bitene kadar tutulur (eşzamanlılık sınırı akış süresini kapsar).
+    """
+    limiter = limiter_for(model)
+    if limiter is None:
+        yield from open_stream()
+        return
+    max_retries = env_int("GENAI_MAX_RETRIES", 3)
+    attempt = 0
+    while True:
+        permit = limiter.acquire(priority, tokens, timeout=_queue_timeout())
+        started = False
+        usage = None
+        try:
+            for chunk in open_stream():
+                started = True
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            permit.throttled()
+            if started or attempt >= max_retries:
+                raise
+        else:
+            permit.success(usage_tokens(usage))
+            return
+        finally:
+            # Hata veya istemcinin akışı yarıda bırakması (GeneratorExit) durumunda da izin bırakılır
+            permit.release()
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+async def arate_limited_stream(model, open_stream, priority=INTERACTIVE, tokens=0):
+    """rate_limited_stream'in async karşılığı - open_stream async iterator döndüren bir coroutine"""
+    limiter = limiter_for(model)
+    if limiter is None:
+        async for chunk in await open_stream():
+            yield chunk
+        return
+    max_retries = env_int("GENAI_MAX_RETRIES", 3)
+    attempt = 0
+    while True:
+        # Kuyruk beklemesi event loop'u ve iş parçacığı tutmaz; istemci koparsa iptal edilir
+        permit = await limiter.aacquire(priority, tokens, _queue_timeout())
+        started = False
+        usage = None
+        try:
+            async for chunk in await open_stream():
+                started = True
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            permit.throttled()
+            if started or attempt >= max_retries:
+                raise
+        else:
+            permit.success(usage_tokens(usage))
+            return
+        finally:
+            permit.release()
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
@@ -0,0 +1,180 @@
+"""Toprak analiz raporlarından deterministik alan çıkarma (LLM öncesi hızlı yol)
+
+Türk laboratuvar raporlarının çoğu birkaç sabit düzen kullanır ("pH | 7.2",
+"Fosfor (P): 45 mg/kg", "Analiz Tarihi: 20.03.2024"). soil_fields'taki alternatif
+isimlerden her alan için bir kez derlenen desenlerle bu değerler milisaniyeler
+içinde okunur; LLM yalnızca bulunamayan alanlar için, sadece o alanları listeleyen
+kısa bir prompt ile çağrılır.
+
+Dönen değerler ham haldedir (sayılar float, tarihler YYYY-MM-DD); son
+normalizasyon app.normalize_parsed_data ile yapılır.
+"""
+
+import re
+
+from normalization import parse_number
+from soil_fields import (
+    FIELD_SYNONYMS,
+    NUMERIC_FIELDS,
+    WORD_CHARS,
+    fields_with_values,
+    label_regex,
+)
+
+# Etiketten sonra gelebilen parantezli açıklama, örn. "Fosfor (P2O5)" veya "EC [dS/m]"
+_QUALIFIER = r"(?:\s*[\(\[][^\)\]\n]{0,20}[\)\]])*"
+_SEPARATOR = r"\s*(?:[:=|\t]\s*)+"
+_NUMBER = r"(?P<value>\d+(?:[.,]\d+)*)"
+
+# Gerçekçi değer aralıkları (parse prompt'undaki aralıklar); dışındaki değerler LLM'e bırakılır
+VALUE_RANGES = {
+    "pH": (0, 14), "organic_matter": (0, 100), "ec": (0, 50), "lime_caCO3": (0, 100),
+    "sample_depth": (0, 500), "phosphorus_P": (0, 5000), "potassium_K": (0, 5000),
+    "nitrogen_N": (0, 5000), "calcium_Ca": (0, 10000), "magnesium_Mg": (0, 10000),
+    "sulfur_S": (0, 10000), "iron_Fe": (0, 10000), "zinc_Zn": (0, 10000),
+    "manganese_Mn": (0, 10000), "copper_Cu": (0, 10000), "boron_B": (0, 1000),
+    "cec": (0, 500), "total_salt": (0, 100), "sar": (0, 200), "esp": (0, 100),
+    "organic_carbon_C": (0, 100), "soil_moisture": (0, 100), "bulk_density": (0, 5),
+}
+
+DATE_FIELDS = ("sample_date", "analysis_date")
+WORD_FIELDS = ("soil_texture", "evaluation_level")
+
+# Kısa prompt'ta alan adının yanına eklenen biçim notları
+FIELD_HINTS = {
+    "sample_date": "YYYY-MM-DD formatında",
+    "analysis_date": "YYYY-MM-DD formatında",
+    "sample_depth": "cm, sadece sayı",
+    "soil_texture": '"kumlu", "tınlı" veya "killi"',
+    "evaluation_level": '"düşük", "orta" veya "yüksek"',
+    "fertilization_recommendation": 'örn. "20-10-10"',
+}
+
+
+def _label(field, loose):
+    """Alan etiketi deseni - tek harfli isimler ("P", "K") sadece ayırıcı ile kabul edilir"""
+    synonyms = FIELD_SYNONYMS[field]
+    long_names = [name for name in synonyms if len(name) > 1]
+    short_names = [name for name in synonyms if len(name) == 1]
+    gap = r"[^\d\n]{0,25}?" if loose else _SEPARATOR
+    branches = [label_regex(long_names) + _QUALIFIER + gap]
+    if short_names:
+        branches.append(label_regex(short_names) + _QUALIFIER + _SEPARATOR)
+    return "(?:" + "|".join(f"(?:{branch})" for branch in branches) + ")"
+
+
+def _compile_patterns():
+    patterns = {}
+    for field in FIELD_SYNONYMS:
+        if field in NUMERIC_FIELDS:
+            value = _NUMBER
+            if field == "sample_depth":
+                # "0-30 cm" aralığında alt derinlik alınır
+                value = r"(?:\d+\s*-\s*)?" + _NUMBER
+            pattern = _label(field, loose=True) + value
+        elif field in DATE_FIELDS:
+            pattern = _label(field, loose=True) + r"(?P<value>\d{1,4}[./-]\d{1,2}[./-]\d{2,4})"
+        elif field == "sample_code":
+            pattern = _label(field, loose=False) + r"(?P<value>[0-9A-Za-z][\w\-/.]*)"
+        elif field == "fertilization_recommendation":
+            pattern = _label(field, loose=True) + r"(?P<value>\d+\s*-\s*\d+\s*-\s*\d+)"
+        elif field in WORD_FIELDS:
+            pattern = _label(field, loose=False) + rf"(?P<value>[{WORD_CHARS}]+)(?![{WORD_CHARS}\-/])"
+        else:
+            pattern = _label(field, loose=False) + r"(?P<value>[^|\t\n:]{1,60}?)(?=\s{2,}|[|\t\n]|$|\s+\S+\s*:)"
+        patterns[field] = re.compile(pattern, re.IGNORECASE)
+    return patterns
+
+
+# Alan adı -> derlenmiş desen (modül yüklenirken bir kez)
+FIELD_PATTERNS = _compile_patterns()
+
+_EXPLICIT_SEPARATOR = re.compile(r"[:=|\t]")
+
+
+def parse_date(text):
+    """DD.MM.YYYY, YYYY-MM-DD, DD/MM/YY vb. -> YYYY-MM-DD, geçersizse None"""
+    parts = re.split(r"[./-]", text)
+    if len(parts[0]) == 4:
+        year, month, day = parts
+    else:
+        day, month, year = parts
+        if len(year) == 2:
+            year = "20" + year
+    if len(year) != 4 or not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+        return None
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def _convert(field, raw):
+    raw = raw.strip()
+    if field in NUMERIC_FIELDS:
+        value = parse_number(raw)
+        low, high = VALUE_RANGES.get(field, (0, float("inf")))
+        return value if value is not None and low <= value <= high else None
+    if field in DATE_FIELDS:
+        return parse_date(raw)
+    if field == "fertilization_recommendation":
+        return re.sub(r"\s+", "", raw)
+    return raw or None
+
+
+def _best_match(pattern, text):
+    """Açık ayırıcılı ("pH: 7.2", "pH | 7.2") eşleşmeyi, yoksa ilk eşleşmeyi seç"""
+    first = None
+    for match in pattern.finditer(text):
+        between = text[match.start():match.start("value")]
+        if _EXPLICIT_SEPARATOR.search(between):
+            return match
+        if first is None:
+            first = match
+    return first
+
+
+def extract_fields(text):
+    """Metinden desenlerle okunabilen alanları {alan: değer} olarak döndür"""
+    found = {}
+    for field, pattern in FIELD_PATTERNS.items():
+        match = _best_match(pattern, text)
+        if match is None:
+            continue
+        value = _convert(field, match.group("value"))
+        if value is not None:
+            found[field] = value
+    return found
+
+
+_TEXT_LABEL_PATTERNS = {
+    field: re.compile(_label(field, loose=False) + r"\S", re.IGNORECASE)
+    for field in FIELD_SYNONYMS if field not in NUMERIC_FIELDS
+}
+
+
+def missing_fields(text, found, required):
+    """LLM'e sorulması gereken alanlar: zorunlu olup bulunamayanlar ve metinde
+    etiketi görülen ama değeri okunamayanlar"""
+    present = fields_with_values(text, tuple(NUMERIC_FIELDS))
+    present |= {field for field, pattern in _TEXT_LABEL_PATTERNS.items() if pattern.search(text)}
+    wanted = present | set(required)
+    return [field for field in FIELD_SYNONYMS if field in wanted and field not in found]
+
+
+def build_fields_prompt(text, fields):
+    """Sadece verilen alanları isteyen kısa parse prompt'u"""
+    lines = []
+    for field in fields:
+        names = ", ".join(f'"{name}"' for name in FIELD_SYNONYMS[field])
+        hint = FIELD_HINTS.get(field)
+        lines.append(f"- {field}: {names}" + (f" ({hint})" if hint else ""))
+    field_list = "\n".join(lines)
+    return f"""Toprak analiz raporu metninden SADECE aşağıdaki alanları çıkar ve JSON döndür.
+Sayıları birimsiz sayı olarak ver (virgülü noktaya çevir), bulunamayan alanlar için null kullan.
+
+ALANLAR (alan adı: rapordaki olası isimler):
+{field_list}
+
+METİN:
+{text}
+
+JSON ÇIKTISI (sadece JSON):
+"""
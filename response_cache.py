@@ -0,0 +1,299 @@
+"""/api/recommend yanıtları için içerik adresli (content-addressed) önbellek
+
+Aynı form tekrar gönderildiğinde model yeniden çağrılmaz; saklanan metin aynı
+streaming Response üzerinden parça parça tekrar oynatılır.
+
+- Anahtar: inputs sözlüğünün kanonik halinin SHA-256 özeti
+  (anahtarlar sıralı, sayılar normalize, null/boş değerler atılmış)
+- TTL ve LRU ile tahliye
+- Değiştirilebilir backend: bellek içi (memory) veya disk üzerinde (sqlite)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import env_bool, env_int, env_str
+
+
+def _normalize_scalar(value):
+    """Tek bir değeri kanonik hale getir - sayısal string'ler sayıya çevrilir
+
+    Virgül içeren string'ler olduğu gibi bırakılır: "1,250" binlik ayırıcılı 1250
+    de olabilir ondalık 1.25 de; anahtarda "1.25" ile çakışmamalı.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return None
+        if ',' in value:
+            return value
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    if isinstance(value, (int, float)):
+        if value != value:  # NaN
+            return None
+        value = round(float(value), 6)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def canonicalize_inputs(inputs):
+    """Girdi sözlüğünü kanonik hale getir - null ve boş değerler atılır"""
+    if isinstance(inputs, dict):
+        canonical = {}
+        for key, value in inputs.items():
+            value = canonicalize_inputs(value)
+            if value is None or value == [] or value == {}:
+                continue
+            canonical[str(key)] = value
+        return canonical
+    if isinstance(inputs, (list, tuple)):
+        return [canonicalize_inputs(item) for item in inputs]
+    return _normalize_scalar(inputs)
+
+
+def inputs_cache_key(inputs):
+    """Kanonik girdilerin SHA-256 özetini döndür"""
+    canonical = json.dumps(
+        canonicalize_inputs(inputs or {}),
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def is_complete_json(text):
+    """Model çıktısı eksiksiz bir JSON nesnesi mi? (markdown code block'ları yok sayılır)"""
+    cleaned = (text or '').strip().replace('```json', '').replace('```', '').strip()
+    start = cleaned.find('{')
+    end = cleaned.rfind('}') + 1
+    if start == -1 or end <= start:
+        return False
+    try:
+        parsed = json.loads(cleaned[start:end])
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and 'error' not in parsed
+
+
+class MemoryCacheBackend:
+    """Bellek içi LRU backend - süreç yeniden başlatılınca sıfırlanır"""
+
+    name = "memory"
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Disk üzerinde SQLite backend - worker'lar ve yeniden başlatmalar arasında paylaşılır"""
+
+    name = "sqlite"
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            # Süresi dolanları ve LRU sınırını aşanları sil
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            )
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Öneri yanıtlarını saklayan ve isabet oranını takip eden önbellek"""
+
+    def __init__(self, backend, ttl=3600, replay_chunk_size=64):
+        self.backend = backend
+        self.ttl = ttl
+        self.replay_chunk_size = replay_chunk_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.saved_latency_seconds = 0.0
+
+    def key_for(self, inputs):
+        return inputs_cache_key(inputs)
+
+    def get(self, key):
+        """Kayıt varsa {"text", "latency"} döndür, yoksa None"""
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_latency_seconds += float(entry.get("latency") or 0.0)
+        return entry
+
+    def set(self, key, text, latency):
+        """Tamamlanmış ve geçerli bir model yanıtını sakla"""
+        if not is_complete_json(text):
+            return False
+        try:
+            self.backend.set(key, {"text": text, "latency": latency}, ttl=self.ttl)
+        except Exception:
+            return False
+        with self._lock:
+            self.stores += 1
+        return True
+
+    def replay(self, entry):
+        """Saklanan metni streaming yanıtta olduğu gibi parça parça döndür"""
+        text = entry["text"]
+        size = max(1, self.replay_chunk_size)
+        for start in range(0, len(text), size):
+            yield text[start:start + size]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "backend": self.backend.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_latency_seconds": round(self.saved_latency_seconds, 3),
+                "ttl_seconds": self.ttl,
+            }
+        try:
+            stats["entries"] = len(self.backend)
+        except Exception:
+            stats["entries"] = None
+        return stats
+
+
+def create_response_cache():
+    """Ortam değişkenlerine göre önbellek oluştur - devre dışıysa None döner
+
+    RECOMMEND_CACHE_ENABLED     (varsayılan: true)
+    RECOMMEND_CACHE_BACKEND     memory | sqlite (varsayılan: memory)
+    RECOMMEND_CACHE_TTL         saniye (varsayılan: 3600)
+    RECOMMEND_CACHE_MAX_ENTRIES LRU sınırı (varsayılan: 256)
+    RECOMMEND_CACHE_PATH        sqlite dosyası (varsayılan: .cache/recommend_cache.sqlite3)
+    """
+    if not env_bool("RECOMMEND_CACHE_ENABLED", True):
+        return None
+
+    backend_name = env_str("RECOMMEND_CACHE_BACKEND", "memory").lower()
+    max_entries = env_int("RECOMMEND_CACHE_MAX_ENTRIES", 256)
+    if backend_name == "sqlite":
+        path = env_str("RECOMMEND_CACHE_PATH", os.path.join(".cache", "recommend_cache.sqlite3"))
+        backend = SQLiteCacheBackend(path, max_entries=max_entries)
+    else:
+        backend = MemoryCacheBackend(max_entries=max_entries)
+
+    return ResponseCache(backend, ttl=env_int("RECOMMEND_CACHE_TTL", 3600))
@@ -0,0 +1,411 @@
+"""Kural tabanlı yerel ürün öneri motoru
+
+Ders kitabı vakaları (örn. tınlı toprak, pH 6.5-7.5, orta sulama, önceki ürün buğday,
+Konya) için uzak modele gitmeden, ürün uygunluk tablosu üzerinde puanlama yapar.
+Çıktı generate_recommendations ile aynı JSON şemasındadır (primary_crop,
+alternatives, confidence, reasons, risks, quick_actions, missing_inputs, assumptions).
+
+Güven skoru eşik değerin altındaysa veya 'goal' metni standart hedeflerden biri
+değilse None döner ve istek LLM'e gider.
+"""
+
+import re
+
+from soil_fields import fold_label
+
+# Ürün uygunluk tablosu
+# ph / ph_opt: tolere edilen ve ideal pH aralığı
+# textures: bünyeye göre uygunluk (0-1)
+# ec_max: verim kaybı başlamadan tolere edilen EC (dS/m)
+# temp: ideal ortalama sıcaklık aralığı (°C), rain: yetişme dönemi yağışı (mm)
+# water: su ihtiyacı 1=düşük, 2=orta, 3=yüksek
+# risk: 1=dayanıklı, 2=orta, 3=hassas; value: 1=düşük, 2=orta, 3=yüksek getiri
+CROP_TABLE = (
+    {"crop": "buğday", "family": "tahıl", "ph": (5.5, 8.2), "ph_opt": (6.0, 7.5),
+     "textures": {"tınlı": 1.0, "killi": 0.9, "kumlu": 0.6}, "ec_max": 6.0,
+     "temp": (10, 25), "rain": (300, 650), "water": 1, "seasons": ("sonbahar", "ilkbahar"),
+     "risk": 1, "value": 1},
+    {"crop": "arpa", "family": "tahıl", "ph": (6.0, 8.5), "ph_opt": (6.5, 8.0),
+     "textures": {"tınlı": 1.0, "killi": 0.8, "kumlu": 0.8}, "ec_max": 8.0,
+     "temp": (8, 24), "rain": (250, 600), "water": 1, "seasons": ("sonbahar", "ilkbahar"),
+     "risk": 1, "value": 1},
+    {"crop": "mısır", "family": "tahıl", "ph": (5.5, 7.8), "ph_opt": (6.0, 7.0),
+     "textures": {"tınlı": 1.0, "killi": 0.7, "kumlu": 0.6}, "ec_max": 1.7,
+     "temp": (18, 32), "rain": (500, 800), "water": 3, "seasons": ("ilkbahar", "yaz"),
+     "risk": 2, "value": 2},
+    {"crop": "ayçiçeği", "family": "papatyagiller", "ph": (6.0, 8.0), "ph_opt": (6.5, 7.5),
+     "textures": {"tınlı": 1.0, "killi": 0.8, "kumlu": 0.7}, "ec_max": 4.8,
+     "temp": (18, 30), "rain": (350, 650), "water": 2, "seasons": ("ilkbahar",),
+     "risk": 1, "value": 2},
+    {"crop": "aspir", "family": "papatyagiller", "ph": (6.0, 8.5), "ph_opt": (7.0, 8.0),
+     "textures": {"tınlı": 1.0, "killi": 0.8, "kumlu": 0.8}, "ec_max": 7.0,
+     "temp": (15, 30), "rain": (250, 500), "water": 1, "seasons": ("ilkbahar",),
+     "risk": 1, "value": 2},
+    {"crop": "şeker pancarı", "family": "pancar", "ph": (6.5, 8.2), "ph_opt": (7.0, 7.8),
+     "textures": {"tınlı": 1.0, "killi": 0.8, "kumlu": 0.5}, "ec_max": 7.0,
+     "temp": (15, 25), "rain": (450, 750), "water": 3, "seasons": ("ilkbahar",),
+     "risk": 2, "value": 3},
+    {"crop": "nohut", "family": "baklagil", "ph": (6.0, 8.5), "ph_opt": (6.5, 8.0),
+     "textures": {"tınlı": 1.0, "kumlu": 0.8, "killi": 0.6}, "ec_max": 1.0,
+     "temp": (15, 28), "rain": (250, 500), "water": 1, "seasons": ("ilkbahar", "sonbahar"),
+     "risk": 1, "value": 2},
+    {"crop": "mercimek", "family": "baklagil", "ph": (6.0, 8.0), "ph_opt": (6.5, 7.5),
+     "textures": {"tınlı": 1.0, "kumlu": 0.8, "killi": 0.6}, "ec_max": 1.5,
+     "temp": (10, 25), "rain": (250, 450), "water": 1, "seasons": ("sonbahar", "ilkbahar"),
+     "risk": 1, "value": 2},
+    {"crop": "fasulye", "family": "baklagil", "ph": (6.0, 7.5), "ph_opt": (6.0, 7.0),
+     "textures": {"tınlı": 1.0, "kumlu": 0.8, "killi": 0.5}, "ec_max": 1.0,
+     "temp": (18, 28), "rain": (300, 500), "water": 2, "seasons": ("ilkbahar", "yaz"),
+     "risk": 2, "value": 2},
+    {"crop": "yonca", "family": "baklagil", "ph": (6.5, 8.2), "ph_opt": (6.8, 7.5),
+     "textures": {"tınlı": 1.0, "killi": 0.7, "kumlu": 0.7}, "ec_max": 2.0,
+     "temp": (15, 30), "rain": (450, 800), "water": 3, "seasons": ("ilkbahar", "sonbahar"),
+     "risk": 1, "value": 2},
+    {"crop": "patates", "family": "patlıcangiller", "ph": (5.0, 7.0), "ph_opt": (5.5, 6.5),
+     "textures": {"kumlu": 1.0, "tınlı": 0.9, "killi": 0.4}, "ec_max": 1.7,
+     "temp": (15, 22), "rain": (400, 700), "water": 3, "seasons": ("ilkbahar",),
+     "risk": 2, "value": 3},
+    {"crop": "domates", "family": "patlıcangiller", "ph": (5.5, 7.5), "ph_opt": (6.0, 7.0),
+     "textures": {"tınlı": 1.0, "kumlu": 0.8, "killi": 0.6}, "ec_max": 2.5,
+     "temp": (18, 30), "rain": (400, 700), "water": 3, "seasons": ("ilkbahar",),
+     "risk": 3, "value": 3},
+    {"crop": "pamuk", "family": "ebegümecigiller", "ph": (5.8, 8.0), "ph_opt": (6.5, 7.5),
+     "textures": {"tınlı": 1.0, "killi": 0.9, "kumlu": 0.5}, "ec_max": 7.7,
+     "temp": (22, 35), "rain": (500, 900), "water": 3, "seasons": ("ilkbahar",),
+     "risk": 2, "value": 3},
+    {"crop": "kanola", "family": "turpgiller", "ph": (5.5, 8.0), "ph_opt": (6.0, 7.5),
+     "textures": {"tınlı": 1.0, "killi": 0.8, "kumlu": 0.6}, "ec_max": 9.7,
+     "temp": (10, 25), "rain": (400, 650), "water": 2, "seasons": ("sonbahar",),
+     "risk": 2, "value": 2},
+)
+
+CROPS = {fold_label(row["crop"]): row for row in CROP_TABLE}
+
+# Münavebe kuralları: önceki ürün -> {ürün: puan}; listede olmayanlar için aile kuralları geçerli
+ROTATION_RULES = {
+    "buğday": {"nohut": 1.0, "mercimek": 1.0, "ayçiçeği": 0.95, "aspir": 0.95, "şeker pancarı": 0.95,
+               "yonca": 0.9, "arpa": 0.45},
+    "arpa": {"nohut": 1.0, "mercimek": 1.0, "ayçiçeği": 0.95, "aspir": 0.95, "buğday": 0.45},
+    "mısır": {"buğday": 0.95, "fasulye": 1.0, "nohut": 0.95, "arpa": 0.9},
+    "şeker pancarı": {"buğday": 1.0, "arpa": 0.95, "ayçiçeği": 0.6},
+    "ayçiçeği": {"buğday": 1.0, "arpa": 0.95, "aspir": 0.3, "şeker pancarı": 0.6},
+    "nohut": {"buğday": 1.0, "arpa": 1.0, "mısır": 0.95},
+    "mercimek": {"buğday": 1.0, "arpa": 1.0},
+    "yonca": {"buğday": 1.0, "mısır": 1.0, "patates": 0.95},
+    "patates": {"buğday": 0.95, "fasulye": 0.9, "domates": 0.2},
+    "domates": {"buğday": 0.9, "fasulye": 0.9, "patates": 0.2},
+    "pamuk": {"buğday": 1.0, "mısır": 0.9},
+}
+ROTATION_RULES = {fold_label(prev): {fold_label(k): v for k, v in rules.items()}
+                  for prev, rules in ROTATION_RULES.items()}
+
+# Bölge -> bölgede yaygın ve uygun ürünler
+REGION_CROPS = {
+    "İç Anadolu": {"buğday", "arpa", "şeker pancarı", "nohut", "mercimek", "ayçiçeği", "aspir",
+                   "yonca", "patates", "fasulye"},
+    "Akdeniz": {"pamuk", "mısır", "buğday", "domates", "patates", "ayçiçeği", "arpa"},
+    "Ege": {"pamuk", "mısır", "domates", "buğday", "ayçiçeği", "patates", "arpa"},
+    "Marmara": {"ayçiçeği", "buğday", "kanola", "mısır", "domates", "arpa"},
+    "Karadeniz": {"mısır", "fasulye", "buğday", "şeker pancarı", "patates"},
+    "Doğu Anadolu": {"arpa", "buğday", "yonca", "patates", "şeker pancarı", "fasulye"},
+    "Güneydoğu Anadolu": {"pamuk", "mercimek", "buğday", "arpa", "mısır", "nohut"},
+}
+
+PROVINCE_REGIONS = {fold_label(province): region for region, provinces in {
+    "İç Anadolu": ("Konya", "Ankara", "Eskişehir", "Kayseri", "Sivas", "Yozgat", "Aksaray", "Niğde",
+                   "Nevşehir", "Karaman", "Kırşehir", "Kırıkkale", "Çankırı"),
+    "Akdeniz": ("Adana", "Mersin", "Antalya", "Hatay", "Osmaniye", "Kahramanmaraş", "Isparta", "Burdur"),
+    "Ege": ("İzmir", "Aydın", "Manisa", "Denizli", "Muğla", "Uşak", "Kütahya", "Afyonkarahisar"),
+    "Marmara": ("Edirne", "Kırklareli", "Tekirdağ", "Bursa", "Balıkesir", "Çanakkale", "Sakarya",
+                "Kocaeli", "Bilecik", "İstanbul", "Yalova"),
+    "Karadeniz": ("Samsun", "Ordu", "Trabzon", "Tokat", "Amasya", "Çorum", "Kastamonu", "Düzce",
+                  "Bolu", "Zonguldak", "Sinop", "Giresun", "Rize", "Artvin", "Bartın", "Karabük"),
+    "Doğu Anadolu": ("Erzurum", "Kars", "Ağrı", "Van", "Malatya", "Elazığ", "Erzincan", "Muş",
+                     "Bingöl", "Bitlis", "Ardahan", "Iğdır", "Tunceli", "Hakkari"),
+    "Güneydoğu Anadolu": ("Şanlıurfa", "Diyarbakır", "Mardin", "Gaziantep", "Adıyaman", "Batman",
+                          "Siirt", "Kilis", "Şırnak"),
+}.items() for province in provinces}
+
+IRRIGATION_LEVELS = {"yok": 0, "az": 1, "orta": 2, "iyi": 3}
+
+MONTH_SEASONS = {12: "kış", 1: "kış", 2: "kış", 3: "ilkbahar", 4: "ilkbahar", 5: "ilkbahar",
+                 6: "yaz", 7: "yaz", 8: "yaz", 9: "sonbahar", 10: "sonbahar", 11: "sonbahar"}
+
+# Standart hedef ifadeleri (sadeleştirilmiş) -> hedef türü
+GOAL_PHRASES = {
+    "dusuksu": "water", "azsu": "water", "sutasarrufu": "water", "suverimliligi": "water",
+    "dusukrisk": "risk", "azrisk": "risk", "guvenli": "risk", "riskdusuk": "risk",
+    "yuksekverim": "value", "verim": "value", "yuksekgelir": "value", "gelir": "value",
+    "kar": "value", "karlilik": "value", "yuksekkar": "value",
+}
+_GOAL_SEPARATORS = re.compile(r"\s*(?:\+|,|;|/|&|\bve\b)\s*")
+
+# Güven hesabında "temel" sayılan kriterlerin ağırlıkları
+CORE_WEIGHTS = {"ph": 3.0, "texture": 2.0, "irrigation": 2.0, "season": 1.5, "rotation": 1.5}
+EXTRA_WEIGHTS = {"ec": 1.0, "temp": 1.5, "rain": 1.0, "region": 1.5, "goal": 1.5}
+
+KEY_INPUTS = ("soil_texture", "pH", "ec", "organic_matter", "avg_temp_c", "rainfall_mm",
+              "irrigation", "previous_crop", "season")
+
+
+def _number(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _capitalize(text):
+    # str.capitalize Türkçe "i" harfini "I" yapar
+    first = "İ" if text[:1] == "i" else text[:1].upper()
+    return first + text[1:]
+
+
+def parse_goal(goal):
+    """Hedef metnini standart hedef türlerine ayır - standart değilse None"""
+    goal = _text(goal)
+    if goal is None:
+        return set()
+    kinds = set()
+    for part in _GOAL_SEPARATORS.split(goal.lower()):
+        folded = fold_label(part.replace("â", "a"))
+        if not folded:
+            continue
+        kind = GOAL_PHRASES.get(folded)
+        if kind is None:
+            return None
+        kinds.add(kind)
+    return kinds
+
+
+def _range_score(value, low, high, tolerance):
+    """Aralık içinde 1, dışında mesafeye göre doğrusal azalan puan"""
+    if low <= value <= high:
+        return 1.0
+    distance = low - value if value < low else value - high
+    return max(0.0, 1.0 - distance / tolerance)
+
+
+def _ph_score(ph, row):
+    opt_low, opt_high = row["ph_opt"]
+    low, high = row["ph"]
+    if opt_low <= ph <= opt_high:
+        return 1.0
+    if low <= ph <= high:
+        return 0.75
+    return 0.75 * _range_score(ph, low, high, 1.0)
+
+
+def _water_score(irrigation, rainfall, row):
+    """Su ihtiyacı - sulama seviyesi ve (varsa) yağış birlikte değerlendirilir"""
+    supply = irrigation
+    if rainfall is not None and rainfall >= row["rain"][0]:
+        supply = max(supply, row["water"])
+    gap = row["water"] - supply
+    return {0: 1.0, 1: 0.5, 2: 0.15}.get(max(0, gap), 0.0)
+
+
+def _rotation_score(previous, row):
+    previous_key = fold_label(previous)
+    crop_key = fold_label(row["crop"])
+    if previous_key == crop_key:
+        return 0.2
+    rules = ROTATION_RULES.get(previous_key, {})
+    if crop_key in rules:
+        return rules[crop_key]
+    previous_row = CROPS.get(previous_key)
+    if previous_row is None:
+        return 0.85
+    if previous_row["family"] == row["family"]:
+        return 0.3 if row["family"] == "patlıcangiller" else 0.5
+    if row["family"] == "baklagil":
+        return 1.0
+    return 0.85
+
+
+def _season(inputs):
+    season = _text(inputs.get("season"))
+    if season:
+        return season.lower()
+    month = _number(inputs.get("month"))
+    if month is not None and int(month) in MONTH_SEASONS:
+        return MONTH_SEASONS[int(month)]
+    return None
+
+
+def _score_crop(row, inputs, context):
+    """Ürünü puanla - (puan, kullanılan temel ağırlık, kriter puanları)"""
+    scores = {}
+    if context["ph"] is not None:
+        scores["ph"] = _ph_score(context["ph"], row)
+    if context["texture"] in row["textures"]:
+        scores["texture"] = row["textures"][context["texture"]]
+    if context["irrigation"] is not None:
+        scores["irrigation"] = _water_score(context["irrigation"], context["rain"], row)
+    if context["season"] is not None:
+        scores["season"] = 1.0 if context["season"] in row["seasons"] else 0.2
+    if context["previous_crop"] is not None:
+        scores["rotation"] = _rotation_score(context["previous_crop"], row)
+    if context["ec"] is not None:
+        scores["ec"] = 1.0 if context["ec"] <= row["ec_max"] else max(
+            0.0, 1.0 - (context["ec"] - row["ec_max"]) / row["ec_max"])
+    if context["temp"] is not None:
+        scores["temp"] = _range_score(context["temp"], *row["temp"], tolerance=8.0)
+    if context["rain"] is not None and context["irrigation"] in (None, 0):
+        scores["rain"] = _range_score(context["rain"], *row["rain"], tolerance=row["rain"][0])
+    if context["region"] is not None:
+        scores["region"] = 1.0 if row["crop"] in REGION_CROPS[context["region"]] else 0.5
+    if context["goals"]:
+        goal_scores = []
+        if "water" in context["goals"]:
+            goal_scores.append(1.0 - (row["water"] - 1) / 2)
+        if "risk" in context["goals"]:
+            goal_scores.append({1: 1.0, 2: 0.6, 3: 0.2}[row["risk"]])
+        if "value" in context["goals"]:
+            goal_scores.append({1: 0.5, 2: 0.75, 3: 1.0}[row["value"]])
+        scores["goal"] = sum(goal_scores) / len(goal_scores)
+
+    weights = {**CORE_WEIGHTS, **EXTRA_WEIGHTS}
+    total_weight = sum(weights[name] for name in scores)
+    if not total_weight:
+        return 0.0, 0.0, scores
+    fit = sum(weights[name] * score for name, score in scores.items()) / total_weight
+    core_weight = sum(CORE_WEIGHTS[name] for name in scores if name in CORE_WEIGHTS)
+    return fit, core_weight, scores
+
+
+def _reasons(row, scores, context):
+    reasons = []
+    if scores.get("ph", 0) >= 0.75:
+        reasons.append(f"pH {context['ph']:g}, {row['crop']} için uygun aralıkta "
+                       f"({row['ph_opt'][0]:g}-{row['ph_opt'][1]:g} ideal)")
+    if scores.get("texture", 0) >= 0.9:
+        reasons.append(f"{_capitalize(context['texture'])} bünye {row['crop']} için elverişli")
+    if scores.get("irrigation", 0) >= 1.0:
+        reasons.append("Su ihtiyacı mevcut sulama/yağış imkanıyla karşılanabilir")
+    if scores.get("rotation", 0) >= 0.95:
+        if row["family"] == "baklagil":
+            reasons.append(f"{context['previous_crop']} sonrası baklagil münavebesi toprağa azot kazandırır")
+        else:
+            reasons.append(f"{context['previous_crop']} sonrası münavebe açısından uygun")
+    if scores.get("season", 0) >= 1.0:
+        reasons.append(f"{_capitalize(context['season'])} ekimine uygun")
+    if scores.get("region", 0) >= 1.0:
+        reasons.append(f"{context['region']} bölgesinde yaygın ve adapte bir ürün")
+    if scores.get("temp", 0) >= 1.0:
+        reasons.append(f"Ortalama sıcaklık ({context['temp']:g}°C) ürünün ideal aralığında")
+    if "water" in context["goals"] and row["water"] == 1:
+        reasons.append("Düşük su ihtiyacı 'düşük su' hedefiyle uyumlu")
+    if "risk" in context["goals"] and row["risk"] == 1:
+        reasons.append("Dayanıklı bir ürün, üretim riski düşük")
+    return reasons
+
+
+def _risks(row, scores, context, inputs):
+    risks = []
+    if scores.get("ph", 1) < 0.75:
+        risks.append(f"pH {context['ph']:g}, {row['crop']} için ideal aralığın dışında")
+    if scores.get("ec", 1) < 1.0:
+        risks.append(f"EC {context['ec']:g} dS/m: tuzluluk {row['crop']} verimini düşürebilir")
+    if scores.get("irrigation", 1) < 1.0:
+        risks.append("Su ihtiyacı mevcut sulama imkanından fazla; kurak dönemde verim kaybı olabilir")
+    if scores.get("rotation", 1) < 0.6:
+        risks.append(f"{context['previous_crop']} sonrası aynı/benzer ürün hastalık ve zararlı baskısını artırır")
+    if scores.get("temp", 1) < 1.0:
+        risks.append("Ortalama sıcaklık ürünün ideal aralığının dışında")
+    if row["risk"] >= 2 and row["water"] >= 2:
+        risks.append("Kuraklık ve geç don dönemlerinde verim dalgalanabilir")
+    organic_matter = _number(inputs.get("organic_matter"))
+    if organic_matter is not None and organic_matter < 1.5:
+        risks.append(f"Organik madde düşük (%{organic_matter:g}); toprak yapısı ve su tutma zayıf olabilir")
+    if not risks:
+        risks.append("Belirgin bir risk görülmedi; mevsimsel hava koşullarını takip edin")
+    return risks
+
+
+def _quick_actions(row, context, inputs):
+    actions = []
+    ph = context["ph"]
+    if ph is not None and ph > 7.8:
+        actions.append("Kireçli toprakta fosfor ve çinko eksikliğine karşı yaprak gübresi değerlendirin")
+    if ph is not None and ph < 5.5:
+        actions.append("Toprak asitliğini azaltmak için kireçleme yapın")
+    organic_matter = _number(inputs.get("organic_matter"))
+    if organic_matter is not None and organic_matter < 2.0:
+        actions.append("Ahır gübresi veya yeşil gübre ile organik maddeyi artırın")
+    phosphorus = _number(inputs.get("phosphorus_P"))
+    if phosphorus is not None and phosphorus < 8:
+        actions.append("Fosfor düşük; ekimle birlikte taban gübresi (DAP/TSP) uygulayın")
+    if row["water"] >= 3:
+        actions.append("Su verimliliği için damla veya yağmurlama sulama planlayın")
+    if row["family"] == "baklagil":
+        actions.append("Tohumu uygun Rhizobium bakteri aşısı ile aşılayın")
+    actions.append("Ekim öncesi toprak nemini ve tohum yatağı hazırlığını kontrol edin")
+    return actions
+
+
+def recommend(inputs, min_confidence=80.0):
+    """Yerel öneri üret - güven eşiğin altındaysa veya hedef standart değilse None"""
+    goals = parse_goal(inputs.get("goal"))
+    if goals is None:
+        return None
+
+    texture = _text(inputs.get("soil_texture"))
+    province = _text(inputs.get("province"))
+    context = {
+        "ph": _number(inputs.get("pH")),
+        "texture": texture.lower() if texture else None,
+        "irrigation": IRRIGATION_LEVELS.get((_text(inputs.get("irrigation")) or "").lower()),
+        "season": _season(inputs),
+        "previous_crop": _text(inputs.get("previous_crop")),
+        "ec": _number(inputs.get("ec")),
+        "temp": _number(inputs.get("avg_temp_c")),
+        "rain": _number(inputs.get("rainfall_mm")),
+        "region": PROVINCE_REGIONS.get(fold_label(province)) if province else None,
+        "goals": goals,
+    }
+
+    ranked = sorted(
+        ((row,) + _score_crop(row, inputs, context) for row in CROP_TABLE),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    best, fit, core_weight, scores = ranked[0]
+    coverage = core_weight / sum(CORE_WEIGHTS.values())
+    margin = fit - ranked[1][1]
+    confidence = round(100 * fit * (0.4 + 0.6 * coverage) * min(1.0, 0.9 + margin))
+    if confidence < min_confidence:
+        return None
+
+    missing = [name for name in KEY_INPUTS if inputs.get(name) in (None, "")]
+    if "season" in missing and context["season"] is not None:
+        missing.remove("season")
+    assumptions = []
+    if context["ec"] is None:
+        assumptions.append("EC verilmediği için tuzluluk sorunu olmadığı varsayıldı")
+    if context["temp"] is None:
+        assumptions.append("Sıcaklık verilmediği için bölgenin mevsim normalleri varsayıldı")
+    if context["irrigation"] is None:
+        assumptions.append("Sulama bilgisi verilmediği için kuru tarım koşulları varsayıldı")
+
+    return {
+        "primary_crop": best["crop"],
+        "alternatives": [row["crop"] for row, *_ in ranked[1:4]],
+        "confidence": confidence,
+        "reasons": _reasons(best, scores, context),
+        "risks": _risks(best, scores, context, inputs),
+        "quick_actions": _quick_actions(best, context, inputs),
+        "missing_inputs": missing,
+        "assumptions": assumptions,
+    }
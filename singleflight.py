@@ -0,0 +1,155 @@
+"""Aynı anda gelen özdeş istekler için tek upstream akışı (single-flight)
+
+Eğitimlerde onlarca kişi aynı demo formunu aynı anda gönderdiğinde her istek
+ayrı bir model üretimi başlatır ve kota (429) hızla dolar. Burada aynı anahtarla
+(kanonik inputs özeti) gelen istekler tek bir üretimi paylaşır:
+
+- İlk istek (lider) üretimi arka planda başlatır; parçalar ortak bir tampona yazılır
+- Diğer abonelere parçalar bu tampondan dağıtılır (fan-out)
+- Geç katılanlar önce o ana kadar üretilmiş parçaları tekrar oynatır, sonra canlı akışa bağlanır
+- Üretim, liderin bağlantısı kopsa bile tamamlanır (diğer aboneler ve önbellek için)
+
+Üretim bitince anahtar silinir; sonraki istekler yanıt önbelleğinden karşılanır.
+"""
+
+import asyncio
+import threading
+
+
+class _Flight:
+    """Tek bir üretimin ortak parça tamponu (thread'ler arası)"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.cond = threading.Condition()
+
+    def append(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self):
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+
+    def subscribe(self):
+        index = 0
+        while True:
+            with self.cond:
+                while index >= len(self.chunks) and not self.done:
+                    self.cond.wait()
+                pending = self.chunks[index:]
+                finished = self.done and index + len(pending) == len(self.chunks)
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished:
+                return
+
+
+class _Stats:
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.in_flight = 0
+
+    def as_dict(self):
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": self.in_flight}
+
+
+class SingleFlight:
+    """Thread tabanlı sunucular (Flask) için single-flight"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+    def stream(self, key, producer):
+        """key için üretim varsa ona abone ol, yoksa producer() ile başlat; parça generator'ı döndür"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._stats.leaders += 1
+                self._stats.in_flight += 1
+                threading.Thread(target=self._pump, args=(key, flight, producer),
+                                 name="singleflight", daemon=True).start()
+            else:
+                self._stats.coalesced += 1
+        return flight.subscribe()
+
+    def _pump(self, key, flight, producer):
+        try:
+            for chunk in producer():
+                flight.append(chunk)
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                self._stats.in_flight -= 1
+            flight.finish()
+
+    def stats(self):
+        with self._lock:
+            return self._stats.as_dict()
+
+
+class _AsyncFlight:
+    """Tek bir üretimin ortak parça tamponu (tek event loop içinde)"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.cond = asyncio.Condition()
+        self.task = None
+
+    async def subscribe(self):
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            async with self.cond:
+                await self.cond.wait_for(lambda: index < len(self.chunks) or self.done)
+
+
+class AsyncSingleFlight:
+    """ASGI (Quart) için single-flight - producer bir async generator fonksiyonudur"""
+
+    def __init__(self):
+        self._flights = {}
+        self._stats = _Stats()
+
+    def stream(self, key, producer):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _AsyncFlight()
+            self._stats.leaders += 1
+            self._stats.in_flight += 1
+            # Görev referansı flight üzerinde tutulur (çöp toplayıcı iptal etmesin)
+            flight.task = asyncio.create_task(self._pump(key, flight, producer))
+        else:
+            self._stats.coalesced += 1
+        return flight.subscribe()
+
+    async def _pump(self, key, flight, producer):
+        try:
+            async for chunk in producer():
+                async with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._stats.in_flight -= 1
+            async with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def stats(self):
+        return self._stats.as_dict()
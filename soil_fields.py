@@ -0,0 +1,136 @@
+"""Toprak analiz raporu alanları ve alternatif isimleri
+
+parse_extracted_text prompt'undaki alan listesinin makine tarafından kullanılabilir
+karşılığı. Metin/tablo içinde hangi alanların geçtiğini hızlıca tespit etmek için
+derlenmiş (precompiled) desenler de burada tutulur.
+"""
+
+import re
+
+# Alan adı -> rapordaki alternatif isimler (prompt'taki sırayla)
+FIELD_SYNONYMS = {
+    # Zorunlu alanlar
+    "sample_code": ("Numune No", "Numune Kodu", "Numune Numarası", "Örnek No", "Sample No", "Sample Code", "Numune ID"),
+    "sample_date": ("Numune Alım Tarihi", "Örnek Alım Tarihi", "Numune Alma Tarihi", "Sample Date", "Alım Tarihi"),
+    "analysis_date": ("Analiz Tarihi", "Tahlil Tarihi", "Test Tarihi", "Analysis Date", "Rapor Tarihi"),
+    "province": ("İl", "Province", "İl Adı", "Şehir", "City", "Location"),
+    "sample_depth": ("Numune Derinliği", "Örnek Derinliği", "Depth", "Derinlik"),
+    "laboratory_name": ("Laboratuvar", "Lab", "Laboratuvar Adı", "Laboratory", "Tahlil Yeri", "Analiz Yeri"),
+    "pH": ("pH", "pH değeri", "pH degeri"),
+    "organic_matter": ("Organik Madde", "OM", "Organik Materyal"),
+    "phosphorus_P": ("Fosfor", "P", "P2O5", "Phosphorus", "Alınabilir P", "Available P"),
+    "potassium_K": ("Potasyum", "K", "K2O", "Potassium", "Değişebilir K", "Exchangeable K"),
+    # Genellikle bulunan alanlar
+    "ec": ("EC", "Elektriksel İletkenlik", "Electrical Conductivity", "Tuzluluk", "Salinity"),
+    "lime_caCO3": ("Kireç", "CaCO3", "Lime", "Kireç %", "Kireç içeriği"),
+    "soil_texture": ("Toprak Bünyesi", "Tekstür", "Texture", "Bünye"),
+    "nitrogen_N": ("Azot", "N", "Nitrogen", "Toplam N", "Total N", "Alınabilir N", "Available N"),
+    "evaluation_level": ("Değerlendirme", "Seviye", "Level", "Rating"),
+    "fertilization_recommendation": ("Gübreleme", "Fertilization", "Öneri", "Recommendation", "N-P-K", "NPK"),
+    # Opsiyonel mikro elementler
+    "district": ("İlçe", "District", "County", "İlçe Adı"),
+    "calcium_Ca": ("Kalsiyum", "Ca", "Calcium", "Ca++", "Ca+2"),
+    "magnesium_Mg": ("Magnezyum", "Mg", "Magnesium", "Mg++", "Mg+2"),
+    "sulfur_S": ("Kükürt", "S", "Sulfur", "Sülfür"),
+    "iron_Fe": ("Demir", "Fe", "Iron", "Fe++", "Fe+2", "Fe+3"),
+    "zinc_Zn": ("Çinko", "Zn", "Zinc", "Zn++"),
+    "manganese_Mn": ("Mangan", "Mn", "Manganese", "Mn++", "Mn+2"),
+    "copper_Cu": ("Bakır", "Cu", "Copper", "Cu++", "Cu+2"),
+    "boron_B": ("Bor", "B", "Boron"),
+    "cec": ("CEC", "Katyon Değişim Kapasitesi", "Cation Exchange Capacity"),
+    "total_salt": ("Toplam Tuz", "Total Salt", "Tuz", "Salt"),
+    "sar": ("SAR", "Sodium Adsorption Ratio"),
+    "esp": ("ESP", "Exchangeable Sodium Percentage"),
+    "organic_carbon_C": ("Organik Karbon", "Organic Carbon", "C", "Carbon"),
+    "soil_moisture": ("Toprak Nemi", "Soil Moisture", "Nem", "Moisture"),
+    "bulk_density": ("Bulk Density", "Hacim Ağırlığı", "Yoğunluk", "Density"),
+}
+
+# Rapor okunurken "yeterli veri bulundu" kararı için aranan temel toprak değerleri
+EARLY_EXIT_FIELDS = (
+    "pH", "organic_matter", "phosphorus_P", "potassium_K",
+    "ec", "lime_caCO3", "nitrogen_N",
+)
+
+WORD_CHARS = r"0-9A-Za-zÇĞİÖŞÜçğıöşü"
+
+
+def _label_alternation(synonyms):
+    # Uzun isimler önce denensin ("Toplam N" "N"den önce)
+    ordered = sorted(synonyms, key=len, reverse=True)
+    return "|".join(re.escape(name) for name in ordered)
+
+
+def label_regex(synonyms):
+    """Etiketlerden birini kelime sınırlarıyla eşleyen desen metni"""
+    return rf"(?<![{WORD_CHARS}])(?:{_label_alternation(synonyms)})(?![{WORD_CHARS}])"
+
+
+def _compile_value_pattern(synonyms):
+    """Etiket + (kısa ara metin) + sayı desenini derle, örn. "Fosfor (P): 45" """
+    return re.compile(label_regex(synonyms) + r"[^\d\n]{0,25}?-?\d", re.IGNORECASE)
+
+
+_VALUE_PATTERNS = {
+    field: _compile_value_pattern(synonyms) for field, synonyms in FIELD_SYNONYMS.items()
+}
+
+
+def fields_with_values(text, fields=EARLY_EXIT_FIELDS):
+    """Metinde etiketinin yanında sayısal değeri görülen alanları döndür"""
+    return {field for field in fields if _VALUE_PATTERNS[field].search(text)}
+
+
+# Sayısal değer taşıyan alanlar (birimler kaldırılıp float'a çevrilir)
+NUMERIC_FIELDS = frozenset((
+    "pH", "organic_matter", "ec", "lime_caCO3", "sample_depth",
+    "phosphorus_P", "potassium_K", "nitrogen_N", "calcium_Ca",
+    "magnesium_Mg", "sulfur_S", "iron_Fe", "zinc_Zn", "manganese_Mn",
+    "copper_Cu", "boron_B", "cec", "total_salt", "sar", "esp",
+    "organic_carbon_C", "soil_moisture", "bulk_density",
+))
+
+_ASCII_FOLD = str.maketrans({
+    "ç": "c", "Ç": "c", "ğ": "g", "Ğ": "g", "ı": "i", "I": "i", "İ": "i",
+    "ö": "o", "Ö": "o", "ş": "s", "Ş": "s", "ü": "u", "Ü": "u",
+})
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_PARENTHESES = re.compile(r"[\(\[](.*?)[\)\]]")
+_UNIT_SUFFIX = re.compile(
+    r"\s*(?:mg/kg|mg kg-1|ds/m|g/cm3|meq/100g|kg/ha|ppm|cm|mm|%)\s*$", re.IGNORECASE
+)
+
+
+def fold_label(label):
+    """Etiketi karşılaştırma için sadeleştir: Türkçe karakterleri ASCII'ye çevir,
+    küçük harf yap, harf/rakam dışını at ("Kireç (%)" -> "kirec")"""
+    return _NON_ALNUM.sub("", str(label).translate(_ASCII_FOLD).lower())
+
+
+def _build_header_lookup():
+    lookup = {}
+    for field, synonyms in FIELD_SYNONYMS.items():
+        for name in (field,) + synonyms:
+            lookup.setdefault(fold_label(name), field)
+    return lookup
+
+
+# Sadeleştirilmiş başlık -> alan adı
+HEADER_LOOKUP = _build_header_lookup()
+
+
+def match_column(header):
+    """CSV/Excel sütun başlığını bilinen bir alana eşle, eşleşmezse None
+
+    Denenen adaylar: başlığın tamamı, birim ve parantez atılmış hali,
+    parantez içindeki kısaltma ("Fosfor (P) mg/kg" -> "fosfor", "p").
+    """
+    header = str(header).strip()
+    without_unit = _UNIT_SUFFIX.sub("", header)
+    candidates = [header, without_unit, _PARENTHESES.sub("", without_unit)]
+    candidates += _PARENTHESES.findall(without_unit)
+    for candidate in candidates:
+        field = HEADER_LOOKUP.get(fold_label(candidate))
+        if field is not None:
+            return field
+    return None
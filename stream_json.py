@@ -0,0 +1,238 @@
+"""Model akışı üzerinde artımlı (incremental) JSON ayrıştırma ve SSE olayları
+
+Model yanıtı parça parça gelirken her parçada tüm tamponu yeniden JSON.parse
+etmek yanıt uzunluğunda O(n²) maliyet demektir. IncrementalJSONParser her
+karakteri bir kez tarar (tamponda sadece henüz kapanmamış değer tutulur) ve üst düzey bir alan (örn. "primary_crop") ya da üst
+düzey bir dizinin elemanı (örn. "reasons"un bir maddesi) tamamlandığı anda olay
+üretir. Baştaki ```json gibi JSON dışı metin atlanır.
+
+RecommendationEventStream bu olayları server-sent events (SSE) satırlarına çevirir:
+
+    event: field   data: {"key": "primary_crop", "value": "buğday"}
+    event: item    data: {"key": "reasons", "index": 0, "value": "..."}
+    event: final   data: {... doğrulanmış tam öneri ...}
+    event: error   data: {"error": "...", "message": "..."}
+"""
+
+import json
+import re
+
+_STRING_SPECIAL = '"\\'
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",]}" + _WHITESPACE
+
+RECOMMENDATION_LISTS = ("alternatives", "reasons", "risks", "quick_actions", "missing_inputs", "assumptions")
+
+
+class IncrementalJSONParser:
+    """Parça parça beslenen metinden tek bir JSON nesnesini ayrıştır"""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack = []  # her eleman: {"type": "{" | "[", "start", "key", "expect", "index", "items"}
+        self._string_start = None
+        self._escape = False
+        self._scalar_start = None
+        self._root = {}
+        self.result = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def feed(self, chunk):
+        """Yeni parçayı işle ve tamamlanan değerler için olay listesi döndür
+
+        Olaylar: ("field", anahtar, değer) ve ("item", anahtar, sıra, değer)
+        """
+        events = []
+        if self.done or not chunk:
+            return events
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        while i < len(text) and not self.done:
+            char = text[i]
+            if self._string_start is not None:
+                if self._escape:
+                    self._escape = False
+                elif char not in _STRING_SPECIAL:
+                    # Metin içeriğini karakter karakter taramadan sonraki " veya \ işaretine atla
+                    match = _STRING_SPECIAL_RE.search(text, i)
+                    i = match.start() if match else len(text)
+                    continue
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    start, self._string_start = self._string_start, None
+                    self._string_done(start, i + 1, events)
+                i += 1
+                continue
+            if self._scalar_start is not None:
+                if char not in _SCALAR_END:
+                    i += 1
+                    continue
+                start, self._scalar_start = self._scalar_start, None
+                self._value_done(start, i, events)
+            if not self._stack:
+                # Nesne başlamadan önceki metni (```json vb.) atla
+                if char == "{":
+                    self._push("{", i)
+                i += 1
+                continue
+            frame = self._stack[-1]
+            if char == '"':
+                self._string_start = i
+            elif char in "{[":
+                self._push(char, i)
+            elif char in "}]":
+                self._stack.pop()
+                self._value_done(frame["start"], i + 1, events, closed=frame)
+            elif char == ":":
+                frame["expect"] = "value"
+            elif char == ",":
+                if frame["type"] == "{":
+                    frame["expect"] = "key"
+            elif char not in _WHITESPACE:
+                self._scalar_start = i
+            i += 1
+        self._pos = i
+        self._trim()
+        return events
+
+    def _trim(self):
+        """Tamamlanmış değerlerin metnini tampondan at - tampon sadece açık değeri tutar"""
+        # Üst düzey diziler elemanlarından kurulur, metinlerine ihtiyaç yoktur
+        starts = [frame["start"] for frame in self._stack[1:] if frame["items"] is None]
+        starts += [start for start in (self._string_start, self._scalar_start) if start is not None]
+        keep_from = min(starts + [self._pos])
+        if keep_from <= 0:
+            return
+        self._text = self._text[keep_from:]
+        self._pos -= keep_from
+        for frame in self._stack:
+            frame["start"] -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
+        if self._scalar_start is not None:
+            self._scalar_start -= keep_from
+
+    def _push(self, kind, start):
+        top_level_array = kind == "[" and len(self._stack) == 1
+        self._stack.append({"type": kind, "start": start, "key": None,
+                            "expect": "key" if kind == "{" else "value", "index": 0,
+                            "items": [] if top_level_array else None})
+
+    def _string_done(self, start, end, events):
+        frame = self._stack[-1]
+        if frame["type"] == "{" and frame["expect"] == "key":
+            frame["key"] = json.loads(self._text[start:end])
+            return
+        self._value_done(start, end, events)
+
+    def _value_done(self, start, end, events, closed=None):
+        if not self._stack:
+            # Kök nesne kapandı - alanları zaten tek tek ayrıştırıldı
+            self.result = self._root
+            return
+        parent = self._stack[-1]
+        depth = len(self._stack)
+        if depth == 1:
+            if closed is not None and closed["items"] is not None:
+                value = closed["items"]
+            else:
+                value = json.loads(self._text[start:end])
+            self._root[parent["key"]] = value
+            events.append(("field", parent["key"], value))
+        elif depth == 2 and parent["items"] is not None:
+            value = json.loads(self._text[start:end])
+            parent["items"].append(value)
+            events.append(("item", self._stack[0]["key"], parent["index"], value))
+        if parent["type"] == "[":
+            parent["index"] += 1
+
+
+def validate_recommendation(data):
+    """Öneri nesnesini şemaya göre doğrula ve eksik listeleri tamamla
+
+    primary_crop boş olmayan bir metin olmalı; confidence 0-100 aralığına çekilir.
+    Geçersizse ValueError fırlatır.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Öneri bir JSON nesnesi olmalı")
+    primary_crop = data.get("primary_crop")
+    if not isinstance(primary_crop, str) or not primary_crop.strip():
+        raise ValueError("primary_crop eksik")
+    validated = dict(data)
+    for key in RECOMMENDATION_LISTS:
+        value = data.get(key)
+        if value is None:
+            value = []
+        elif not isinstance(value, list):
+            value = [value]
+        validated[key] = [str(item) for item in value]
+    confidence = data.get("confidence")
+    try:
+        validated["confidence"] = max(0, min(100, round(float(confidence))))
+    except (TypeError, ValueError):
+        validated["confidence"] = None
+    return validated
+
+
+def sse_event(event, data):
+    """Tek bir SSE olayı metni"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class RecommendationEventStream:
+    """Öneri akışı metin parçalarını SSE olaylarına çevir (sync ve async modlarda ortak)"""
+
+    def __init__(self):
+        self.parser = IncrementalJSONParser()
+        self.is_error = False
+
+    def feed(self, chunk):
+        output = []
+        for event in self.parser.feed(chunk):
+            if event[0] == "field" and event[1] == "error":
+                # recommendation_error_message çıktısı - sadece sonda error olayı gönderilir
+                self.is_error = True
+            if self.is_error:
+                continue
+            if event[0] == "field":
+                output.append(sse_event("field", {"key": event[1], "value": event[2]}))
+            else:
+                output.append(sse_event("item", {"key": event[1], "index": event[2], "value": event[3]}))
+        return output
+
+    def finish(self):
+        result = self.parser.result
+        if result is None:
+            return [sse_event("error", {"error": "Yanıt hatası",
+                                        "message": "Model yanıtı JSON olarak tamamlanamadı"})]
+        if self.is_error or "error" in result:
+            return [sse_event("error", result)]
+        try:
+            return [sse_event("final", validate_recommendation(result))]
+        except ValueError as e:
+            return [sse_event("error", {"error": "Yanıt hatası", "message": str(e)})]
+
+
+def recommendation_events(chunks):
+    """Metin parçası generator'ını SSE olay generator'ına çevir"""
+    stream = RecommendationEventStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.finish()
+
+
+async def arecommendation_events(chunks):
+    """recommendation_events'in async karşılığı"""
+    stream = RecommendationEventStream()
+    async for chunk in chunks:
+        for event in stream.feed(chunk):
+            yield event
+    for event in stream.finish():
+        yield event
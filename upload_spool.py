@@ -0,0 +1,195 @@
+"""Yüklenen dosyaları diske bir kez yazma (spool) ve dosya yoluyla paylaşma
+
+Eskiden yüklenen dosya request.read() ile belleğe alınıp pdfplumber/docx/pandas
+için io.BytesIO'ya sarılıyor, Docling yolu ise bir kopyasını daha geçici dosyaya
+yazıyordu; 10 MB'lık bir yükleme istek başına 2-3 kez bellekte tutuluyordu.
+
+Burada:
+- Form ayrıştırıcısı (werkzeug/Quart) dosya parçalarını doğrudan spool
+  klasöründeki adlandırılmış geçici dosyaya yazar (spool_stream_factory)
+- spool_upload bu dosyayı kopyalamadan sahiplenir (aynı dosya sistemi içinde
+  hard link; link kurulamazsa parça parça kopyalanır) ve SHA-256 özetini
+  parça parça okuyarak hesaplar
+- Çıkarıcılar (pdfplumber, python-docx, pandas, Docling) dosya yolunu alır;
+  süreç havuzuna da içerik yerine yol gönderilir
+- Boyut sınırı dosya türüne göre ayrıdır; aşılırsa UploadTooLarge (HTTP 413)
+
+Böylece eşzamanlı yüklemelerde istek başına bellek kullanımı dosya boyutundan
+bağımsız kalır.
+
+UPLOAD_SPOOL_DIR     Spool klasörü (varsayılan: sistem geçici klasörü)
+UPLOAD_SIZE_LIMITS   Tür başına sınır (MB), örn. "pdf=20,word=10,table=10,image=10"
+"""
+
+import hashlib
+import os
+import tempfile
+import uuid
+
+from config import env_list, env_str
+
+_CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_KINDS = {
+    "pdf": (".pdf",),
+    "word": (".doc", ".docx"),
+    "table": (".csv", ".xlsx", ".xls"),
+    "image": (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"),
+}
+
+DEFAULT_SIZE_LIMITS_MB = {"pdf": 10, "word": 10, "table": 10, "image": 10}
+
+
+class UploadTooLarge(Exception):
+    """Dosya, türü için izin verilen boyutu aşıyor"""
+
+    def __init__(self, kind, limit):
+        if limit >= 1024 * 1024:
+            size = f"{limit / (1024 * 1024):g} MB"
+        else:
+            size = f"{limit // 1024} KB"
+        super().__init__(f"{kind} dosyaları en fazla {size} olabilir")
+        self.kind = kind
+        self.limit = limit
+
+
+def spool_dir():
+    path = env_str("UPLOAD_SPOOL_DIR") or tempfile.gettempdir()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def upload_kind(filename):
+    """Dosya adından tür: pdf, word, table, image (desteklenmiyorsa None)"""
+    name = (filename or "").lower()
+    for kind, extensions in UPLOAD_KINDS.items():
+        if name.endswith(extensions):
+            return kind
+    return None
+
+
+def size_limits():
+    """Tür başına bayt cinsinden boyut sınırları"""
+    limits = dict(DEFAULT_SIZE_LIMITS_MB)
+    for item in env_list("UPLOAD_SIZE_LIMITS"):
+        kind, _, value = item.partition('=')
+        try:
+            limits[kind.strip()] = float(value)
+        except ValueError:
+            continue
+    return {kind: int(megabytes * 1024 * 1024) for kind, megabytes in limits.items()}
+
+
+def max_upload_bytes():
+    """İstek gövdesi için üst sınır (MAX_CONTENT_LENGTH) - en büyük tür sınırı"""
+    return max(size_limits().values())
+
+
+def spool_stream_factory(total_content_length=None, content_type=None, filename=None, content_length=None):
+    """Form ayrıştırıcısı için dosya akışı - parçalar doğrudan spool klasörüne yazılır
+
+    Dosya kapatılınca silinir; spool_upload sahiplenmediyse diskte iz kalmaz.
+    """
+    return tempfile.NamedTemporaryFile(mode="w+b", dir=spool_dir(), prefix="upload-", suffix=".part")
+
+
+class SpooledUpload:
+    """Diskteki tek kopya: yol, özet ve meta veriler - kapatılınca dosya silinir"""
+
+    def __init__(self, path, filename, mime_type, size, digest):
+        self.path = path
+        self.filename = filename
+        self.mime_type = mime_type
+        self.size = size
+        self.digest = digest
+
+    @property
+    def kind(self):
+        return upload_kind(self.filename)
+
+    def as_dict(self):
+        """Kuyruğa (JSON) yazılabilir hali - dosyanın sahipliği alıcıya geçer"""
+        return {"path": self.path, "filename": self.filename, "mime_type": self.mime_type,
+                "size": self.size, "digest": self.digest}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["path"], data["filename"], data["mime_type"], data["size"], data["digest"])
+
+    def read_bytes(self):
+        """İçeriği bellek al - sadece bayt isteyen API'ler için (ör. Gemini Vision)"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _new_path(directory, filename):
+    # Uzantı korunur - Docling dosya türünü uzantıdan anlar
+    extension = os.path.splitext(filename or "")[1].lower()
+    return os.path.join(directory, f"upload-{uuid.uuid4().hex}{extension}")
+
+
+def spool_upload(file_storage):
+    """Yüklenen dosyayı (werkzeug/Quart FileStorage) diskte sahiplen - SpooledUpload döndür
+
+    Form ayrıştırıcısı dosyayı zaten spool klasörüne yazdıysa kopyalanmaz.
+    Tür sınırı aşılırsa UploadTooLarge fırlatılır.
+    """
+    filename = file_storage.filename
+    kind = upload_kind(filename)
+    limit = size_limits().get(kind, max_upload_bytes())
+    stream = file_storage.stream
+    directory = spool_dir()
+    path = _new_path(directory, filename)
+
+    spooled_name = getattr(stream, "name", None)
+    if isinstance(spooled_name, str) and os.path.dirname(os.path.abspath(spooled_name)) == os.path.abspath(directory):
+        stream.flush()
+        size = os.fstat(stream.fileno()).st_size
+        if size > limit:
+            raise UploadTooLarge(kind or "diğer", limit)
+        try:
+            os.link(spooled_name, path)
+        except OSError:
+            # Hard link desteklenmiyor veya farklı dosya sistemi - aşağıda kopyalanır
+            pass
+        else:
+            return SpooledUpload(path, filename, file_storage.content_type, size, _hash_file(path))
+
+    # Spool dışı akış (ör. bellekte tutulan küçük parça) veya link kurulamadı - parça parça kopyala
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    try:
+        with open(path, "wb") as target:
+            for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(kind or "diğer", limit)
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(path, filename, file_storage.content_type, size, digest.hexdigest())
+